@@ -9,6 +9,17 @@ class Settings(BaseSettings):
     DB_NAME: str = "face_tracking"
     DB_USER: str = "postgres"
     DB_PASSWORD: str = "password"
+    # Named connection pools; pool timeouts are seconds to wait for a free connection
+    DB_INGEST_POOL_SIZE: int = 10  # Camera workers, attendance writer, gallery sync
+    DB_INGEST_MAX_OVERFLOW: int = 5
+    DB_INGEST_POOL_TIMEOUT: float = 30.0
+    DB_API_POOL_SIZE: int = 20  # API requests
+    DB_API_MAX_OVERFLOW: int = 20
+    DB_API_POOL_TIMEOUT: float = 10.0
+    DB_REPORTING_POOL_SIZE: int = 5  # Reports and exports, on read replicas when configured
+    DB_REPORTING_MAX_OVERFLOW: int = 5
+    DB_REPORTING_POOL_TIMEOUT: float = 30.0
+    DB_REPLICA_HOSTS: str = ""  # Read replicas for reports, comma-separated host[:port]
     
     # Security Configuration
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -34,6 +45,87 @@ class Settings(BaseSettings):
     MAX_CONCURRENT_STREAMS: int = 5
     STREAM_QUALITY: str = "medium"
     FRAME_RATE: int = 30
+    # Writes through DatabaseManager refresh the camera snapshot at once;
+    # this bounds how long other processes' writes take to show up
+    CAMERA_SNAPSHOT_MAX_AGE_SECONDS: float = 60.0
+    
+    # Live Stream Configuration (JPEG quality follows STREAM_QUALITY)
+    STREAM_FPS: float = 15.0  # Frames encoded per second for each camera, shared by all viewers
+    STREAM_CLIENT_QUEUE_SIZE: int = 2  # Frames buffered per viewer; slow viewers drop the oldest
+    
+    # Frame Deduplication Configuration
+    FRAME_DEDUP_ENABLED: bool = True
+    FRAME_DEDUP_HASH_SIZE: int = 8  # Perceptual hash grid (8 -> 64-bit hash)
+    FRAME_DEDUP_MAX_DISTANCE: int = 4  # Max Hamming distance to treat frames as identical
+    
+    # Face Tracker Configuration
+    TRACKER_MAX_AGE_SECONDS: float = 2.0
+    TRACKER_MAX_COST: float = 0.7
+    TRACKER_IOU_WEIGHT: float = 0.5
+    
+    # Attendance Event Configuration
+    ATTENDANCE_COOLDOWN_SECONDS: int = 300  # Out-of-view time before a sighting is a new event
+    ATTENDANCE_STATE_RETENTION_HOURS: int = 24
+    
+    # Session Pairing Configuration
+    SESSION_RETENTION_DAYS: int = 7
+    SESSION_MAX_HOURS: float = 16.0  # Open sessions older than this are closed as incomplete
+    SESSION_EVENTS_PER_EMPLOYEE: int = 32
+    
+    # Attendance Writer Configuration
+    ATTENDANCE_WRITER_QUEUE_SIZE: int = 10000
+    ATTENDANCE_WRITER_BATCH_SIZE: int = 500
+    ATTENDANCE_WRITER_FLUSH_INTERVAL: float = 1.0  # Seconds before a partial batch is flushed
+    ATTENDANCE_WRITER_RETRY_MAX_SECONDS: float = 30.0
+    ATTENDANCE_DEAD_LETTER_FILE: str = "attendance_journal/dead_letter.jsonl"  # Rows the database rejected
+    
+    # Attendance Journal Configuration
+    ATTENDANCE_JOURNAL_ENABLED: bool = True
+    ATTENDANCE_JOURNAL_DIR: str = "attendance_journal"
+    ATTENDANCE_JOURNAL_SEGMENT_MB: int = 64
+    ATTENDANCE_JOURNAL_FSYNC_INTERVAL: float = 0.05  # Max seconds between fsyncs of pending events
+    ATTENDANCE_JOURNAL_FSYNC_BATCH: int = 64
+    
+    # Attendance Partition Configuration
+    ATTENDANCE_PARTITION_MONTHS_AHEAD: int = 3
+    ATTENDANCE_PARTITION_CHECK_HOURS: float = 24.0
+    
+    # Presence Registry Configuration
+    PRESENCE_BACKEND: str = "memory"  # 'memory' (per process) or 'redis' (shared by all workers)
+    REDIS_URL: str = "redis://localhost:6379/0"
+    PRESENCE_REDIS_PREFIX: str = "presence"
+    PRESENCE_SYNC_SECONDS: float = 1.0  # Memory backend: how often readers pick up other processes' logs
+    PRESENCE_RELOAD_SECONDS: float = 300.0  # Memory backend: full reload interval
+    
+    # Attendance Export Configuration
+    EXPORT_DIR: str = "exports"
+    EXPORT_CHUNK_SIZE: int = 5000
+    EXPORT_ASYNC_THRESHOLD_DAYS: int = 31  # Longer (or open-ended) ranges run as background jobs
+    EXPORT_RETENTION_HOURS: int = 24
+    EXPORT_PRUNE_INTERVAL_MINUTES: float = 60.0
+    
+    # Face Embedding Configuration
+    EMBEDDING_DIM: int = 512
+    EMBEDDING_MODEL_VERSION: str = "antelopev2"
+    GALLERY_SYNC_POLL_SECONDS: float = 5.0
+    GALLERY_SYNC_USE_NOTIFY: bool = True  # Postgres LISTEN/NOTIFY; polling is always the fallback
+    
+    # Attendance Analytics Configuration
+    WORK_DAY_START: str = "09:00"  # Scheduled start in WORK_TIMEZONE, used for lateness
+    LATE_GRACE_MINUTES: int = 5
+    WORK_TIMEZONE: str = "UTC"
+    ANALYTICS_MAX_DAYS: int = 93
+    
+    # Response Cache Configuration
+    # With "memory", writes only invalidate the cache of the process that made
+    # them: attendance recorded by the camera monitor (attendance listeners) or
+    # written by another API worker leaves other workers' entries stale until
+    # RESPONSE_CACHE_TTL_SECONDS. Use "redis" when running more than one worker.
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared, uses REDIS_URL)
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_REDIS_PREFIX: str = "response_cache"
     
     # File Storage
     UPLOAD_DIR: str = "uploads"
@@ -29,6 +29,10 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start face detection system: {e}")
     
+    # Expired export jobs are pruned by every worker; each job is deleted once
+    from tasks.export_tasks import export_job_maintenance
+    export_job_maintenance.start()
+    
     yield
     
     # Shutdown
@@ -39,6 +43,11 @@ async def lifespan(app: FastAPI):
             await face_detection_task
         except asyncio.CancelledError:
             logger.info("Face detection system stopped")
+    
+    export_job_maintenance.stop()
+    
+    from db.db_config import dispose_async_engine
+    await dispose_async_engine()
 
 # Create FastAPI app with lifespan
 app = FastAPI(
@@ -2,30 +2,55 @@
 Attendance management router
 """
 
+import json
+import os
+import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from datetime import datetime, date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, and_, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, date, timedelta
 
 from app.schemas import (
     AttendanceLog, AttendanceLogCreate, AttendanceResponse, 
-    MessageResponse, CurrentUser, Employee
+    MessageResponse, CurrentUser, Employee, DailyAttendanceHistoryResponse,
+    AttendanceAnalyticsResponse
 )
+from app.config import settings
 from app.security import (
     require_admin_or_above, require_employee_or_above, 
-    get_current_active_user, check_employee_access
+    get_current_active_user, check_employee_access, has_admin_privileges
 )
-from db.db_config import get_db
-from db.db_models import AttendanceLog as AttendanceLogModel, Employee as EmployeeModel
+from db.db_config import get_async_db, get_async_read_db, get_api_session, get_read_session
+from db.db_models import (
+    AttendanceLog as AttendanceLogModel, Employee as EmployeeModel,
+    DailyAttendanceSummary as DailyAttendanceSummaryModel, ExportJob as ExportJobModel
+)
+from db.export_jobs import update_export_job
+from db.attendance_summary import upsert_daily_summary, rebuild_daily_summary
+from db.attendance_queries import (
+    build_attendance_query, build_session_events_query, stream_attendance_rows, encode_cursor, decode_cursor
+)
+from db.attendance_analytics import get_daily_attendance_analytics
+from core.attendance_pairing import hours_worked, pair_sessions
+from core.presence_registry import presence_registry
+from utils.response_cache import response_cache, TAG_ATTENDANCE, TAG_EMPLOYEES
+from utils.attendance_export import (
+    EXPORT_FORMATS, is_format_available, iter_export_chunks, write_export_file, export_filename,
+    export_file_path
+)
+from utils.logging import get_logger
 
 router = APIRouter(prefix="/attendance", tags=["Attendance Management"])
+logger = get_logger(__name__)
 
 @router.get("/me", response_model=AttendanceResponse)
 async def get_my_attendance(
     start_date: Optional[date] = Query(None, description="Start date for attendance records"),
     end_date: Optional[date] = Query(None, description="End date for attendance records"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
@@ -38,9 +63,9 @@ async def get_my_attendance(
         )
     
     # Get employee details
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == current_user.employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == current_user.employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -49,20 +74,20 @@ async def get_my_attendance(
         )
     
     # Build query for attendance logs
-    query = db.query(AttendanceLogModel).filter(
+    query = select(AttendanceLogModel).where(
         AttendanceLogModel.employee_id == current_user.employee_id
     )
     
     # Apply date filters if provided
     if start_date:
-        query = query.filter(AttendanceLogModel.timestamp >= start_date)
+        query = query.where(AttendanceLogModel.timestamp >= start_date)
     if end_date:
         from datetime import datetime, time
         end_datetime = datetime.combine(end_date, time.max)
-        query = query.filter(AttendanceLogModel.timestamp <= end_datetime)
+        query = query.where(AttendanceLogModel.timestamp <= end_datetime)
     
     # Order by timestamp descending
-    attendance_logs = query.order_by(desc(AttendanceLogModel.timestamp)).all()
+    attendance_logs = (await db.scalars(query.order_by(desc(AttendanceLogModel.timestamp)))).all()
     
     return AttendanceResponse(
         employee_id=employee.employee_id,
@@ -70,64 +95,296 @@ async def get_my_attendance(
         attendance_logs=attendance_logs
     )
 
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def _stream_ndjson(stmt, lines_per_chunk: int = 500):
+    """Serialize query rows as NDJSON straight from a server-side cursor."""
+    # The request session is closed before the response body is streamed
+    session = get_read_session()
+    try:
+        lines = []
+        for row in stream_attendance_rows(session, stmt):
+            lines.append(json.dumps(dict(row), default=_json_value))
+            if len(lines) >= lines_per_chunk:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    finally:
+        session.close()
+
 @router.get("/all", response_model=List[AttendanceResponse])
 async def get_all_attendance(
+    response: Response,
     start_date: Optional[date] = Query(None, description="Start date for attendance records"),
     end_date: Optional[date] = Query(None, description="End date for attendance records"),
     employee_id: Optional[str] = Query(None, description="Filter by specific employee ID"),
-    db: Session = Depends(get_db),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum records per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="'json' for one page, 'ndjson' to stream all records"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Get all attendance records (Admin+ only)
+    
+    Returns one page of records, newest first, grouped by employee. When more
+    records match, the X-Next-Cursor header holds the cursor for the next
+    page. With format=ndjson every matching record after the cursor is
+    streamed as one JSON object per line.
     """
-    # Build base query
-    query = db.query(AttendanceLogModel)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    # Apply employee filter if provided
-    if employee_id:
-        query = query.filter(AttendanceLogModel.employee_id == employee_id)
+    stmt = build_attendance_query(start_date, end_date, employee_id, after=after)
     
-    # Apply date filters if provided
-    if start_date:
-        query = query.filter(AttendanceLogModel.timestamp >= start_date)
-    if end_date:
-        from datetime import datetime, time
-        end_datetime = datetime.combine(end_date, time.max)
-        query = query.filter(AttendanceLogModel.timestamp <= end_datetime)
+    if format == "ndjson":
+        return StreamingResponse(_stream_ndjson(stmt), media_type="application/x-ndjson")
     
-    # Get all matching attendance logs
-    attendance_logs = query.order_by(desc(AttendanceLogModel.timestamp)).all()
+    # Fetch one extra row to know whether there is a next page
+    rows = (await db.execute(stmt.limit(limit + 1))).mappings().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
     
-    # Group by employee
+    # Group by employee, keeping newest-first order
     employee_attendance = {}
-    for log in attendance_logs:
-        if log.employee_id not in employee_attendance:
-            employee_attendance[log.employee_id] = []
-        employee_attendance[log.employee_id].append(log)
-    
-    # Build response
-    responses = []
-    for emp_id, logs in employee_attendance.items():
-        employee = db.query(EmployeeModel).filter(
-            EmployeeModel.employee_id == emp_id
-        ).first()
-        
-        if employee:
-            responses.append(AttendanceResponse(
-                employee_id=emp_id,
-                employee_name=employee.name,
-                attendance_logs=logs
-            ))
-    
-    return responses
+    for row in rows:
+        entry = employee_attendance.get(row["employee_id"])
+        if entry is None:
+            entry = employee_attendance[row["employee_id"]] = {
+                "employee_id": row["employee_id"],
+                "employee_name": row["employee_name"],
+                "attendance_logs": []
+            }
+        entry["attendance_logs"].append(dict(row))
+    
+    return list(employee_attendance.values())
+
+def _stream_export(stmt, fmt: str):
+    """Stream an export from a session owned by the response."""
+    session = get_read_session()
+    try:
+        yield from iter_export_chunks(session, stmt, fmt, chunk_size=settings.EXPORT_CHUNK_SIZE)
+    finally:
+        session.close()
+
+def _run_export_job(job_id: str, fmt: str, file_path: str, stmt):
+    """Background task that writes an export job's file and records its progress."""
+    update_export_job(get_api_session, job_id, status="running")
+    rows_written = 0
+    
+    def progress(rows: int):
+        nonlocal rows_written
+        rows_written = rows
+        update_export_job(get_api_session, job_id, rows_written=rows)
+    
+    try:
+        write_export_file(
+            get_read_session, stmt, fmt, file_path,
+            chunk_size=settings.EXPORT_CHUNK_SIZE, progress=progress
+        )
+        update_export_job(get_api_session, job_id, status="completed", completed_at=datetime.utcnow())
+        logger.info(f"Export job {job_id} completed with {rows_written} rows")
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {e}")
+        update_export_job(
+            get_api_session, job_id, status="failed", error=str(e), completed_at=datetime.utcnow()
+        )
+
+def _export_job_status(job: ExportJobModel) -> dict:
+    job_status = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "format": job.format,
+        "filename": job.filename,
+        "parameters": job.parameters,
+        "requested_by": job.requested_by,
+        "created_at": job.created_at,
+        "completed_at": job.completed_at,
+        "rows_written": job.rows_written,
+        "error": job.error,
+        "status_url": f"{router.prefix}/export/jobs/{job.job_id}"
+    }
+    if job.status == "completed":
+        job_status["download_url"] = f"{router.prefix}/export/jobs/{job.job_id}/download"
+    return job_status
+
+@router.get("/export")
+async def export_attendance(
+    background_tasks: BackgroundTasks,
+    start_date: Optional[date] = Query(None, description="Start date for attendance records"),
+    end_date: Optional[date] = Query(None, description="End date for attendance records"),
+    employee_id: Optional[str] = Query(None, description="Filter by specific employee ID"),
+    format: str = Query("csv", pattern="^(csv|parquet|arrow)$", description="'csv' (gzip), 'parquet' or 'arrow' (IPC stream)"),
+    background: Optional[bool] = Query(None, description="Force or prevent running the export as a background job"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(require_admin_or_above)
+):
+    """
+    Export attendance joined with employee data (Admin+ only)
+    
+    Short ranges are streamed directly. Open-ended ranges and ranges longer
+    than EXPORT_ASYNC_THRESHOLD_DAYS run as a background job; the response
+    then holds the job id and a status URL that gives the download link
+    once the file is ready.
+    """
+    if not is_format_available(format):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export format '{format}' requires pyarrow to be installed"
+        )
+    
+    stmt = build_attendance_query(start_date, end_date, employee_id)
+    params = {"start_date": start_date, "end_date": end_date, "employee_id": employee_id}
+    filename = export_filename(format, params)
+    media_type = EXPORT_FORMATS[format][0]
+    
+    if background is None:
+        range_days = (end_date - start_date).days + 1 if start_date and end_date else None
+        background = range_days is None or range_days > settings.EXPORT_ASYNC_THRESHOLD_DAYS
+    
+    if not background:
+        return StreamingResponse(
+            _stream_export(stmt, format),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    
+    # Jobs are stored in the database so any worker can answer for them
+    job_id = uuid.uuid4().hex
+    job = ExportJobModel(
+        job_id=job_id,
+        status="pending",
+        format=format,
+        filename=filename,
+        file_path=export_file_path(settings.EXPORT_DIR, job_id, format),
+        parameters=jsonable_encoder(params),
+        requested_by=current_user.username,
+        created_at=datetime.utcnow(),
+        rows_written=0
+    )
+    db.add(job)
+    await db.commit()
+    background_tasks.add_task(_run_export_job, job_id, format, job.file_path, stmt)
+    logger.info(f"Export job {job_id} queued by {current_user.username}")
+    
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(_export_job_status(job))
+    )
+
+@router.get("/export/jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(require_admin_or_above)
+):
+    """
+    Get the status of a background export job (Admin+ only)
+    """
+    job = await db.get(ExportJobModel, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    return _export_job_status(job)
+
+@router.get("/export/jobs/{job_id}/download")
+async def download_export(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(require_admin_or_above)
+):
+    """
+    Download the file of a completed export job (Admin+ only)
+    """
+    job = await db.get(ExportJobModel, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    if job.status != "completed" or not os.path.exists(job.file_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status}"
+        )
+    
+    return FileResponse(
+        job.file_path,
+        media_type=EXPORT_FORMATS[job.format][0],
+        filename=job.filename
+    )
+
+@router.get("/analytics/daily", response_model=AttendanceAnalyticsResponse)
+async def get_attendance_analytics(
+    start_date: date = Query(..., description="First day of the report"),
+    end_date: date = Query(..., description="Last day of the report"),
+    employee_id: Optional[str] = Query(None, description="Filter by specific employee ID"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Get per-day first-in, last-out, hours in building and lateness
+    
+    Admins can report on everyone; other users only get their own days.
+    Days and times are in WORK_TIMEZONE.
+    """
+    if not has_admin_privileges(current_user.role):
+        employee_id = employee_id or current_user.employee_id
+        if not employee_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User is not associated with an employee record"
+            )
+        check_employee_access(employee_id, current_user)
+    
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be before start_date"
+        )
+    if (end_date - start_date).days + 1 > settings.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {settings.ANALYTICS_MAX_DAYS} days; use /attendance/export for longer ranges"
+        )
+    
+    days = await db.run_sync(
+        get_daily_attendance_analytics,
+        start_date,
+        end_date,
+        employee_id=employee_id,
+        work_day_start=settings.WORK_DAY_START,
+        grace_minutes=settings.LATE_GRACE_MINUTES,
+        tz_name=settings.WORK_TIMEZONE
+    )
+    
+    return AttendanceAnalyticsResponse(
+        start_date=start_date,
+        end_date=end_date,
+        timezone=settings.WORK_TIMEZONE,
+        work_day_start=settings.WORK_DAY_START,
+        late_grace_minutes=settings.LATE_GRACE_MINUTES,
+        days=days
+    )
 
 @router.get("/{employee_id}", response_model=AttendanceResponse)
 async def get_employee_attendance(
     employee_id: str,
     start_date: Optional[date] = Query(None, description="Start date for attendance records"),
     end_date: Optional[date] = Query(None, description="End date for attendance records"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
@@ -137,9 +394,9 @@ async def get_employee_attendance(
     check_employee_access(employee_id, current_user)
     
     # Get employee details
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -148,20 +405,20 @@ async def get_employee_attendance(
         )
     
     # Build query for attendance logs
-    query = db.query(AttendanceLogModel).filter(
+    query = select(AttendanceLogModel).where(
         AttendanceLogModel.employee_id == employee_id
     )
     
     # Apply date filters if provided
     if start_date:
-        query = query.filter(AttendanceLogModel.timestamp >= start_date)
+        query = query.where(AttendanceLogModel.timestamp >= start_date)
     if end_date:
         from datetime import datetime, time
         end_datetime = datetime.combine(end_date, time.max)
-        query = query.filter(AttendanceLogModel.timestamp <= end_datetime)
+        query = query.where(AttendanceLogModel.timestamp <= end_datetime)
     
     # Order by timestamp descending
-    attendance_logs = query.order_by(desc(AttendanceLogModel.timestamp)).all()
+    attendance_logs = (await db.scalars(query.order_by(desc(AttendanceLogModel.timestamp)))).all()
     
     return AttendanceResponse(
         employee_id=employee.employee_id,
@@ -172,16 +429,16 @@ async def get_employee_attendance(
 @router.post("/mark", response_model=MessageResponse)
 async def mark_attendance(
     attendance_data: AttendanceLogCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Mark attendance for an employee (Admin+ only)
     """
     # Check if employee exists
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == attendance_data.employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == attendance_data.employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -199,8 +456,11 @@ async def mark_attendance(
     )
     
     db.add(new_attendance)
-    db.commit()
-    db.refresh(new_attendance)
+    await db.run_sync(upsert_daily_summary, [(new_attendance.employee_id, new_attendance.timestamp, attendance_data.status.value)])
+    await db.commit()
+    await db.refresh(new_attendance)
+    presence_registry.apply(new_attendance.employee_id, attendance_data.status.value, new_attendance.timestamp)
+    response_cache.invalidate(TAG_ATTENDANCE)
     
     return MessageResponse(
         message=f"Attendance marked as '{attendance_data.status}' for employee '{employee.name}'"
@@ -209,69 +469,123 @@ async def mark_attendance(
 @router.get("/summary/daily")
 async def get_daily_attendance_summary(
     target_date: date = Query(..., description="Date for attendance summary"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Get daily attendance summary (Admin+ only)
     """
-    from datetime import datetime, time
+    return await response_cache.aget_or_load(
+        "attendance_daily_summary", {"target_date": target_date},
+        [TAG_ATTENDANCE, TAG_EMPLOYEES],
+        lambda: _load_daily_attendance_summary(db, target_date)
+    )
+
+async def _load_daily_attendance_summary(db: AsyncSession, target_date: date) -> dict:
+    # One indexed read of the daily rollup; an employee counts as present if any log that day is present
+    total_employees = select(func.count()).select_from(EmployeeModel).where(
+        EmployeeModel.is_active == True
+    ).scalar_subquery()
+    
+    # Present/absent only count active employees, like total_employees, so no_record_count can't go negative
+    is_active = EmployeeModel.is_active == True
+    counts = (await db.execute(select(
+        total_employees.label('total_employees'),
+        func.count().filter(and_(is_active, DailyAttendanceSummaryModel.status == 'present')).label('present_count'),
+        func.count().filter(and_(is_active, DailyAttendanceSummaryModel.status == 'absent')).label('absent_count'),
+        func.coalesce(func.sum(DailyAttendanceSummaryModel.event_count), 0).label('attendance_logs_count')
+    ).select_from(DailyAttendanceSummaryModel).join(
+        EmployeeModel, EmployeeModel.employee_id == DailyAttendanceSummaryModel.employee_id
+    ).where(
+        DailyAttendanceSummaryModel.work_date == target_date
+    ))).one()
+    
+    return {
+        "date": target_date,
+        "total_employees": counts.total_employees,
+        "present_count": counts.present_count,
+        "absent_count": counts.absent_count,
+        "no_record_count": counts.total_employees - counts.present_count - counts.absent_count,
+        "attendance_logs_count": counts.attendance_logs_count
+    }
+
+@router.get("/employee/{employee_id}/daily", response_model=DailyAttendanceHistoryResponse)
+async def get_employee_daily_history(
+    employee_id: str,
+    start_date: Optional[date] = Query(None, description="First day of the history"),
+    end_date: Optional[date] = Query(None, description="Last day of the history"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Get an employee's per-day attendance history (first seen, last seen, status)
+    """
+    # Check access permissions
+    check_employee_access(employee_id, current_user)
     
-    # Define the date range for the target date
-    start_datetime = datetime.combine(target_date, time.min)
-    end_datetime = datetime.combine(target_date, time.max)
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
-    # Get all attendance logs for the target date
-    attendance_logs = db.query(AttendanceLogModel).filter(
-        and_(
-            AttendanceLogModel.timestamp >= start_datetime,
-            AttendanceLogModel.timestamp <= end_datetime
+    if not employee:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Employee not found"
         )
-    ).all()
     
-    # Get total active employees
-    total_employees = db.query(EmployeeModel).filter(
-        EmployeeModel.is_active == True
-    ).count()
-    
-    # Count present and absent employees
-    present_employees = set()
-    absent_employees = set()
+    query = select(DailyAttendanceSummaryModel).where(
+        DailyAttendanceSummaryModel.employee_id == employee_id
+    )
+    if start_date:
+        query = query.where(DailyAttendanceSummaryModel.work_date >= start_date)
+    if end_date:
+        query = query.where(DailyAttendanceSummaryModel.work_date <= end_date)
     
-    for log in attendance_logs:
-        if log.status == 'present':
-            present_employees.add(log.employee_id)
-        elif log.status == 'absent':
-            absent_employees.add(log.employee_id)
+    daily_summaries = (await db.scalars(query.order_by(desc(DailyAttendanceSummaryModel.work_date)))).all()
     
-    # Remove employees who are both present and absent (present takes precedence)
-    absent_employees = absent_employees - present_employees
+    return DailyAttendanceHistoryResponse(
+        employee_id=employee.employee_id,
+        employee_name=employee.name,
+        daily_summaries=daily_summaries
+    )
+
+@router.get("/summary/hours")
+async def get_daily_hours_summary(
+    target_date: date = Query(..., description="Date for hours worked summary"),
+    employee_id: Optional[str] = Query(None, description="Filter by specific employee ID"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(require_admin_or_above)
+):
+    """
+    Get paired check-in/check-out sessions and hours worked for a day (Admin+ only)
     
-    # Count employees with no attendance record
-    employees_with_logs = present_employees.union(absent_employees)
-    employees_without_logs = total_employees - len(employees_with_logs)
+    Sessions are paired from the stored attendance logs around the day,
+    including manual marks, so the result does not depend on which process
+    serves the request.
+    """
+    max_session = timedelta(hours=settings.SESSION_MAX_HOURS)
+    events = (await db.execute(build_session_events_query(target_date, max_session, employee_id))).all()
+    sessions = pair_sessions(events, target_date, max_session_hours=settings.SESSION_MAX_HOURS)
     
     return {
         "date": target_date,
-        "total_employees": total_employees,
-        "present_count": len(present_employees),
-        "absent_count": len(absent_employees),
-        "no_record_count": employees_without_logs,
-        "attendance_logs_count": len(attendance_logs)
+        "sessions": [session.to_dict() for session in sessions],
+        "hours_worked": hours_worked(sessions),
+        "open_sessions_count": len([s for s in sessions if s.check_out is None])
     }
 
 @router.delete("/{log_id}", response_model=MessageResponse)
 async def delete_attendance_log(
     log_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Delete an attendance log (Admin+ only)
     """
-    attendance_log = db.query(AttendanceLogModel).filter(
-        AttendanceLogModel.id == log_id
-    ).first()
+    attendance_log = await db.scalar(
+        select(AttendanceLogModel).where(AttendanceLogModel.id == log_id)
+    )
     
     if not attendance_log:
         raise HTTPException(
@@ -279,8 +593,26 @@ async def delete_attendance_log(
             detail="Attendance log not found"
         )
     
-    db.delete(attendance_log)
-    db.commit()
+    employee_id = attendance_log.employee_id
+    work_date = attendance_log.timestamp.date()
+    
+    await db.delete(attendance_log)
+    await db.flush()
+    await db.run_sync(rebuild_daily_summary, work_date, work_date, employee_id=employee_id)
+    await db.commit()
+    response_cache.invalidate(TAG_ATTENDANCE)
+    
+    # The deleted log may have been the latest one; re-read the employee's current status
+    latest_log = await db.scalar(
+        select(AttendanceLogModel).where(
+            AttendanceLogModel.employee_id == employee_id
+        ).order_by(desc(AttendanceLogModel.timestamp)).limit(1)
+    )
+    presence_registry.replace(
+        employee_id,
+        latest_log.status if latest_log else None,
+        latest_log.timestamp if latest_log else None
+    )
     
     return MessageResponse(
         message=f"Attendance log deleted successfully"
@@ -289,7 +621,7 @@ async def delete_attendance_log(
 @router.get("/employee/{employee_id}/latest")
 async def get_latest_attendance(
     employee_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
@@ -299,9 +631,9 @@ async def get_latest_attendance(
     check_employee_access(employee_id, current_user)
     
     # Get employee details
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -310,9 +642,11 @@ async def get_latest_attendance(
         )
     
     # Get latest attendance log
-    latest_log = db.query(AttendanceLogModel).filter(
-        AttendanceLogModel.employee_id == employee_id
-    ).order_by(desc(AttendanceLogModel.timestamp)).first()
+    latest_log = await db.scalar(
+        select(AttendanceLogModel).where(
+            AttendanceLogModel.employee_id == employee_id
+        ).order_by(desc(AttendanceLogModel.timestamp)).limit(1)
+    )
     
     return {
         "employee_id": employee.employee_id,
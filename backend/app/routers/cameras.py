@@ -4,10 +4,12 @@ Provides endpoints for camera discovery, configuration, and management
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 import time
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 from app.schemas import (
     CurrentUser, MessageResponse,
@@ -17,7 +19,10 @@ from app.schemas import (
     CameraCreate, CameraUpdate, TripwireCreate, TripwireUpdate, Tripwire
 )
 from app.security import require_admin_or_above, require_super_admin
+from db.camera_snapshot import CameraConfigSnapshot, camera_config_cache
+from db.db_config import get_async_db
 from db.db_manager import DatabaseManager
+from db.db_models import CameraConfig as CameraConfigModel, Tripwire as TripwireModel
 from utils.camera_discovery import discover_cameras_on_network, CameraInfo as DiscoveredCameraInfo
 from utils.logging import get_logger
 
@@ -97,64 +102,9 @@ async def get_cameras(
     (Admin+ only)
     """
     try:
-        db_manager = DatabaseManager()
-        
-        if active_only:
-            cameras = db_manager.get_active_cameras()
-        elif status_filter:
-            cameras = db_manager.get_cameras_by_status(status_filter)
-        else:
-            cameras = db_manager.get_all_cameras()
-        
-        # Convert to response format
-        camera_infos = []
-        for camera in cameras:
-            tripwires = db_manager.get_camera_tripwires(camera.camera_id)
-            camera_info = CameraInfo(
-                id=camera.id,
-                camera_id=camera.camera_id,
-                camera_name=camera.camera_name,
-                camera_type=camera.camera_type,
-                ip_address=camera.ip_address,
-                stream_url=camera.stream_url,
-                location_description=camera.location_description,
-                resolution_width=camera.resolution_width,
-                resolution_height=camera.resolution_height,
-                fps=camera.fps,
-                gpu_id=camera.gpu_id,
-                manufacturer=camera.manufacturer,
-                model=camera.model,
-                firmware_version=camera.firmware_version,
-                onvif_supported=camera.onvif_supported,
-                status=camera.status,
-                is_active=camera.is_active,
-                created_at=camera.created_at,
-                updated_at=camera.updated_at,
-                tripwires=[Tripwire(
-                    id=t.id,
-                    camera_id=t.camera_id,
-                    name=t.name,
-                    position=t.position,
-                    spacing=t.spacing,
-                    direction=t.direction,
-                    detection_type=t.detection_type,
-                    is_active=t.is_active,
-                    created_at=t.created_at,
-                    updated_at=t.updated_at
-                ) for t in tripwires]
-            )
-            camera_infos.append(camera_info)
-        
-        active_count = len([c for c in cameras if c.is_active])
-        inactive_count = len(cameras) - active_count
-        
-        return CameraListResponse(
-            cameras=camera_infos,
-            total_count=len(cameras),
-            active_count=active_count,
-            inactive_count=inactive_count
-        )
-        
+        # Served from the camera configuration snapshot, reloaded only after camera writes
+        snapshot = await run_in_threadpool(camera_config_cache.get_snapshot)
+        return _load_camera_list(snapshot, status_filter, active_only)
     except Exception as e:
         logger.error(f"Error getting cameras: {e}")
         raise HTTPException(
@@ -162,9 +112,66 @@ async def get_cameras(
             detail=f"Error retrieving cameras: {str(e)}"
         )
 
+def _load_camera_list(snapshot: CameraConfigSnapshot, status_filter: Optional[str], active_only: bool) -> CameraListResponse:
+    cameras = list(snapshot.cameras.values())
+    if active_only:
+        cameras = [camera for camera in cameras if camera.is_active]
+    elif status_filter:
+        cameras = [camera for camera in cameras if camera.status == status_filter]
+    
+    # Convert to response format
+    camera_infos = []
+    for camera in cameras:
+        tripwires = camera.tripwires
+        camera_info = CameraInfo(
+            id=camera.id,
+            camera_id=camera.camera_id,
+            camera_name=camera.camera_name,
+            camera_type=camera.camera_type,
+            ip_address=camera.ip_address,
+            stream_url=camera.stream_url,
+            location_description=camera.location_description,
+            resolution_width=camera.resolution_width,
+            resolution_height=camera.resolution_height,
+            fps=camera.fps,
+            gpu_id=camera.gpu_id,
+            manufacturer=camera.manufacturer,
+            model=camera.model,
+            firmware_version=camera.firmware_version,
+            onvif_supported=camera.onvif_supported,
+            status=camera.status,
+            is_active=camera.is_active,
+            created_at=camera.created_at,
+            updated_at=camera.updated_at,
+            tripwires=[Tripwire(
+                id=t.id,
+                camera_id=t.camera_id,
+                name=t.name,
+                position=t.position,
+                spacing=t.spacing,
+                direction=t.direction,
+                detection_type=t.detection_type,
+                is_active=t.is_active,
+                created_at=t.created_at,
+                updated_at=t.updated_at
+            ) for t in tripwires]
+        )
+        camera_infos.append(camera_info)
+    
+    active_count = len([c for c in cameras if c.is_active])
+    inactive_count = len(cameras) - active_count
+    
+    return CameraListResponse(
+        cameras=camera_infos,
+        total_count=len(cameras),
+        active_count=active_count,
+        inactive_count=inactive_count
+    )
+
 @router.get("/{camera_id}", response_model=CameraInfo)
 async def get_camera(
     camera_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
@@ -172,8 +179,11 @@ async def get_camera(
     (Admin+ only)
     """
     try:
-        db_manager = DatabaseManager()
-        camera = db_manager.get_camera(camera_id)
+        camera = await db.scalar(
+            select(CameraConfigModel)
+            .options(selectinload(CameraConfigModel.tripwires))
+            .where(CameraConfigModel.camera_id == camera_id)
+        )
         
         if not camera:
             raise HTTPException(
@@ -181,7 +191,7 @@ async def get_camera(
                 detail=f"Camera {camera_id} not found"
             )
         
-        tripwires = db_manager.get_camera_tripwires(camera_id)
+        tripwires = camera.tripwires
         
         return CameraInfo(
             id=camera.id,
@@ -241,7 +251,7 @@ async def create_camera(
         # Convert to dict for database manager
         camera_dict = camera_data.dict()
         
-        camera = db_manager.create_camera(camera_dict)
+        camera = await run_in_threadpool(db_manager.create_camera, camera_dict)
         
         if not camera:
             raise HTTPException(
@@ -297,7 +307,7 @@ async def update_camera(
         # Convert to dict, excluding None values
         update_dict = {k: v for k, v in camera_data.dict().items() if v is not None}
         
-        camera = db_manager.update_camera(camera_id, update_dict)
+        camera = await run_in_threadpool(db_manager.update_camera, camera_id, update_dict)
         
         if not camera:
             raise HTTPException(
@@ -305,7 +315,7 @@ async def update_camera(
                 detail=f"Camera {camera_id} not found"
             )
         
-        tripwires = db_manager.get_camera_tripwires(camera_id)
+        tripwires = await run_in_threadpool(db_manager.get_camera_tripwires, camera_id)
         
         return CameraInfo(
             id=camera.id,
@@ -378,7 +388,7 @@ async def configure_camera(
             'status': 'configured'
         }
         
-        camera = db_manager.update_camera(camera_id, camera_update)
+        camera = await run_in_threadpool(db_manager.update_camera, camera_id, camera_update)
         
         if not camera:
             raise HTTPException(
@@ -389,7 +399,7 @@ async def configure_camera(
         # Create tripwires
         tripwires = []
         for tripwire_data in config_data.tripwires:
-            tripwire = db_manager.create_tripwire(camera_id, tripwire_data.dict())
+            tripwire = await run_in_threadpool(db_manager.create_tripwire, camera_id, tripwire_data.dict())
             if tripwire:
                 tripwires.append(tripwire)
         
@@ -449,7 +459,7 @@ async def activate_camera(
     try:
         db_manager = DatabaseManager()
         
-        success = db_manager.activate_camera(camera_id, activation_data.is_active)
+        success = await run_in_threadpool(db_manager.activate_camera, camera_id, activation_data.is_active)
         
         if not success:
             raise HTTPException(
@@ -485,7 +495,7 @@ async def delete_camera(
     try:
         db_manager = DatabaseManager()
         
-        success = db_manager.delete_camera(camera_id)
+        success = await run_in_threadpool(db_manager.delete_camera, camera_id)
         
         if not success:
             raise HTTPException(
@@ -510,6 +520,7 @@ async def delete_camera(
 @router.get("/{camera_id}/status", response_model=CameraStatusResponse)
 async def get_camera_status(
     camera_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
@@ -517,8 +528,9 @@ async def get_camera_status(
     (Admin+ only)
     """
     try:
-        db_manager = DatabaseManager()
-        camera = db_manager.get_camera(camera_id)
+        camera = await db.scalar(
+            select(CameraConfigModel).where(CameraConfigModel.camera_id == camera_id)
+        )
         
         if not camera:
             raise HTTPException(
@@ -561,7 +573,7 @@ async def create_tripwire(
     try:
         db_manager = DatabaseManager()
         
-        tripwire = db_manager.create_tripwire(camera_id, tripwire_data.dict())
+        tripwire = await run_in_threadpool(db_manager.create_tripwire, camera_id, tripwire_data.dict())
         
         if not tripwire:
             raise HTTPException(
@@ -594,6 +606,7 @@ async def create_tripwire(
 @router.get("/{camera_id}/tripwires", response_model=List[Tripwire])
 async def get_camera_tripwires(
     camera_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
@@ -601,8 +614,9 @@ async def get_camera_tripwires(
     (Admin+ only)
     """
     try:
-        db_manager = DatabaseManager()
-        tripwires = db_manager.get_camera_tripwires(camera_id)
+        tripwires = (await db.scalars(
+            select(TripwireModel).where(TripwireModel.camera_id == camera_id)
+        )).all()
         
         return [Tripwire(
             id=t.id,
@@ -640,7 +654,7 @@ async def update_tripwire(
         # Convert to dict, excluding None values
         update_dict = {k: v for k, v in tripwire_data.dict().items() if v is not None}
         
-        tripwire = db_manager.update_tripwire(tripwire_id, update_dict)
+        tripwire = await run_in_threadpool(db_manager.update_tripwire, tripwire_id, update_dict)
         
         if not tripwire:
             raise HTTPException(
@@ -682,7 +696,7 @@ async def delete_tripwire(
     try:
         db_manager = DatabaseManager()
         
-        success = db_manager.delete_tripwire(tripwire_id)
+        success = await run_in_threadpool(db_manager.delete_tripwire, tripwire_id)
         
         if not success:
             raise HTTPException(
@@ -709,7 +723,7 @@ async def _store_discovered_cameras(camera_data_list: List[dict]):
     """Background task to store discovered cameras in database"""
     try:
         db_manager = DatabaseManager()
-        created_cameras = db_manager.bulk_create_cameras_from_discovery(camera_data_list)
+        created_cameras = await run_in_threadpool(db_manager.bulk_create_cameras_from_discovery, camera_data_list)
         logger.info(f"Stored {len(created_cameras)} discovered cameras in database")
     except Exception as e:
         logger.error(f"Error storing discovered cameras: {e}")
@@ -721,24 +735,25 @@ async def reload_camera_configurations(
     """
     Reload camera configurations from database in the FTS system
     (Super Admin only)
+    
+    Monitored cameras pick up the changes since the last reload.
     """
     try:
         # Import here to avoid circular imports
-        from core.fts_system import system_instance
-        
-        if system_instance:
-            system_instance.reload_camera_configurations()
-            logger.info("Camera configurations reloaded in FTS system")
-            return MessageResponse(
-                message="Camera configurations reloaded successfully",
-                success=True
-            )
-        else:
-            logger.warning("FTS system not running, configurations will be loaded on next start")
-            return MessageResponse(
-                message="FTS system not running, configurations will be loaded on next start",
-                success=True
-            )
+        from tasks.camera_tasks import camera_monitor
+        
+        # Also picks up writes made outside this process
+        camera_config_cache.invalidate()
+        diff = await run_in_threadpool(camera_monitor.reload_camera_configurations)
+        
+        logger.info(f"Camera configurations reloaded at snapshot {diff.version}")
+        return MessageResponse(
+            message=(
+                f"Camera configurations reloaded: {len(diff.added)} added, "
+                f"{len(diff.changed)} changed, {len(diff.removed)} removed"
+            ),
+            success=True
+        )
         
     except Exception as e:
         logger.error(f"Error reloading camera configurations: {e}")
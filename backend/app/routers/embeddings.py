@@ -4,44 +4,45 @@ Face embeddings management router
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import FaceEmbedding, MessageResponse, CurrentUser
 from app.security import require_admin_or_above, get_current_active_user
-from db.db_config import get_db
+from db.db_config import get_async_db, get_async_read_db
 from db.db_models import FaceEmbedding as FaceEmbeddingModel, Employee as EmployeeModel
+from db.gallery_changes import record_gallery_changes
+from utils.response_cache import response_cache, TAG_EMBEDDINGS, TAG_EMPLOYEES
 
 router = APIRouter(prefix="/embeddings", tags=["Face Embeddings"])
 
 @router.get("/", response_model=List[FaceEmbedding])
 async def list_embeddings(
     employee_id: str = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     List face embeddings (Admin+ only)
     """
-    query = db.query(FaceEmbeddingModel).filter(FaceEmbeddingModel.is_active == True)
+    query = select(FaceEmbeddingModel).where(FaceEmbeddingModel.is_active == True)
     
     if employee_id:
-        query = query.filter(FaceEmbeddingModel.employee_id == employee_id)
+        query = query.where(FaceEmbeddingModel.employee_id == employee_id)
     
-    embeddings = query.all()
+    embeddings = (await db.scalars(query)).all()
     return embeddings
 
 @router.get("/{embedding_id}", response_model=FaceEmbedding)
 async def get_embedding(
     embedding_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Get specific face embedding (Admin+ only)
     """
-    embedding = db.query(FaceEmbeddingModel).filter(
-        FaceEmbeddingModel.id == embedding_id
-    ).first()
+    embedding = await db.get(FaceEmbeddingModel, embedding_id)
     
     if not embedding:
         raise HTTPException(
@@ -54,15 +55,13 @@ async def get_embedding(
 @router.delete("/{embedding_id}", response_model=MessageResponse)
 async def delete_embedding(
     embedding_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Delete face embedding (Admin+ only)
     """
-    embedding = db.query(FaceEmbeddingModel).filter(
-        FaceEmbeddingModel.id == embedding_id
-    ).first()
+    embedding = await db.get(FaceEmbeddingModel, embedding_id)
     
     if not embedding:
         raise HTTPException(
@@ -71,13 +70,15 @@ async def delete_embedding(
         )
     
     # Get employee name for response
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == embedding.employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == embedding.employee_id)
+    )
     
-    # Soft delete
+    # Soft delete; running pipelines drop it from their gallery via the change feed
     embedding.is_active = False
-    db.commit()
+    await db.run_sync(record_gallery_changes, [(embedding.employee_id, embedding.id, 'remove')])
+    await db.commit()
+    response_cache.invalidate(TAG_EMBEDDINGS)
     
     employee_name = employee.name if employee else "Unknown"
     return MessageResponse(
@@ -87,16 +88,16 @@ async def delete_embedding(
 @router.get("/employee/{employee_id}", response_model=List[FaceEmbedding])
 async def get_employee_embeddings(
     employee_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Get all face embeddings for a specific employee (Admin+ only)
     """
     # Check if employee exists
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -104,26 +105,28 @@ async def get_employee_embeddings(
             detail="Employee not found"
         )
     
-    embeddings = db.query(FaceEmbeddingModel).filter(
-        FaceEmbeddingModel.employee_id == employee_id,
-        FaceEmbeddingModel.is_active == True
-    ).all()
+    embeddings = (await db.scalars(
+        select(FaceEmbeddingModel).where(
+            FaceEmbeddingModel.employee_id == employee_id,
+            FaceEmbeddingModel.is_active == True
+        )
+    )).all()
     
     return embeddings
 
 @router.delete("/employee/{employee_id}/all", response_model=MessageResponse)
 async def delete_all_employee_embeddings(
     employee_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Delete all face embeddings for a specific employee (Admin+ only)
     """
     # Check if employee exists
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -132,10 +135,12 @@ async def delete_all_employee_embeddings(
         )
     
     # Soft delete all embeddings
-    embeddings = db.query(FaceEmbeddingModel).filter(
-        FaceEmbeddingModel.employee_id == employee_id,
-        FaceEmbeddingModel.is_active == True
-    ).all()
+    embeddings = (await db.scalars(
+        select(FaceEmbeddingModel).where(
+            FaceEmbeddingModel.employee_id == employee_id,
+            FaceEmbeddingModel.is_active == True
+        )
+    )).all()
     
     if not embeddings:
         return MessageResponse(
@@ -145,7 +150,9 @@ async def delete_all_employee_embeddings(
     for embedding in embeddings:
         embedding.is_active = False
     
-    db.commit()
+    await db.run_sync(record_gallery_changes, [(employee_id, None, 'remove')])
+    await db.commit()
+    response_cache.invalidate(TAG_EMBEDDINGS)
     
     return MessageResponse(
         message=f"All face embeddings deleted for employee '{employee.name}' ({len(embeddings)} embeddings)"
@@ -153,23 +160,34 @@ async def delete_all_employee_embeddings(
 
 @router.get("/stats/summary")
 async def get_embeddings_summary(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Get face embeddings statistics (Admin+ only)
     """
-    total_embeddings = db.query(FaceEmbeddingModel).filter(
-        FaceEmbeddingModel.is_active == True
-    ).count()
-    
-    total_employees = db.query(EmployeeModel).filter(
-        EmployeeModel.is_active == True
-    ).count()
-    
-    employees_with_embeddings = db.query(FaceEmbeddingModel.employee_id).filter(
-        FaceEmbeddingModel.is_active == True
-    ).distinct().count()
+    return await response_cache.aget_or_load(
+        "embeddings_summary", {}, [TAG_EMBEDDINGS, TAG_EMPLOYEES],
+        lambda: _load_embeddings_summary(db)
+    )
+
+async def _load_embeddings_summary(db: AsyncSession) -> dict:
+    # One round trip for all three counts
+    counts = (await db.execute(select(
+        select(func.count()).select_from(FaceEmbeddingModel).where(
+            FaceEmbeddingModel.is_active == True
+        ).scalar_subquery().label('total_embeddings'),
+        select(func.count()).select_from(EmployeeModel).where(
+            EmployeeModel.is_active == True
+        ).scalar_subquery().label('total_employees'),
+        select(func.count(func.distinct(FaceEmbeddingModel.employee_id))).where(
+            FaceEmbeddingModel.is_active == True
+        ).scalar_subquery().label('employees_with_embeddings')
+    ))).one()
+    
+    total_embeddings = counts.total_embeddings
+    total_employees = counts.total_employees
+    employees_with_embeddings = counts.employees_with_embeddings
     
     employees_without_embeddings = total_employees - employees_with_embeddings
     
@@ -5,8 +5,9 @@ Employee management router
 import base64
 import os
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from app.config import settings
@@ -18,24 +19,26 @@ from app.security import (
     require_admin_or_above, require_employee_or_above, 
     get_current_active_user, check_employee_access
 )
-from db.db_config import get_db
-from db.db_models import Employee as EmployeeModel, FaceEmbedding, AttendanceLog
+from db.db_config import get_async_db
+from db.db_models import Employee as EmployeeModel, FaceEmbedding
+from core.presence_registry import presence_registry, ensure_presence_loaded_async
+from utils.response_cache import response_cache, TAG_EMBEDDINGS, TAG_EMPLOYEES
 
 router = APIRouter(prefix="/employees", tags=["Employee Management"])
 
 @router.post("/enroll", response_model=MessageResponse)
 async def enroll_employee(
     enrollment_data: EmployeeEnrollmentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Enroll employee with face data (Admin+ only)
     """
     # Check if employee already exists
-    existing_employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == enrollment_data.employee.employee_id
-    ).first()
+    existing_employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == enrollment_data.employee.employee_id)
+    )
     
     if existing_employee:
         raise HTTPException(
@@ -55,7 +58,7 @@ async def enroll_employee(
     )
     
     db.add(new_employee)
-    db.flush()  # Flush to get the employee in the session
+    await db.flush()  # Flush to get the employee in the session
     
     # Process face image and create embedding
     try:
@@ -73,26 +76,29 @@ async def enroll_employee(
         with open(image_path, "wb") as f:
             f.write(image_data)
         
-        # For now, create a mock embedding (in real implementation, use face_recognition library)
-        mock_embedding = b"mock_embedding_data_" + enrollment_data.employee.employee_id.encode()
-        
-        # Create face embedding record
+        # Record the image as a pending embedding; process_pending_embeddings.py
+        # extracts it, and until then (no model_version) it stays out of the gallery
         face_embedding = FaceEmbedding(
             employee_id=enrollment_data.employee.employee_id,
             image_path=image_path,
-            embedding_vector=mock_embedding,
+            embedding_vector=b"",
+            embedding_type='enroll',
             quality_score=0.95  # Mock quality score
         )
         
         db.add(face_embedding)
-        db.commit()
+        await db.commit()
+        response_cache.invalidate(TAG_EMPLOYEES, TAG_EMBEDDINGS)
         
         return MessageResponse(
-            message=f"Employee '{enrollment_data.employee.name}' enrolled successfully"
+            message=(
+                f"Employee '{enrollment_data.employee.name}' enrolled; face recognition "
+                f"starts once the face embedding has been extracted"
+            )
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process face data: {str(e)}"
@@ -100,19 +106,25 @@ async def enroll_employee(
 
 @router.get("/", response_model=List[Employee])
 async def list_employees(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_employee_or_above)
 ):
     """
     List all employees (any authenticated user)
     """
-    employees = db.query(EmployeeModel).filter(EmployeeModel.is_active == True).all()
-    return employees
+    return await response_cache.aget_or_load(
+        "employees", {}, [TAG_EMPLOYEES],
+        lambda: _load_employees(db)
+    )
+
+async def _load_employees(db: AsyncSession) -> List[Employee]:
+    employees = await db.scalars(select(EmployeeModel).where(EmployeeModel.is_active == True))
+    return [Employee.model_validate(employee) for employee in employees]
 
 @router.get("/{employee_id}", response_model=Employee)
 async def get_employee(
     employee_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
@@ -121,9 +133,9 @@ async def get_employee(
     # Check access permissions
     check_employee_access(employee_id, current_user)
     
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -137,15 +149,15 @@ async def get_employee(
 async def update_employee(
     employee_id: str,
     employee_update: EmployeeUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Update employee information (Admin+ only)
     """
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -159,22 +171,23 @@ async def update_employee(
         setattr(employee, field, value)
     
     employee.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    response_cache.invalidate(TAG_EMPLOYEES)
     
     return MessageResponse(message=f"Employee '{employee.name}' updated successfully")
 
 @router.delete("/{employee_id}", response_model=MessageResponse)
 async def delete_employee(
     employee_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Delete employee (Admin+ only)
     """
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -185,44 +198,41 @@ async def delete_employee(
     # Soft delete
     employee.is_active = False
     employee.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    response_cache.invalidate(TAG_EMPLOYEES)
     
     return MessageResponse(message=f"Employee '{employee.name}' deleted successfully")
 
 @router.get("/present/current", response_model=PresentEmployeesResponse)
 async def get_present_employees(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_employee_or_above)
 ):
     """
     Get currently present employees (any authenticated user)
+    
+    Answers from the presence registry. The ETag changes whenever the present
+    set changes, so pollers sending If-None-Match get 304 Not Modified.
     """
-    # Get employees who have a 'present' status in their latest attendance log
-    from sqlalchemy import func, and_
+    await ensure_presence_loaded_async(db)
+    version, present = presence_registry.get_present()
     
-    # Subquery to get the latest attendance log for each employee
-    latest_attendance_subquery = db.query(
-        AttendanceLog.employee_id,
-        func.max(AttendanceLog.timestamp).label('latest_timestamp')
-    ).group_by(AttendanceLog.employee_id).subquery()
+    etag = f'W/"presence-{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     
-    # Query to get employees with 'present' status in their latest log
-    present_employees = db.query(EmployeeModel).join(
-        AttendanceLog,
-        EmployeeModel.employee_id == AttendanceLog.employee_id
-    ).join(
-        latest_attendance_subquery,
-        and_(
-            AttendanceLog.employee_id == latest_attendance_subquery.c.employee_id,
-            AttendanceLog.timestamp == latest_attendance_subquery.c.latest_timestamp
-        )
-    ).filter(
-        and_(
-            AttendanceLog.status == 'present',
-            EmployeeModel.is_active == True
-        )
-    ).all()
+    present_employees = []
+    if present:
+        present_employees = (await db.scalars(
+            select(EmployeeModel).where(
+                EmployeeModel.employee_id.in_(list(present)),
+                EmployeeModel.is_active == True
+            )
+        )).all()
     
+    response.headers["ETag"] = etag
     return PresentEmployeesResponse(
         present_employees=present_employees,
         total_count=len(present_employees)
@@ -232,16 +242,16 @@ async def get_present_employees(
 async def upload_face_image(
     employee_id: str,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
     Upload additional face image for employee (Admin+ only)
     """
     # Check if employee exists
-    employee = db.query(EmployeeModel).filter(
-        EmployeeModel.employee_id == employee_id
-    ).first()
+    employee = await db.scalar(
+        select(EmployeeModel).where(EmployeeModel.employee_id == employee_id)
+    )
     
     if not employee:
         raise HTTPException(
@@ -276,22 +286,24 @@ async def upload_face_image(
             content = await file.read()
             f.write(content)
         
-        # Create mock embedding (in real implementation, use face_recognition library)
-        mock_embedding = b"mock_embedding_data_" + employee_id.encode() + b"_" + str(datetime.now().timestamp()).encode()
-        
-        # Create face embedding record
+        # Pending embedding, excluded from the gallery until process_pending_embeddings.py extracts it
         face_embedding = FaceEmbedding(
             employee_id=employee_id,
             image_path=image_path,
-            embedding_vector=mock_embedding,
+            embedding_vector=b"",
+            embedding_type='update',
             quality_score=0.90  # Mock quality score
         )
         
         db.add(face_embedding)
-        db.commit()
+        await db.commit()
+        response_cache.invalidate(TAG_EMBEDDINGS)
         
         return MessageResponse(
-            message=f"Face image uploaded successfully for employee '{employee.name}'"
+            message=(
+                f"Face image uploaded for employee '{employee.name}'; it is used for "
+                f"recognition once its embedding has been extracted"
+            )
         )
         
     except Exception as e:
@@ -2,26 +2,28 @@
 Live streaming router for camera feed
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.responses import StreamingResponse
-from typing import Generator
+from typing import AsyncGenerator, Optional
 import cv2
+import numpy as np
 import time
 
 from app.schemas import CurrentUser
 from app.security import require_admin_or_above
+from tasks.stream_broadcaster import FrameSource, stream_broadcaster
 
 router = APIRouter(prefix="/stream", tags=["Live Streaming"])
 
-def generate_mock_mjpeg_stream() -> Generator[bytes, None, None]:
+MOCK_STREAM_ID = "mock"
+
+class MockFrameSource(FrameSource):
     """
-    Generate a mock MJPEG stream for demonstration
+    Mock camera frames for demonstration
     In a real implementation, this would connect to actual cameras
     """
-    # Create a simple test image
-    import numpy as np
     
-    while True:
+    def read(self) -> Optional[np.ndarray]:
         # Create a simple test frame with timestamp
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
         
@@ -35,19 +37,26 @@ def generate_mock_mjpeg_stream() -> Generator[bytes, None, None]:
         cv2.putText(frame, "Mock Camera Feed", (10, 70), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
-        # Encode frame as JPEG
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
-        
-        # Yield frame in MJPEG format
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        # Sleep to control frame rate
-        time.sleep(1/30)  # 30 FPS
+        return frame
+
+async def generate_mjpeg_stream(request: Request, max_fps: Optional[float] = None) -> AsyncGenerator[bytes, None]:
+    """
+    Mock MJPEG stream for one viewer
+    Frames are drawn and encoded once by the shared broadcaster's thread, however
+    many viewers there are; this generator only waits for them on the event loop
+    """
+    async for part in stream_broadcaster.mjpeg_stream(
+        MOCK_STREAM_ID,
+        MockFrameSource(),
+        max_fps=max_fps,
+        is_disconnected=request.is_disconnected
+    ):
+        yield part
 
 @router.get("/live-feed")
 async def get_live_feed(
+    request: Request,
+    fps: Optional[float] = Query(None, gt=0, le=30, description="Frame rate limit for this viewer"),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
@@ -55,7 +64,7 @@ async def get_live_feed(
     Returns an MJPEG stream
     """
     return StreamingResponse(
-        generate_mock_mjpeg_stream(),
+        generate_mjpeg_stream(request, fps),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
@@ -3,9 +3,9 @@ System Management Router
 Provides endpoints for managing the face detection system
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.responses import StreamingResponse
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from app.schemas import CurrentUser, MessageResponse
 from app.security import require_admin_or_above
@@ -16,9 +16,14 @@ from core.fts_system import (
     get_live_faces,
     get_attendance_data,
     get_logs,
-    is_tracking_running,
-    generate_mjpeg
+    is_tracking_running
 )
+from db.attendance_writer import attendance_writer
+from core.gallery_sync import gallery_sync
+from db.camera_snapshot import camera_config_cache
+from db.pool_metrics import pool_telemetry
+from tasks.stream_broadcaster import stream_broadcaster
+from utils.response_cache import response_cache
 from utils.logging import get_logger
 
 router = APIRouter(prefix="/system", tags=["System Management"])
@@ -102,6 +107,32 @@ async def get_face_detection_status(
             detail=f"Failed to get system status: {str(e)}"
         )
 
+@router.get("/metrics")
+async def get_pipeline_metrics(
+    current_user: CurrentUser = Depends(require_admin_or_above)
+):
+    """
+    Get attendance writer, response cache and gallery sync metrics (Admin+ only)
+    """
+    try:
+        return {
+            "success": True,
+            "data": {
+                "attendance_writer": attendance_writer.get_metrics(),
+                "response_cache": response_cache.get_metrics(),
+                "gallery_sync": gallery_sync.get_status(),
+                "camera_snapshot": camera_config_cache.get_status(),
+                "db_pools": pool_telemetry.get_metrics(),
+                "streams": stream_broadcaster.get_metrics()
+            }
+        }
+    except Exception as e:
+        logger.error(f"Failed to get pipeline metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get pipeline metrics: {str(e)}"
+        )
+
 @router.get("/live-faces")
 async def get_detected_faces(
     current_user: CurrentUser = Depends(require_admin_or_above)
@@ -166,6 +197,8 @@ async def get_system_logs(
 @router.get("/camera-feed/{camera_id}")
 async def get_camera_feed(
     camera_id: int,
+    request: Request,
+    fps: Optional[float] = Query(None, gt=0, le=30, description="Frame rate limit for this viewer"),
     current_user: CurrentUser = Depends(require_admin_or_above)
 ):
     """
@@ -178,8 +211,13 @@ async def get_camera_feed(
                 detail="Face detection system is not running"
             )
         
+        # Every viewer of a camera shares one capture and one encoder
         return StreamingResponse(
-            generate_mjpeg(camera_id),
+            stream_broadcaster.mjpeg_stream(
+                camera_id,
+                max_fps=fps,
+                is_disconnected=request.is_disconnected
+            ),
             media_type="multipart/x-mixed-replace; boundary=frame"
         )
     except Exception as e:
@@ -53,6 +53,9 @@ class FaceEmbeddingCreate(FaceEmbeddingBase):
 
 class FaceEmbedding(FaceEmbeddingBase):
     id: int
+    embedding_dim: Optional[int] = None
+    model_version: Optional[str] = None
+    embedding_type: str = 'enroll'
     created_at: datetime
     is_active: bool
 
@@ -139,6 +142,42 @@ class AttendanceResponse(BaseModel):
     employee_name: str
     attendance_logs: List[AttendanceLog]
 
+class DailyAttendanceSummary(BaseModel):
+    employee_id: str
+    work_date: date
+    first_seen: datetime
+    last_seen: datetime
+    status: AttendanceStatus
+    event_count: int
+
+    class Config:
+        from_attributes = True
+
+class DailyAttendanceHistoryResponse(BaseModel):
+    employee_id: str
+    employee_name: str
+    daily_summaries: List[DailyAttendanceSummary]
+
+class DailyAttendanceAnalytics(BaseModel):
+    employee_id: str
+    employee_name: str
+    work_date: date
+    first_in: Optional[datetime] = None
+    last_out: Optional[datetime] = None
+    hours_in_building: float
+    still_inside: bool
+    event_count: int
+    is_late: bool
+    minutes_late: int
+
+class AttendanceAnalyticsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    timezone: str
+    work_day_start: str
+    late_grace_minutes: int
+    days: List[DailyAttendanceAnalytics]
+
 class PresentEmployeesResponse(BaseModel):
     present_employees: List[Employee]
     total_count: int
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Backfill script to build daily_attendance_summary from existing attendance logs
+
+Rebuilds the summary one month at a time, each month in its own transaction,
+so it can be re-run safely and matches the monthly attendance partitions.
+
+Usage:
+    python backfill_daily_summary.py [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import func
+
+from db.db_config import SessionLocal, create_tables
+from db.db_models import AttendanceLog
+from db.attendance_summary import rebuild_daily_summary
+from db.partitions import add_months
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def backfill_daily_summary(start_date: date = None, end_date: date = None):
+    """
+    Rebuild the daily attendance summary for a date range
+
+    Args:
+        start_date: First day to rebuild (defaults to the oldest log)
+        end_date: Last day to rebuild (defaults to the newest log)
+    """
+    logger.info("Starting daily attendance summary backfill")
+
+    # Ensure database tables exist
+    create_tables()
+
+    session = SessionLocal()
+    try:
+        first_ts, last_ts = session.query(
+            func.min(AttendanceLog.timestamp),
+            func.max(AttendanceLog.timestamp)
+        ).one()
+    finally:
+        session.close()
+
+    if first_ts is None:
+        logger.info("No attendance logs found, nothing to backfill")
+        return
+
+    start_date = start_date or first_ts.date()
+    end_date = end_date or last_ts.date()
+
+    total_rows = 0
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        chunk_start = max(month, start_date)
+        chunk_end = min(add_months(month, 1) - timedelta(days=1), end_date)
+
+        session = SessionLocal()
+        try:
+            rows = rebuild_daily_summary(session, chunk_start, chunk_end)
+            session.commit()
+            total_rows += rows
+            logger.info(f"Rebuilt {rows} summary rows for {chunk_start} to {chunk_end}")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Backfill failed for {chunk_start} to {chunk_end}: {e}")
+            raise
+        finally:
+            session.close()
+
+        month = add_months(month, 1)
+
+    logger.info(f"Daily attendance summary backfill completed: {total_rows} rows")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily_attendance_summary from attendance_logs")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    backfill_daily_summary(args.start, args.end)
@@ -0,0 +1,298 @@
+"""
+Cross-camera attendance session pairing.
+Pairs entry and exit events from different cameras into work sessions
+(check-in to check-out). The camera monitor keeps a live SessionPairingService
+fed as events commit; reports pair the persisted logs of the requested day
+with pair_sessions, which applies the same rules.
+"""
+
+import bisect
+import heapq
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AttendanceEvent:
+    """Single entry/exit event seen by a camera"""
+    employee_id: str
+    event_type: str
+    camera_id: Optional[int]
+    timestamp: datetime
+
+@dataclass
+class WorkSession:
+    """Check-in to check-out session for an employee"""
+    employee_id: str
+    check_in: datetime
+    check_in_camera: Optional[int]
+    check_out: Optional[datetime] = None
+    check_out_camera: Optional[int] = None
+    is_complete: bool = False
+
+    @property
+    def work_date(self) -> date:
+        return self.check_in.date()
+
+    @property
+    def duration_seconds(self) -> float:
+        if self.check_out is None:
+            return 0.0
+        return (self.check_out - self.check_in).total_seconds()
+
+    def to_dict(self) -> Dict:
+        return {
+            "employee_id": self.employee_id,
+            "check_in": self.check_in,
+            "check_in_camera": self.check_in_camera,
+            "check_out": self.check_out,
+            "check_out_camera": self.check_out_camera,
+            "duration_hours": round(self.duration_seconds / 3600, 2),
+            "is_complete": self.is_complete
+        }
+
+class SessionPairingService:
+    """
+    Pairs entry and exit events across cameras into work sessions.
+
+    Each employee has a short time-ordered index of their most recent events
+    and at most one open session. An entry opens a session (repeated entries
+    keep the earliest check-in), an exit closes it. Sessions left open longer
+    than max_session_hours are closed as incomplete. Memory is bounded by the
+    per-employee event limit and by dropping sessions older than the
+    retention window. Open sessions and event indexes are expired from heaps
+    ordered by check-in and last-event time, so an event only touches the
+    entries that actually fall out of their window.
+    """
+
+    def __init__(self,
+                 retention_days: int = 7,
+                 max_session_hours: float = 16.0,
+                 events_per_employee: int = 32):
+        """
+        Args:
+            retention_days: Days of closed sessions kept in memory
+            max_session_hours: Hours after which an open session is closed as incomplete
+            events_per_employee: Recent events kept per employee
+        """
+        self.retention = timedelta(days=retention_days)
+        self.max_session = timedelta(hours=max_session_hours)
+        self.events_per_employee = events_per_employee
+
+        self._lock = threading.RLock()
+        self._recent_events: Dict[str, Deque[AttendanceEvent]] = {}
+        self._open_sessions: Dict[str, WorkSession] = {}
+        # Closed sessions by check-in date, then employee
+        self._sessions_by_day: Dict[date, Dict[str, List[WorkSession]]] = {}
+        # Expiry heaps of (check_in, employee_id) and (last event time, employee_id);
+        # entries are checked against the current state when popped
+        self._open_heap: List[Tuple[datetime, str]] = []
+        self._event_heap: List[Tuple[datetime, str]] = []
+        self._latest_timestamp: Optional[datetime] = None
+        self.stats = {'events': 0, 'sessions_closed': 0, 'sessions_expired': 0, 'unmatched_exits': 0}
+
+    def record_event(self, employee_id: str, event_type: str, camera_id: Optional[int],
+                     timestamp: datetime) -> Optional[WorkSession]:
+        """
+        Record an attendance event and update the employee's session.
+
+        Args:
+            employee_id: Employee identifier
+            event_type: 'entry' or 'exit'
+            camera_id: Camera that recorded the event
+            timestamp: Event time (naive UTC)
+
+        Returns:
+            The session closed by this event, if any
+        """
+        event = AttendanceEvent(employee_id, event_type, camera_id, timestamp)
+
+        with self._lock:
+            self.stats['events'] += 1
+            if event.employee_id not in self._recent_events:
+                heapq.heappush(self._event_heap, (timestamp, employee_id))
+            self._index_event(event)
+
+            if self._latest_timestamp is None or timestamp > self._latest_timestamp:
+                self._latest_timestamp = timestamp
+                self._expire(timestamp)
+
+            open_session = self._open_sessions.get(employee_id)
+
+            if event_type == 'entry':
+                if open_session is None:
+                    self._open_sessions[employee_id] = WorkSession(employee_id, timestamp, camera_id)
+                    heapq.heappush(self._open_heap, (timestamp, employee_id))
+                elif timestamp < open_session.check_in:
+                    # Out-of-order delivery - keep the earliest check-in
+                    open_session.check_in = timestamp
+                    open_session.check_in_camera = camera_id
+                    heapq.heappush(self._open_heap, (timestamp, employee_id))
+                return None
+
+            if event_type == 'exit':
+                if open_session is None or timestamp < open_session.check_in:
+                    self.stats['unmatched_exits'] += 1
+                    return None
+                open_session.check_out = timestamp
+                open_session.check_out_camera = camera_id
+                open_session.is_complete = True
+                del self._open_sessions[employee_id]
+                self._store_session(open_session)
+                self.stats['sessions_closed'] += 1
+                return open_session
+
+            return None
+
+    def load_events(self, events: Iterable[Tuple[str, str, Optional[int], datetime]]):
+        """
+        Replay historical events, e.g. today's logs at startup.
+
+        Args:
+            events: (employee_id, event_type, camera_id, timestamp) tuples
+        """
+        for employee_id, event_type, camera_id, timestamp in sorted(events, key=lambda e: e[3]):
+            self.record_event(employee_id, event_type, camera_id, timestamp)
+
+    def _index_event(self, event: AttendanceEvent):
+        """Insert an event into the employee's bounded, time-ordered index."""
+        events = self._recent_events.get(event.employee_id)
+        if events is None:
+            events = self._recent_events[event.employee_id] = deque(maxlen=self.events_per_employee)
+
+        if not events or events[-1].timestamp <= event.timestamp:
+            events.append(event)
+        else:
+            timestamps = [e.timestamp for e in events]
+            events.insert(bisect.bisect_right(timestamps, event.timestamp), event)
+            if len(events) > self.events_per_employee:
+                events.popleft()
+
+    def _store_session(self, session: WorkSession):
+        """Add a closed session to the per-day index."""
+        self._sessions_by_day.setdefault(session.work_date, {}).setdefault(
+            session.employee_id, []
+        ).append(session)
+
+    def _expire(self, now: datetime):
+        """Close stale open sessions and drop data outside the retention window."""
+        session_cutoff = now - self.max_session
+        while self._open_heap and self._open_heap[0][0] < session_cutoff:
+            check_in, employee_id = heapq.heappop(self._open_heap)
+            session = self._open_sessions.get(employee_id)
+            # Skip entries for sessions that were closed or moved to an earlier check-in
+            if session is None or session.check_in != check_in:
+                continue
+            del self._open_sessions[employee_id]
+            self._store_session(session)
+            self.stats['sessions_expired'] += 1
+
+        cutoff = (now - self.retention).date()
+        for day in [day for day in self._sessions_by_day if day < cutoff]:
+            del self._sessions_by_day[day]
+
+        # One entry per indexed employee; re-queued at the latest event time if still recent
+        horizon = now - self.retention
+        while self._event_heap and self._event_heap[0][0] < horizon:
+            _, employee_id = heapq.heappop(self._event_heap)
+            events = self._recent_events.get(employee_id)
+            if events is None:
+                continue
+            if events[-1].timestamp < horizon:
+                del self._recent_events[employee_id]
+            else:
+                heapq.heappush(self._event_heap, (events[-1].timestamp, employee_id))
+
+    def get_sessions(self, day: date, employee_id: Optional[str] = None,
+                     include_open: bool = True) -> List[WorkSession]:
+        """
+        Get sessions that started on a day.
+
+        Args:
+            day: Check-in date
+            employee_id: Restrict to one employee
+            include_open: Include sessions that have not been closed yet
+
+        Returns:
+            Sessions ordered by check-in time
+        """
+        with self._lock:
+            by_employee = self._sessions_by_day.get(day, {})
+            if employee_id is not None:
+                sessions = list(by_employee.get(employee_id, []))
+            else:
+                sessions = [s for employee_sessions in by_employee.values() for s in employee_sessions]
+
+            if include_open:
+                sessions.extend(
+                    s for s in self._open_sessions.values()
+                    if s.work_date == day and (employee_id is None or s.employee_id == employee_id)
+                )
+
+        return sorted(sessions, key=lambda s: s.check_in)
+
+    def get_hours_worked(self, day: date) -> Dict[str, float]:
+        """
+        Get completed in-building hours per employee for a day.
+
+        Returns:
+            Mapping of employee_id to hours
+        """
+        return hours_worked(self.get_sessions(day, include_open=False))
+
+    def get_recent_events(self, employee_id: str) -> List[AttendanceEvent]:
+        """Get an employee's recent events across all cameras, oldest first."""
+        with self._lock:
+            return list(self._recent_events.get(employee_id, []))
+
+    def get_open_session(self, employee_id: str) -> Optional[WorkSession]:
+        """Get the employee's current open session, if checked in."""
+        with self._lock:
+            return self._open_sessions.get(employee_id)
+
+def hours_worked(sessions: Iterable[WorkSession]) -> Dict[str, float]:
+    """Sum session durations per employee in hours; open sessions count as zero."""
+    hours: Dict[str, float] = {}
+    for session in sessions:
+        hours[session.employee_id] = hours.get(session.employee_id, 0.0) + session.duration_seconds / 3600
+    return {employee_id: round(value, 2) for employee_id, value in hours.items()}
+
+def pair_sessions(events: Iterable[Tuple[str, str, Optional[int], datetime]], day: date,
+                  employee_id: Optional[str] = None,
+                  max_session_hours: float = settings.SESSION_MAX_HOURS) -> List[WorkSession]:
+    """
+    Pair persisted events into the sessions that started on a day.
+
+    Args:
+        events: (employee_id, event_type, camera_id, timestamp) tuples covering
+            max_session_hours either side of the day
+        day: Check-in date
+        employee_id: Restrict to one employee
+        max_session_hours: Hours after which an open session is closed as incomplete
+
+    Returns:
+        Sessions ordered by check-in time
+    """
+    # Retention spans the whole window, so nothing from the day is dropped
+    pairing = SessionPairingService(
+        retention_days=math.ceil(max_session_hours / 24) + 2,
+        max_session_hours=max_session_hours,
+        events_per_employee=1
+    )
+    pairing.load_events(events)
+    return pairing.get_sessions(day, employee_id=employee_id)
+
+# Live instance fed by the camera monitor as attendance events commit
+session_pairing = SessionPairingService(
+    retention_days=settings.SESSION_RETENTION_DAYS,
+    max_session_hours=settings.SESSION_MAX_HOURS,
+    events_per_employee=settings.SESSION_EVENTS_PER_EMPLOYEE
+)
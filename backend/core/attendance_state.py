@@ -0,0 +1,152 @@
+"""
+Attendance event debouncing.
+Turns a stream of face sightings into one attendance event per real
+entry/exit transition, per employee and camera, before anything is written
+to the database.
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _AttendanceState:
+    """Last emitted event and last sighting for one (employee, camera) pair."""
+
+    __slots__ = ('last_event_type', 'last_event_time', 'last_seen')
+
+    def __init__(self, last_event_type: str, timestamp: float):
+        self.last_event_type = last_event_type
+        self.last_event_time = timestamp
+        self.last_seen = timestamp
+
+class AttendanceStateMachine:
+    """
+    Per-employee, per-camera attendance event state machine.
+
+    A sighting only produces an event when it is a real transition:
+
+    - an explicit event (e.g. a tripwire crossing) whose type differs from the
+      last emitted event for that employee and camera, or
+    - the first sighting after the employee has been out of view of the
+      camera for longer than the cooldown window.
+
+    Sightings in between only refresh the last-seen time, so an employee
+    standing in front of a door for minutes produces a single event. The
+    event type of a sighting comes from the camera type: 'entry' and 'exit'
+    cameras always emit their own type, while 'general' cameras toggle
+    between entry and exit for each employee.
+    """
+
+    def __init__(self, cooldown_seconds: float = 300.0, retention_seconds: float = 86400.0,
+                 prune_interval: int = 1000):
+        """
+        Args:
+            cooldown_seconds: Seconds out of view before a sighting counts as a new transition
+            retention_seconds: Seconds of inactivity after which state is forgotten
+            prune_interval: Number of processed sightings between pruning passes
+        """
+        self.cooldown_seconds = cooldown_seconds
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+
+        self._states: Dict[Tuple[str, int], _AttendanceState] = {}
+        self._lock = threading.Lock()
+        self._processed = 0
+        self.stats = {'sightings': 0, 'events': 0, 'suppressed': 0}
+
+    def process(self, employee_id: str, camera_id: int, camera_type: str, timestamp: float,
+                event_type: Optional[str] = None) -> Optional[str]:
+        """
+        Process a sighting and decide whether it is an attendance event.
+
+        Args:
+            employee_id: Recognized employee
+            camera_id: Camera that saw the employee
+            camera_type: Camera type ('entry', 'exit' or 'general')
+            timestamp: Sighting timestamp (seconds since epoch)
+            event_type: Explicit event type, e.g. from a tripwire crossing
+
+        Returns:
+            Event type to record ('entry' or 'exit'), or None to suppress
+        """
+        key = (employee_id, camera_id)
+
+        with self._lock:
+            self.stats['sightings'] += 1
+            self._processed += 1
+            if self._processed % self.prune_interval == 0:
+                self._prune(timestamp)
+
+            state = self._states.get(key)
+            in_view = state is not None and timestamp - state.last_seen < self.cooldown_seconds
+
+            if state is not None:
+                state.last_seen = max(state.last_seen, timestamp)
+
+            if in_view and (event_type is None or event_type == state.last_event_type):
+                self.stats['suppressed'] += 1
+                return None
+
+            next_event = event_type or self._event_for_camera(camera_type, state)
+            if state is None:
+                self._states[key] = _AttendanceState(next_event, timestamp)
+            else:
+                state.last_event_type = next_event
+                state.last_event_time = timestamp
+
+            self.stats['events'] += 1
+            return next_event
+
+    def touch(self, employee_id: str, camera_id: int, timestamp: float):
+        """
+        Refresh the last-seen time of an employee who is still in view.
+
+        Args:
+            employee_id: Recognized employee
+            camera_id: Camera that saw the employee
+            timestamp: Sighting timestamp (seconds since epoch)
+        """
+        with self._lock:
+            state = self._states.get((employee_id, camera_id))
+            if state is not None:
+                state.last_seen = max(state.last_seen, timestamp)
+
+    @staticmethod
+    def _event_for_camera(camera_type: str, state: Optional[_AttendanceState]) -> str:
+        """Event type implied by a sighting on a camera of the given type."""
+        if camera_type in ('entry', 'exit'):
+            return camera_type
+        if state is not None and state.last_event_type == 'entry':
+            return 'exit'
+        return 'entry'
+
+    def _prune(self, now: float):
+        """Forget state for pairs not seen within the retention window."""
+        expired = [key for key, state in self._states.items()
+                   if now - state.last_seen > self.retention_seconds]
+        for key in expired:
+            del self._states[key]
+        if expired:
+            logger.debug(f"Pruned {len(expired)} idle attendance states")
+
+    def get_last_event(self, employee_id: str, camera_id: int) -> Optional[Tuple[str, float]]:
+        """
+        Get the last emitted event for an employee on a camera.
+
+        Returns:
+            Tuple of (event_type, timestamp) or None if unknown
+        """
+        with self._lock:
+            state = self._states.get((employee_id, camera_id))
+            return (state.last_event_type, state.last_event_time) if state else None
+
+    def reset(self, camera_id: Optional[int] = None):
+        """Forget state for one camera, or for all cameras."""
+        with self._lock:
+            if camera_id is None:
+                self._states.clear()
+            else:
+                for key in [key for key in self._states if key[1] == camera_id]:
+                    del self._states[key]
@@ -77,7 +77,7 @@ class FaceEnroller:
                 self.logger.error(f"Error creating employee {employee_id} in database")
                 raise DatabaseOperationError(f"Failed to create employee {employee_id}")
             self.logger.info(f"Created new employee {employee_name} ({employee_id}) in database")
-        valid_count = 0
+        records = []
         for img_path in image_paths:
             if not os.path.exists(img_path):
                 self.logger.warning(f"Image not found - {img_path}")
@@ -98,22 +98,23 @@ class FaceEnroller:
                 if not self._validate_quality_score(face.det_score):
                     self.logger.warning(f"Invalid quality score from {img_path}, using default")
                     face.det_score = 0.5
-                stored = self.db_manager.store_face_embedding(
-                    employee_id,
-                    face.embedding,
-                    embedding_type='enroll' if not update_existing else 'update',
-                    quality_score=face.det_score,
-                    source_image_path=img_path
-                )
-                if not stored:
-                    self.logger.error(f"Error storing embedding for {employee_id} from {img_path}")
-                    continue
-                valid_count += 1
-                self.logger.info(f"Processed {img_path} - Face detected and embedding stored in DB")
+                records.append({
+                    'employee_id': employee_id,
+                    'embedding': face.embedding,
+                    'embedding_type': 'enroll' if not update_existing else 'update',
+                    'quality_score': face.det_score,
+                    'source_image_path': img_path
+                })
+                self.logger.info(f"Processed {img_path} - Face detected")
             except Exception as e:
                 self.logger.error(f"Error processing {img_path}: {str(e)}")
                 continue
+        valid_count = len(records)
         if valid_count >= min_faces:
+            # All of the employee's embeddings in one transaction
+            if self.db_manager.store_face_embeddings_bulk(records) != valid_count:
+                self.logger.error(f"Error storing {valid_count} embeddings for {employee_id}")
+                raise DatabaseOperationError(f"Failed to store embeddings for {employee_id}")
             action = "Updated" if update_existing else "Enrolled"
             self.logger.info(f"{action} {employee_name} ({employee_id}) with {valid_count} images")
             if rebuild_index and not self._batch_mode and self.tracking_system:
@@ -132,20 +133,7 @@ class FaceEnroller:
             self.logger.error(f"Image not found - {image_path}")
             raise FileNotFoundError(f"Image not found - {image_path}")
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                self.logger.error(f"Could not read image - {image_path}")
-                raise ImageProcessingError(f"Could not read image - {image_path}")
-            faces = self.face_app.get(img)
-            if len(faces) != 1:
-                self.logger.error(f"Found {len(faces)} faces in image (expected 1)")
-                raise ImageProcessingError(f"Expected 1 face, found {len(faces)}")
-            face = faces[0]
-            if not self._validate_embedding(face.embedding):
-                raise ImageProcessingError(f"Invalid embedding format from {image_path}")
-            if not self._validate_quality_score(face.det_score):
-                self.logger.warning(f"Invalid quality score from {image_path}, using default")
-                face.det_score = 0.5
+            face = self._extract_face(image_path)
             stored = self.db_manager.store_face_embedding(
                 employee_id,
                 face.embedding,
@@ -185,6 +173,58 @@ class FaceEnroller:
         finally:
             self.set_batch_mode(False)
 
+    def process_pending_embeddings(self, limit: int = 100) -> int:
+        """
+        Extract embeddings for images uploaded through the API, which are
+        recorded without a vector and stay out of the gallery until then.
+        Images without exactly one usable face are deactivated.
+
+        Returns:
+            Number of pending embeddings processed (0 when none are left)
+        """
+        pending = self.db_manager.get_pending_embeddings(limit)
+        results, failed_ids = [], []
+        for embedding_id, employee_id, image_path in pending:
+            try:
+                face = self._extract_face(image_path)
+            except Exception as e:
+                self.logger.warning(f"No embedding for {employee_id} from {image_path}: {e}")
+                failed_ids.append(embedding_id)
+                continue
+            results.append({
+                'embedding_id': embedding_id,
+                'embedding': face.embedding,
+                'quality_score': face.det_score
+            })
+        if not pending:
+            return 0
+        if not self.db_manager.complete_pending_embeddings(results, failed_ids):
+            raise DatabaseOperationError(f"Failed to store {len(results)} pending embeddings")
+        self.logger.info(f"Extracted {len(results)} pending embeddings, {len(failed_ids)} without a usable face")
+        if results and not self._batch_mode and self.tracking_system:
+            self.tracking_system.reload_embeddings_and_rebuild_index()
+        return len(pending)
+
+    def _extract_face(self, image_path: str):
+        """Detect the single face in an image, raising ImageProcessingError otherwise."""
+        if not os.path.exists(image_path):
+            raise ImageProcessingError(f"Image not found - {image_path}")
+        img = cv2.imread(image_path)
+        if img is None:
+            self.logger.error(f"Could not read image - {image_path}")
+            raise ImageProcessingError(f"Could not read image - {image_path}")
+        faces = self.face_app.get(img)
+        if len(faces) != 1:
+            self.logger.error(f"Found {len(faces)} faces in image (expected 1)")
+            raise ImageProcessingError(f"Expected 1 face, found {len(faces)}")
+        face = faces[0]
+        if not self._validate_embedding(face.embedding):
+            raise ImageProcessingError(f"Invalid embedding format from {image_path}")
+        if not self._validate_quality_score(face.det_score):
+            self.logger.warning(f"Invalid quality score from {image_path}, using default")
+            face.det_score = 0.5
+        return face
+
     def delete_employee_embedding(self, embedding_id: int, rebuild_index: bool = True) -> bool:
         try:
             success = self.db_manager.remove_embedding(embedding_id)
@@ -0,0 +1,367 @@
+"""
+Per-camera multi-object face tracker.
+Associates face detections across frames so that a person standing in front
+of a camera keeps a single track (and a single identity) instead of being
+treated as a new face on every sampled frame.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy is optional, fall back to greedy assignment
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+# Cost assigned to pairs that fail gating; never selected by the assignment
+INVALID_COST = 1e6
+
+def box_iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute pairwise IoU between two sets of (x1, y1, x2, y2) boxes.
+
+    Args:
+        boxes_a: Array of shape (N, 4)
+        boxes_b: Array of shape (M, 4)
+
+    Returns:
+        IoU matrix of shape (N, M)
+    """
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return intersection / np.maximum(union, 1e-6)
+
+def _greedy_assignment(cost: np.ndarray):
+    """Greedy lowest-cost-first assignment used when scipy is unavailable."""
+    rows, cols = [], []
+    if cost.size == 0:
+        return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+    used_rows, used_cols = set(), set()
+    for flat_index in np.argsort(cost, axis=None):
+        row, col = divmod(int(flat_index), cost.shape[1])
+        if cost[row, col] >= INVALID_COST:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        rows.append(row)
+        cols.append(col)
+
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+class FaceTracker:
+    """
+    Multi-object face tracker for a single camera.
+
+    Track state is kept as a struct of arrays (one row per track slot) so that
+    prediction, cost computation and updates are vectorized over all tracks.
+    Association combines box IoU against constant-velocity predictions with
+    cosine distance between face embeddings, solved with Hungarian assignment.
+    """
+
+    def __init__(self,
+                 max_age: float = 2.0,
+                 max_cost: float = 0.7,
+                 iou_weight: float = 0.5,
+                 min_identity_confidence: float = 0.0,
+                 velocity_smoothing: float = 0.5,
+                 embedding_smoothing: float = 0.9,
+                 initial_capacity: int = 64):
+        """
+        Args:
+            max_age: Seconds a track survives without a matching detection
+            max_cost: Maximum association cost for a detection/track pair
+            iou_weight: Weight of (1 - IoU) in the cost; the remainder goes to embedding distance
+            min_identity_confidence: Minimum recognition confidence to assign an identity to a track
+            velocity_smoothing: Exponential smoothing factor for box velocity
+            embedding_smoothing: Exponential smoothing factor for the track embedding
+            initial_capacity: Number of preallocated track slots
+        """
+        self.max_age = max_age
+        self.max_cost = max_cost
+        self.iou_weight = iou_weight
+        self.min_identity_confidence = min_identity_confidence
+        self.velocity_smoothing = velocity_smoothing
+        self.embedding_smoothing = embedding_smoothing
+
+        self._lock = threading.Lock()
+        self._next_track_id = 1
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int):
+        """Allocate empty struct-of-arrays track storage."""
+        self.capacity = capacity
+        self.active = np.zeros(capacity, dtype=bool)
+        self.track_ids = np.zeros(capacity, dtype=np.int64)
+        self.boxes = np.zeros((capacity, 4), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 4), dtype=np.float32)
+        self.last_update = np.zeros(capacity, dtype=np.float64)
+        self.hits = np.zeros(capacity, dtype=np.int32)
+        self.identity_confidence = np.zeros(capacity, dtype=np.float32)
+        self.has_embedding = np.zeros(capacity, dtype=bool)
+        self.embeddings: Optional[np.ndarray] = None  # (capacity, dim), allocated on first embedding
+        self.employee_ids: List[Optional[str]] = [None] * capacity
+
+    def _grow(self):
+        """Double track storage capacity, preserving existing tracks."""
+        old_capacity = self.capacity
+        new_capacity = old_capacity * 2
+
+        def extend(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros((new_capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:old_capacity] = array
+            return grown
+
+        self.active = extend(self.active)
+        self.track_ids = extend(self.track_ids)
+        self.boxes = extend(self.boxes)
+        self.velocities = extend(self.velocities)
+        self.last_update = extend(self.last_update)
+        self.hits = extend(self.hits)
+        self.identity_confidence = extend(self.identity_confidence)
+        self.has_embedding = extend(self.has_embedding)
+        if self.embeddings is not None:
+            self.embeddings = extend(self.embeddings)
+        self.employee_ids.extend([None] * old_capacity)
+        self.capacity = new_capacity
+
+    @property
+    def track_count(self) -> int:
+        """Number of live tracks."""
+        return int(self.active.sum())
+
+    def predict(self, slots: np.ndarray, timestamp: float) -> np.ndarray:
+        """
+        Predict track boxes at a timestamp using constant-velocity motion.
+
+        Args:
+            slots: Track slot indices
+            timestamp: Target timestamp
+
+        Returns:
+            Predicted boxes of shape (len(slots), 4)
+        """
+        dt = np.clip(timestamp - self.last_update[slots], 0.0, self.max_age).astype(np.float32)
+        return self.boxes[slots] + self.velocities[slots] * dt[:, None]
+
+    def _association_cost(self, slots: np.ndarray, det_boxes: np.ndarray,
+                          det_embeddings: Optional[np.ndarray], det_has_embedding: np.ndarray,
+                          timestamp: float) -> np.ndarray:
+        """Build the gated (tracks x detections) association cost matrix."""
+        iou = box_iou_matrix(self.predict(slots, timestamp), det_boxes)
+        cost = 1.0 - iou
+
+        if det_embeddings is not None and self.embeddings is not None:
+            pair_has_embedding = self.has_embedding[slots][:, None] & det_has_embedding[None, :]
+            if pair_has_embedding.any():
+                embedding_distance = 1.0 - self.embeddings[slots] @ det_embeddings.T
+                combined = self.iou_weight * cost + (1.0 - self.iou_weight) * embedding_distance
+                cost = np.where(pair_has_embedding, combined, cost)
+
+        # Pairs with no spatial overlap are only allowed when embeddings agree
+        cost = np.where(cost > self.max_cost, INVALID_COST, cost)
+        return cost
+
+    def update(self, detections: List[Dict], timestamp: float) -> List[Dict]:
+        """
+        Associate detections with tracks and update track state.
+
+        Each detection is a face_data dict with a 'bbox' (x1, y1, x2, y2) and
+        optionally 'embedding', 'employee_id' and 'confidence'. Returned dicts
+        are copies annotated with 'track_id' and 'new_identity', which is True
+        the first time a track is assigned a given employee_id.
+
+        Args:
+            detections: Face detections from one frame
+            timestamp: Frame timestamp
+
+        Returns:
+            Annotated detections in the same order
+        """
+        with self._lock:
+            self._expire(timestamp)
+
+            results = [dict(face_data, track_id=None, new_identity=False) for face_data in detections]
+            tracked = [i for i, face_data in enumerate(detections) if face_data.get('bbox') is not None]
+
+            # Detections without a box cannot be tracked; treat each as a new sighting
+            for i, face_data in enumerate(detections):
+                if face_data.get('bbox') is None:
+                    results[i]['new_identity'] = face_data.get('employee_id') is not None
+
+            if not tracked:
+                return results
+
+            det_boxes = np.asarray([detections[i]['bbox'] for i in tracked], dtype=np.float32).reshape(-1, 4)
+            det_embeddings, det_has_embedding = self._stack_embeddings([detections[i] for i in tracked])
+
+            slots = np.flatnonzero(self.active)
+            matched_slots = np.full(len(tracked), -1, dtype=np.intp)
+
+            if len(slots):
+                cost = self._association_cost(slots, det_boxes, det_embeddings, det_has_embedding, timestamp)
+                if linear_sum_assignment is not None:
+                    rows, cols = linear_sum_assignment(cost)
+                else:
+                    rows, cols = _greedy_assignment(cost)
+                valid = cost[rows, cols] < INVALID_COST
+                matched_slots[cols[valid]] = slots[rows[valid]]
+
+            matched = matched_slots >= 0
+            self._update_tracks(matched_slots[matched], det_boxes[matched], timestamp)
+            for det_index in np.flatnonzero(~matched):
+                matched_slots[det_index] = self._create_track(det_boxes[det_index], timestamp)
+
+            if det_embeddings is not None:
+                self._update_embeddings(matched_slots[det_has_embedding], det_embeddings[det_has_embedding])
+
+            for det_index, slot in enumerate(matched_slots):
+                result = results[tracked[det_index]]
+                result['track_id'] = int(self.track_ids[slot])
+                result['new_identity'] = self._update_identity(slot, detections[tracked[det_index]])
+
+            return results
+
+    def _stack_embeddings(self, detections: List[Dict]):
+        """Stack and L2-normalize detection embeddings, if any are present."""
+        has_embedding = np.array([d.get('embedding') is not None for d in detections], dtype=bool)
+        if not has_embedding.any():
+            return None, has_embedding
+
+        dim = len(next(d['embedding'] for d in detections if d.get('embedding') is not None))
+        stacked = np.zeros((len(detections), dim), dtype=np.float32)
+        for i, face_data in enumerate(detections):
+            if has_embedding[i]:
+                stacked[i] = face_data['embedding']
+
+        norms = np.linalg.norm(stacked, axis=1, keepdims=True)
+        stacked /= np.maximum(norms, 1e-6)
+
+        if self.embeddings is None:
+            self.embeddings = np.zeros((self.capacity, dim), dtype=np.float32)
+
+        return stacked, has_embedding
+
+    def _create_track(self, box: np.ndarray, timestamp: float) -> int:
+        """Start a new track in a free slot and return the slot index."""
+        free_slots = np.flatnonzero(~self.active)
+        if not len(free_slots):
+            self._grow()
+            free_slots = np.flatnonzero(~self.active)
+        slot = int(free_slots[0])
+
+        self.active[slot] = True
+        self.track_ids[slot] = self._next_track_id
+        self._next_track_id += 1
+        self.boxes[slot] = box
+        self.velocities[slot] = 0.0
+        self.last_update[slot] = timestamp
+        self.hits[slot] = 1
+        self.identity_confidence[slot] = 0.0
+        self.has_embedding[slot] = False
+        self.employee_ids[slot] = None
+        return slot
+
+    def _update_tracks(self, slots: np.ndarray, boxes: np.ndarray, timestamp: float):
+        """Update matched tracks' boxes and smoothed velocities."""
+        if not len(slots):
+            return
+
+        dt = (timestamp - self.last_update[slots]).astype(np.float32)
+        moving = dt > 0
+        velocity = (boxes - self.boxes[slots]) / np.maximum(dt, 1e-6)[:, None]
+        smoothed = (self.velocity_smoothing * self.velocities[slots]
+                    + (1.0 - self.velocity_smoothing) * velocity)
+        self.velocities[slots] = np.where(moving[:, None], smoothed, self.velocities[slots])
+
+        self.boxes[slots] = boxes
+        self.last_update[slots] = np.maximum(self.last_update[slots], timestamp)
+        self.hits[slots] += 1
+
+    def _update_embeddings(self, slots: np.ndarray, embeddings: np.ndarray):
+        """Blend detection embeddings into the matched tracks' embeddings."""
+        if not len(slots):
+            return
+
+        blended = (self.embedding_smoothing * self.embeddings[slots]
+                   + (1.0 - self.embedding_smoothing) * embeddings)
+        blended /= np.maximum(np.linalg.norm(blended, axis=1, keepdims=True), 1e-6)
+
+        # Tracks seeing their first embedding take it as-is
+        self.embeddings[slots] = np.where(self.has_embedding[slots][:, None], blended, embeddings)
+        self.has_embedding[slots] = True
+
+    def _update_identity(self, slot: int, face_data: Dict) -> bool:
+        """Assign the detection's identity to a track; True if the identity is new."""
+        employee_id = face_data.get('employee_id')
+        confidence = face_data.get('confidence', 0.0)
+        if not employee_id or confidence <= self.min_identity_confidence:
+            return False
+
+        if self.employee_ids[slot] == employee_id:
+            self.identity_confidence[slot] = max(self.identity_confidence[slot], confidence)
+            return False
+
+        # A different identity only replaces the current one if it is more confident
+        if self.employee_ids[slot] is not None and confidence <= self.identity_confidence[slot]:
+            return False
+
+        self.employee_ids[slot] = employee_id
+        self.identity_confidence[slot] = confidence
+        return True
+
+    def _expire(self, timestamp: float):
+        """Drop tracks that have not been matched within max_age seconds."""
+        expired = self.active & (timestamp - self.last_update > self.max_age)
+        if expired.any():
+            self.active[expired] = False
+            for slot in np.flatnonzero(expired):
+                self.employee_ids[slot] = None
+
+    def get_tracks(self) -> List[Dict]:
+        """Get a snapshot of live tracks."""
+        with self._lock:
+            return [
+                {
+                    'track_id': int(self.track_ids[slot]),
+                    'bbox': self.boxes[slot].tolist(),
+                    'velocity': self.velocities[slot].tolist(),
+                    'employee_id': self.employee_ids[slot],
+                    'hits': int(self.hits[slot]),
+                    'last_update': float(self.last_update[slot])
+                }
+                for slot in np.flatnonzero(self.active)
+            ]
+
+    def get_track_state(self) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]], np.ndarray]:
+        """
+        Get live track ids, boxes and identities as arrays.
+
+        Returns:
+            Tuple of (track_ids (T,), boxes (T, 4), employee_ids, identity confidences (T,))
+        """
+        with self._lock:
+            slots = np.flatnonzero(self.active)
+            return (self.track_ids[slots].copy(), self.boxes[slots].copy(),
+                    [self.employee_ids[slot] for slot in slots],
+                    self.identity_confidence[slots].copy())
+
+    def reset(self):
+        """Drop all tracks."""
+        with self._lock:
+            self._allocate(self.capacity)
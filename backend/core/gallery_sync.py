@@ -0,0 +1,206 @@
+"""
+Recognition gallery synchronization.
+Keeps a process's embedding gallery in step with the database by applying
+the gallery change feed: on each change only the affected employees' rows
+are re-read and swapped in. Changes are picked up as soon as Postgres
+delivers a NOTIFY on the gallery channel, with periodic polling as the
+fallback when LISTEN is unavailable or a notification is missed.
+"""
+
+import logging
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from db.db_config import SessionLocal, engine
+from db.embedding_gallery import EmbeddingGallery, load_embedding_gallery
+from db.gallery_changes import GALLERY_CHANNEL, get_changed_employees, get_gallery_version
+
+logger = logging.getLogger(__name__)
+
+class GallerySync:
+    """
+    Process-local copy of the recognition gallery, updated from the change feed.
+
+    Listeners are called with (version, gallery) after the initial load and
+    after every applied change. Galleries are replaced, never mutated, so a
+    reader holding one keeps a consistent snapshot.
+    """
+
+    LISTEN_RETRY_SECONDS = 60.0
+
+    def __init__(self, session_factory=SessionLocal, poll_interval: float = 5.0, use_notify: bool = True):
+        """
+        Args:
+            session_factory: SQLAlchemy session factory
+            poll_interval: Seconds between polls for changes
+            use_notify: Wake up on Postgres NOTIFY instead of waiting for the next poll
+        """
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.use_notify = use_notify
+        self._lock = threading.Lock()
+        self._gallery = EmbeddingGallery.empty(settings.EMBEDDING_DIM)
+        self._version = 0
+        self._loaded = False
+        self._listeners: List[Callable[[int, EmbeddingGallery], None]] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._mode = 'stopped'
+        self._last_sync: Optional[float] = None
+        self._changes_applied = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def add_listener(self, callback: Callable[[int, EmbeddingGallery], None]):
+        """Register a callback for gallery updates."""
+        self._listeners.append(callback)
+
+    def get_gallery(self) -> Tuple[int, EmbeddingGallery]:
+        """Current (version, gallery)."""
+        with self._lock:
+            return self._version, self._gallery
+
+    def load(self):
+        """Load the full gallery and the version it corresponds to."""
+        session = self.session_factory()
+        try:
+            # Version first: a change committed during the load is re-applied
+            # by the next sync, which is harmless because syncs re-read rows
+            version = get_gallery_version(session)
+            gallery = self._load(session)
+        finally:
+            session.close()
+
+        with self._lock:
+            self._gallery = gallery
+            self._version = version
+            self._loaded = True
+        logger.info(f"Gallery loaded at version {version}: {len(gallery)} embeddings")
+        self._notify(version, gallery)
+
+    def sync(self) -> bool:
+        """
+        Apply changes recorded since the current version.
+
+        Returns:
+            True if the gallery changed
+        """
+        if not self._loaded:
+            self.load()
+            return True
+
+        session = self.session_factory()
+        try:
+            version, employee_ids = get_changed_employees(session, self._version)
+            if not employee_ids:
+                self._last_sync = time.time()
+                return False
+            delta = self._load(session, employee_ids)
+        finally:
+            session.close()
+
+        with self._lock:
+            gallery = self._gallery.replace_employees(employee_ids, delta)
+            self._gallery = gallery
+            self._version = version
+            self._changes_applied += 1
+            self._last_sync = time.time()
+        logger.info(f"Gallery updated to version {version}: {len(employee_ids)} employees changed")
+        self._notify(version, gallery)
+        return True
+
+    def get_status(self) -> Dict:
+        """Version, size and sync mode for monitoring."""
+        with self._lock:
+            return {
+                'version': self._version,
+                'embeddings': len(self._gallery),
+                'loaded': self._loaded,
+                'mode': self._mode,
+                'changes_applied': self._changes_applied,
+                'last_sync': self._last_sync
+            }
+
+    def start(self):
+        """Start following the change feed."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="gallery_sync")
+        self._thread.start()
+        logger.info("Gallery sync started")
+
+    def stop(self):
+        """Stop following the change feed."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._mode = 'stopped'
+
+    def _load(self, session, employee_ids: Optional[List[str]] = None) -> EmbeddingGallery:
+        return load_embedding_gallery(
+            session,
+            settings.EMBEDDING_DIM,
+            settings.EMBEDDING_MODEL_VERSION,
+            employee_ids=employee_ids
+        )
+
+    def _notify(self, version: int, gallery: EmbeddingGallery):
+        for listener in self._listeners:
+            try:
+                listener(version, gallery)
+            except Exception as e:
+                logger.error(f"Gallery listener failed: {e}")
+
+    def _safe_sync(self):
+        try:
+            self.sync()
+        except Exception as e:
+            logger.error(f"Gallery sync failed: {e}")
+
+    def _run(self):
+        listen_retry_at = 0.0
+        while not self._stop_event.is_set():
+            if self.use_notify and engine.dialect.name == 'postgresql' and time.time() >= listen_retry_at:
+                try:
+                    self._listen()
+                except Exception as e:
+                    logger.warning(f"Gallery LISTEN failed, polling every {self.poll_interval}s: {e}")
+                    listen_retry_at = time.time() + self.LISTEN_RETRY_SECONDS
+                    continue
+            self._mode = 'poll'
+            self._safe_sync()
+            self._stop_event.wait(self.poll_interval)
+
+    def _listen(self):
+        """Sync whenever a notification arrives, and at least every poll interval."""
+        connection = engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {GALLERY_CHANNEL}")
+            self._mode = 'notify'
+
+            # Changes committed before LISTEN took effect
+            self._safe_sync()
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([dbapi_connection], [], [], self.poll_interval)
+                if readable:
+                    dbapi_connection.poll()
+                    dbapi_connection.notifies.clear()
+                self._safe_sync()
+        finally:
+            connection.invalidate()
+
+# Global instance
+gallery_sync = GallerySync(
+    poll_interval=settings.GALLERY_SYNC_POLL_SECONDS,
+    use_notify=settings.GALLERY_SYNC_USE_NOTIFY
+)
@@ -0,0 +1,379 @@
+"""
+Employee presence registry.
+Tracks who is currently present from the attendance event stream, so
+"who is in" queries read a small in-memory (or shared Redis) set instead of
+scanning the attendance history.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Latest log per employee; one index probe per employee on (employee_id, timestamp DESC)
+LATEST_STATUS_SQL = text("""
+    SELECT e.employee_id, l.status, l.timestamp
+    FROM employees e
+    CROSS JOIN LATERAL (
+        SELECT status, timestamp
+        FROM attendance_logs
+        WHERE employee_id = e.employee_id
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) l
+""")
+
+# Highest attendance log id; read before the statuses, so logs committed
+# in between are picked up by the next sync
+MAX_LOG_ID_SQL = text("SELECT COALESCE(MAX(id), 0) FROM attendance_logs")
+
+# Logs written after a watermark, e.g. by camera workers in another process
+NEW_LOGS_SQL = text("""
+    SELECT id, employee_id, timestamp, status
+    FROM attendance_logs
+    WHERE id > :after_id
+    ORDER BY id
+    LIMIT :limit
+""")
+
+# More new logs than this are handled by a full reload
+SYNC_BATCH_SIZE = 1000
+
+def _to_seconds(timestamp: datetime) -> float:
+    """Naive UTC datetime to seconds since epoch."""
+    return (timestamp - _EPOCH).total_seconds()
+
+class PresenceRegistry:
+    """
+    In-memory presence registry for a single process.
+
+    Holds the latest status per employee and the set of present employees
+    with the time they became present. Updates older than the employee's
+    latest known status are ignored, so out-of-order delivery is safe. The
+    version changes whenever the present set changes and is prefixed with an
+    id unique to this registry instance, so versions from before a restart
+    never match.
+
+    Writes made by other processes (the camera workers' attendance writer)
+    do not reach this instance directly. The registry remembers the highest
+    attendance log id it has seen, and readers call sync_presence to apply
+    newer logs from the database at most every PRESENCE_SYNC_SECONDS, plus
+    a full reload every PRESENCE_RELOAD_SECONDS for logs committed out of
+    id order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Tuple[str, datetime]] = {}
+        self._present: Dict[str, datetime] = {}
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._loaded = False
+        self._watermark = 0
+        self._loaded_at = 0.0
+        self._synced_at = 0.0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def watermark(self) -> int:
+        """Highest attendance log id applied from the database."""
+        return self._watermark
+
+    def needs_reload(self) -> bool:
+        """Whether the registry has to be (re)loaded from the database."""
+        return not self._loaded or time.monotonic() - self._loaded_at >= settings.PRESENCE_RELOAD_SECONDS
+
+    def needs_sync(self) -> bool:
+        """Whether logs written since the last sync should be read."""
+        return time.monotonic() - self._synced_at >= settings.PRESENCE_SYNC_SECONDS
+
+    def apply_new_logs(self, logs: Iterable[Tuple[int, str, datetime, str]]):
+        """
+        Apply logs read after the watermark and advance it.
+
+        Args:
+            logs: (id, employee_id, timestamp, status) tuples
+        """
+        with self._lock:
+            for log_id, employee_id, timestamp, status in logs:
+                self._apply_locked(employee_id, status, timestamp)
+                self._watermark = max(self._watermark, log_id)
+            self._synced_at = time.monotonic()
+
+    def apply(self, employee_id: str, status: str, timestamp: datetime) -> bool:
+        """
+        Apply an attendance status change.
+
+        Args:
+            employee_id: Employee identifier
+            status: 'present' or 'absent'
+            timestamp: Time of the attendance log
+
+        Returns:
+            True if the present set changed
+        """
+        with self._lock:
+            return self._apply_locked(employee_id, status, timestamp)
+
+    def apply_logs(self, logs: Iterable[Tuple[str, datetime, str]]):
+        """Apply (employee_id, timestamp, status) tuples, e.g. rows just written by the attendance writer."""
+        with self._lock:
+            for employee_id, timestamp, status in logs:
+                self._apply_locked(employee_id, status, timestamp)
+
+    def replace(self, employee_id: str, status: Optional[str], timestamp: Optional[datetime]):
+        """
+        Overwrite an employee's state regardless of timestamps, e.g. after a log is deleted.
+
+        Args:
+            employee_id: Employee identifier
+            status: Latest remaining status, or None if the employee has no logs
+            timestamp: Time of the latest remaining log
+        """
+        with self._lock:
+            self._latest.pop(employee_id, None)
+            changed = self._present.pop(employee_id, None) is not None
+            if status is not None:
+                changed = self._apply_locked(employee_id, status, timestamp) or changed
+            if changed:
+                self._version += 1
+
+    def load(self, rows: Iterable[Tuple[str, str, datetime]], watermark: int = 0):
+        """
+        Replace the registry contents with the latest status per employee.
+
+        Args:
+            rows: (employee_id, status, timestamp) tuples
+            watermark: Highest attendance log id the rows account for
+        """
+        with self._lock:
+            self._latest.clear()
+            self._present.clear()
+            for employee_id, status, timestamp in rows:
+                self._apply_locked(employee_id, status, timestamp)
+            self._version += 1
+            self._loaded = True
+            self._watermark = watermark
+            self._loaded_at = self._synced_at = time.monotonic()
+        logger.info(f"Presence registry loaded: {len(self._present)} present employees")
+
+    def get_present(self) -> Tuple[str, Dict[str, datetime]]:
+        """
+        Get the present employees.
+
+        Returns:
+            Tuple of (version, {employee_id: present since})
+        """
+        with self._lock:
+            return f"{self._instance_id}-{self._version}", dict(self._present)
+
+    def _apply_locked(self, employee_id: str, status: str, timestamp: datetime) -> bool:
+        latest = self._latest.get(employee_id)
+        if latest is not None and timestamp < latest[1]:
+            return False
+        self._latest[employee_id] = (status, timestamp)
+
+        if status == 'present':
+            if employee_id in self._present:
+                return False
+            self._present[employee_id] = timestamp
+        elif self._present.pop(employee_id, None) is None:
+            return False
+
+        self._version += 1
+        return True
+
+class RedisPresenceRegistry:
+    """
+    Presence registry shared by all workers through Redis.
+
+    Uses a hash of latest timestamps, a hash of present employees and a
+    version counter under a key prefix. Each update runs as one Lua script,
+    so concurrent writers cannot interleave the timestamp check and the
+    update.
+    """
+
+    _APPLY_SCRIPT = """
+        local latest = redis.call('HGET', KEYS[1], ARGV[1])
+        if latest and tonumber(latest) > tonumber(ARGV[3]) then
+            return 0
+        end
+        redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+        local changed
+        if ARGV[2] == 'present' then
+            changed = redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[3])
+        else
+            changed = redis.call('HDEL', KEYS[2], ARGV[1])
+        end
+        if changed == 1 then
+            redis.call('INCR', KEYS[3])
+        end
+        return changed
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "presence"):
+        """
+        Args:
+            redis_url: Redis connection URL
+            prefix: Key prefix for the registry's keys
+        """
+        self._client = redis.Redis.from_url(redis_url)
+        self._latest_key = f"{prefix}:latest"
+        self._present_key = f"{prefix}:present"
+        self._version_key = f"{prefix}:version"
+        self._loaded_key = f"{prefix}:loaded"
+        self._apply_script = self._client.register_script(self._APPLY_SCRIPT)
+        self._keys = [self._latest_key, self._present_key, self._version_key]
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._client.exists(self._loaded_key))
+
+    @property
+    def watermark(self) -> int:
+        return 0
+
+    def needs_reload(self) -> bool:
+        return not self.is_loaded
+
+    def needs_sync(self) -> bool:
+        # Every process's writes already go to the shared registry
+        return False
+
+    def apply_new_logs(self, logs: Iterable[Tuple[int, str, datetime, str]]):
+        self.apply_logs((employee_id, timestamp, status) for _, employee_id, timestamp, status in logs)
+
+    def apply(self, employee_id: str, status: str, timestamp: datetime) -> bool:
+        """Apply an attendance status change; returns True if the present set changed."""
+        return bool(self._apply_script(keys=self._keys, args=[employee_id, status, _to_seconds(timestamp)]))
+
+    def apply_logs(self, logs: Iterable[Tuple[str, datetime, str]]):
+        """Apply (employee_id, timestamp, status) tuples in one round trip."""
+        pipe = self._client.pipeline(transaction=False)
+        for employee_id, timestamp, status in logs:
+            self._apply_script(keys=self._keys, args=[employee_id, status, _to_seconds(timestamp)], client=pipe)
+        pipe.execute()
+
+    def replace(self, employee_id: str, status: Optional[str], timestamp: Optional[datetime]):
+        """Overwrite an employee's state regardless of timestamps."""
+        pipe = self._client.pipeline()
+        pipe.hdel(self._latest_key, employee_id)
+        pipe.hdel(self._present_key, employee_id)
+        pipe.incr(self._version_key)
+        pipe.execute()
+        if status is not None:
+            self.apply(employee_id, status, timestamp)
+
+    def load(self, rows: Iterable[Tuple[str, str, datetime]], watermark: int = 0):
+        """Replace the shared registry with the latest status per employee."""
+        latest = {}
+        present = {}
+        for employee_id, status, timestamp in rows:
+            latest[employee_id] = _to_seconds(timestamp)
+            if status == 'present':
+                present[employee_id] = latest[employee_id]
+
+        pipe = self._client.pipeline()
+        pipe.delete(self._latest_key, self._present_key)
+        if latest:
+            pipe.hset(self._latest_key, mapping=latest)
+        if present:
+            pipe.hset(self._present_key, mapping=present)
+        pipe.incr(self._version_key)
+        pipe.set(self._loaded_key, 1)
+        pipe.execute()
+        logger.info(f"Shared presence registry loaded: {len(present)} present employees")
+
+    def get_present(self) -> Tuple[str, Dict[str, datetime]]:
+        """
+        Get the present employees.
+
+        Returns:
+            Tuple of (version, {employee_id: present since})
+        """
+        pipe = self._client.pipeline()
+        pipe.get(self._version_key)
+        pipe.hgetall(self._present_key)
+        version, present = pipe.execute()
+        return (
+            f"redis-{int(version or 0)}",
+            {
+                employee_id.decode(): datetime.utcfromtimestamp(float(since))
+                for employee_id, since in present.items()
+            }
+        )
+
+def load_latest_statuses(db) -> List[Tuple[str, str, datetime]]:
+    """
+    Read the latest attendance status of every employee.
+
+    Args:
+        db: Database session
+
+    Returns:
+        (employee_id, status, timestamp) tuples
+    """
+    return [tuple(row) for row in db.execute(LATEST_STATUS_SQL)]
+
+def _presence_due() -> bool:
+    return presence_registry.needs_reload() or presence_registry.needs_sync()
+
+def sync_presence(db):
+    """
+    Load the registry if it is missing or due for a reload, otherwise apply
+    the attendance logs written since its watermark by any process.
+
+    Concurrent callers may both query and apply; applying a log twice is
+    harmless.
+
+    Args:
+        db: Database session
+    """
+    if not presence_registry.needs_reload():
+        logs = db.execute(NEW_LOGS_SQL, {'after_id': presence_registry.watermark, 'limit': SYNC_BATCH_SIZE}).all()
+        if len(logs) < SYNC_BATCH_SIZE:
+            presence_registry.apply_new_logs(logs)
+            return
+
+    watermark = db.execute(MAX_LOG_ID_SQL).scalar()
+    presence_registry.load(load_latest_statuses(db), watermark)
+
+def ensure_presence_loaded(db):
+    """Bring the registry up to date with the database when a load or sync is due."""
+    if _presence_due():
+        sync_presence(db)
+
+async def ensure_presence_loaded_async(db):
+    """ensure_presence_loaded for an AsyncSession."""
+    if _presence_due():
+        await db.run_sync(sync_presence)
+
+def create_presence_registry():
+    """Create the registry for the configured PRESENCE_BACKEND ('memory' or 'redis')."""
+    if settings.PRESENCE_BACKEND == 'redis':
+        if redis is None:
+            logger.warning("PRESENCE_BACKEND is 'redis' but the redis package is not installed; using in-memory registry")
+        else:
+            return RedisPresenceRegistry(settings.REDIS_URL, prefix=settings.PRESENCE_REDIS_PREFIX)
+    return PresenceRegistry()
+
+# Global instance
+presence_registry = create_presence_registry()
@@ -0,0 +1,148 @@
+"""
+Tripwire crossing engine.
+Evaluates which side of each configured tripwire every live track is on and
+emits entry/exit events when a track crosses a line.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.camera_config_loader import TripwireConfig
+
+logger = logging.getLogger(__name__)
+
+# Event type emitted for a crossing in the increasing-coordinate direction,
+# keyed by tripwire detection_type; the opposite direction emits the other one
+FORWARD_EVENT_TYPES = {
+    'entry': ('entry', 'exit'),
+    'exit': ('exit', 'entry'),
+    'counting': ('count', 'count'),
+}
+
+class TripwireEngine:
+    """
+    Vectorized tripwire crossing detection for a single camera.
+
+    Each tripwire is a line at a normalized `position` (0.0 to 1.0): a
+    'horizontal' tripwire is the line y = position, a 'vertical' one is the line
+    x = position. A track is on the positive side when its normalized centre is
+    more than `spacing` past the line, on the negative side when it is more than
+    `spacing` before it, and inside the hysteresis band otherwise. The last
+    confirmed side is kept while a track is inside the band, so jitter around
+    the line does not produce repeated crossings.
+
+    Sides for all tracks against all tripwires are computed as one
+    (tracks x tripwires) array operation per update.
+    """
+
+    def __init__(self, tripwires: Sequence[TripwireConfig]):
+        """
+        Args:
+            tripwires: Tripwire configurations for the camera; inactive ones are ignored
+        """
+        active = [t for t in tripwires if t.is_active]
+
+        self.names: List[str] = [t.name for t in active]
+        self.detection_types: List[str] = [t.detection_type for t in active]
+        self.positions = np.array([t.position for t in active], dtype=np.float32)
+        self.spacings = np.array([t.spacing for t in active], dtype=np.float32)
+        # Coordinate each tripwire is tested against: 0 = x (vertical), 1 = y (horizontal)
+        self.axes = np.array([1 if t.direction == 'horizontal' else 0 for t in active], dtype=np.intp)
+
+        self._forward_events = [FORWARD_EVENT_TYPES.get(t, (t, t))[0] for t in self.detection_types]
+        self._backward_events = [FORWARD_EVENT_TYPES.get(t, (t, t))[1] for t in self.detection_types]
+
+        self._lock = threading.Lock()
+        # Last confirmed side per (track, tripwire); rows sorted by track id
+        self._track_ids = np.zeros(0, dtype=np.int64)
+        self._sides = np.zeros((0, len(active)), dtype=np.int8)
+
+    @property
+    def tripwire_count(self) -> int:
+        """Number of active tripwires."""
+        return len(self.names)
+
+    def compute_sides(self, centers: np.ndarray) -> np.ndarray:
+        """
+        Compute line sides for all centres against all tripwires.
+
+        Args:
+            centers: Normalized (x, y) centres of shape (T, 2)
+
+        Returns:
+            int8 array of shape (T, W): +1 past the line, -1 before it, 0 inside the band
+        """
+        offsets = centers[:, self.axes] - self.positions[None, :]
+        sides = np.sign(offsets).astype(np.int8)
+        sides[np.abs(offsets) <= self.spacings[None, :]] = 0
+        return sides
+
+    def update(self, track_ids: np.ndarray, boxes: np.ndarray,
+               frame_size: Tuple[int, int],
+               employee_ids: Optional[Sequence[Optional[str]]] = None) -> List[Dict]:
+        """
+        Update track sides and return crossing events.
+
+        Tracks not passed to an update are considered gone and their state is
+        dropped, so callers should pass every live track, not only the ones
+        detected in the current frame.
+
+        Args:
+            track_ids: Live track ids, shape (T,)
+            boxes: Track boxes (x1, y1, x2, y2) in pixels, shape (T, 4)
+            frame_size: Frame (width, height) in pixels
+            employee_ids: Identity of each track, if known
+
+        Returns:
+            List of crossing events with track_id, employee_id, tripwire,
+            event_type and direction ('forward' is towards increasing x or y)
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        if not self.tripwire_count or not len(track_ids):
+            self.reset()
+            return []
+
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        width, height = frame_size
+        centers = np.empty((len(track_ids), 2), dtype=np.float32)
+        centers[:, 0] = (boxes[:, 0] + boxes[:, 2]) / (2.0 * width)
+        centers[:, 1] = (boxes[:, 1] + boxes[:, 3]) / (2.0 * height)
+
+        current = self.compute_sides(centers)
+
+        with self._lock:
+            # Look up each track's previous sides; new tracks start on their current side
+            previous = current.copy()
+            if len(self._track_ids):
+                rows = np.searchsorted(self._track_ids, track_ids).clip(max=len(self._track_ids) - 1)
+                known = self._track_ids[rows] == track_ids
+                previous[known] = self._sides[rows[known]]
+
+            crossed = (current != 0) & (previous != 0) & (current != previous)
+            confirmed = np.where(current != 0, current, previous)
+
+            order = np.argsort(track_ids)
+            self._track_ids = track_ids[order]
+            self._sides = confirmed[order]
+
+        events = []
+        for track_index, wire_index in zip(*np.nonzero(crossed)):
+            forward = current[track_index, wire_index] > 0
+            events.append({
+                'track_id': int(track_ids[track_index]),
+                'employee_id': employee_ids[track_index] if employee_ids is not None else None,
+                'tripwire': self.names[wire_index],
+                'event_type': (self._forward_events if forward else self._backward_events)[wire_index],
+                'direction': 'forward' if forward else 'backward'
+            })
+
+        return events
+
+    def reset(self):
+        """Forget all track sides."""
+        with self._lock:
+            self._track_ids = np.zeros(0, dtype=np.int64)
+            self._sides = np.zeros((0, self.tripwire_count), dtype=np.int8)
@@ -0,0 +1,145 @@
+"""
+SQL-side attendance analytics.
+Per-employee, per-day first-in, last-out, in-building time and lateness,
+computed in one query with window functions.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Logs without an explicit event type (manual marks) count as entry when
+# present and exit when absent. Consecutive events of the same type collapse
+# to the first one, then each entry is paired with the next exit on the same
+# local day.
+DAILY_ANALYTICS_SQL = text("""
+    WITH events AS (
+        SELECT
+            l.employee_id,
+            (l.timestamp AT TIME ZONE 'UTC') AT TIME ZONE :tz AS local_ts,
+            CASE
+                WHEN l.event_type IN ('entry', 'exit') THEN l.event_type
+                WHEN l.status = 'present' THEN 'entry'
+                ELSE 'exit'
+            END AS event_type
+        FROM attendance_logs l
+        WHERE l.timestamp >= :start_ts
+          AND l.timestamp < :end_ts
+          AND (CAST(:employee_id AS VARCHAR) IS NULL OR l.employee_id = :employee_id)
+    ),
+    ordered AS (
+        SELECT
+            employee_id,
+            CAST(local_ts AS DATE) AS work_date,
+            local_ts,
+            event_type,
+            LAG(event_type) OVER (
+                PARTITION BY employee_id, CAST(local_ts AS DATE) ORDER BY local_ts
+            ) AS prev_type
+        FROM events
+    ),
+    transitions AS (
+        SELECT
+            employee_id,
+            work_date,
+            local_ts,
+            event_type,
+            LEAD(event_type) OVER day_window AS next_type,
+            LEAD(local_ts) OVER day_window AS next_ts
+        FROM ordered
+        WHERE prev_type IS DISTINCT FROM event_type
+        WINDOW day_window AS (PARTITION BY employee_id, work_date ORDER BY local_ts)
+    ),
+    intervals AS (
+        SELECT
+            employee_id,
+            work_date,
+            SUM(EXTRACT(EPOCH FROM next_ts - local_ts))
+                FILTER (WHERE event_type = 'entry' AND next_type = 'exit') AS in_building_seconds,
+            BOOL_OR(event_type = 'entry' AND next_type IS NULL) AS still_inside
+        FROM transitions
+        GROUP BY employee_id, work_date
+    ),
+    daily AS (
+        SELECT
+            employee_id,
+            work_date,
+            MIN(local_ts) FILTER (WHERE event_type = 'entry') AS first_in,
+            MAX(local_ts) FILTER (WHERE event_type = 'exit') AS last_out,
+            COUNT(*) AS event_count
+        FROM ordered
+        GROUP BY employee_id, work_date
+    )
+    SELECT
+        d.employee_id,
+        e.name AS employee_name,
+        d.work_date,
+        d.first_in,
+        d.last_out,
+        ROUND(CAST(COALESCE(i.in_building_seconds, 0) / 3600.0 AS NUMERIC), 2) AS hours_in_building,
+        COALESCE(i.still_inside, FALSE) AS still_inside,
+        d.event_count,
+        COALESCE(
+            d.first_in > d.work_date + CAST(:work_day_start AS TIME) + make_interval(mins => :grace_minutes),
+            FALSE
+        ) AS is_late,
+        CASE
+            WHEN d.first_in > d.work_date + CAST(:work_day_start AS TIME) + make_interval(mins => :grace_minutes)
+            THEN CAST(FLOOR(EXTRACT(EPOCH FROM d.first_in - (d.work_date + CAST(:work_day_start AS TIME))) / 60) AS INTEGER)
+            ELSE 0
+        END AS minutes_late
+    FROM daily d
+    JOIN intervals i ON i.employee_id = d.employee_id AND i.work_date = d.work_date
+    JOIN employees e ON e.employee_id = d.employee_id
+    ORDER BY d.work_date, d.employee_id
+""")
+
+def _local_midnight_utc(day: date, tz: ZoneInfo) -> datetime:
+    """Naive UTC datetime of local midnight at the start of day."""
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+
+def get_daily_attendance_analytics(session: Session,
+                                   start_date: date,
+                                   end_date: date,
+                                   employee_id: Optional[str] = None,
+                                   work_day_start: str = "09:00",
+                                   grace_minutes: int = 0,
+                                   tz_name: str = "UTC") -> List[Dict]:
+    """
+    Compute per-employee, per-day attendance analytics.
+
+    Days are local days in tz_name, and first-in/last-out are local
+    wall-clock times. In-building time only counts entry-to-exit pairs on
+    the same day, so a session spanning midnight is reported as still inside
+    on its first day.
+
+    Args:
+        session: Database session
+        start_date: First local day
+        end_date: Last local day (inclusive)
+        employee_id: Restrict to one employee
+        work_day_start: Scheduled start time (HH:MM) used for lateness
+        grace_minutes: Minutes after the start before an arrival counts as late
+        tz_name: IANA time zone of the schedule
+
+    Returns:
+        One dict per employee and day with first_in, last_out,
+        hours_in_building, still_inside, event_count, is_late and minutes_late
+    """
+    tz = ZoneInfo(tz_name)
+    rows = session.execute(DAILY_ANALYTICS_SQL, {
+        'tz': tz_name,
+        'start_ts': _local_midnight_utc(start_date, tz),
+        'end_ts': _local_midnight_utc(end_date + timedelta(days=1), tz),
+        'employee_id': employee_id,
+        'work_day_start': work_day_start,
+        'grace_minutes': grace_minutes
+    }).mappings().all()
+
+    return [
+        {**row, 'hours_in_building': float(row['hours_in_building'])}
+        for row in rows
+    ]
@@ -0,0 +1,85 @@
+"""
+Attendance event inserts shared by the batched writer and DatabaseManager.
+Both paths write with the same idempotent statement, and after commit hand
+the inserted rows to the same listeners (presence, session pairing, caches).
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from .attendance_summary import upsert_daily_summary
+from .db_models import AttendanceLog
+
+logger = logging.getLogger(__name__)
+
+# Attendance status implied by a camera-recorded event type
+EVENT_TYPE_STATUS = {
+    'entry': 'present',
+    'exit': 'absent'
+}
+
+def insert_attendance_logs(session: Session, rows: List[Dict]) -> List[Row]:
+    """
+    Insert attendance logs with one multi-row INSERT, skipping event keys that
+    already exist, and fold the inserted rows into the daily summary.
+
+    Runs in the caller's transaction; the caller commits and then notifies
+    attendance_listeners with the returned rows.
+
+    Args:
+        session: Session to insert with
+        rows: AttendanceLog column values; event_key should be set so replays are skipped
+
+    Returns:
+        Rows with employee_id, timestamp, status, event_type and camera_id of
+        the logs actually inserted
+    """
+    if not rows:
+        return []
+    result = session.execute(
+        insert(AttendanceLog)
+        .on_conflict_do_nothing(constraint='uq_attendance_logs_event_key')
+        .returning(AttendanceLog.employee_id, AttendanceLog.timestamp, AttendanceLog.status,
+                   AttendanceLog.event_type, AttendanceLog.camera_id),
+        rows
+    )
+    inserted_rows = result.all()
+    upsert_daily_summary(session, status_tuples(inserted_rows))
+    return inserted_rows
+
+def status_tuples(rows: Sequence[Row]) -> List[Tuple[str, datetime, str]]:
+    """(employee_id, timestamp, status) of inserted rows, as the summary and presence registry take them."""
+    return [(row.employee_id, row.timestamp, row.status) for row in rows]
+
+class AttendanceListeners:
+    """Callbacks run with the rows of every committed attendance insert."""
+
+    def __init__(self):
+        self._listeners: List[Callable[[List[Row]], None]] = []
+
+    def add(self, callback: Callable[[List[Row]], None]):
+        """
+        Register a callback.
+
+        Args:
+            callback: Called with the rows returned by insert_attendance_logs
+        """
+        self._listeners.append(callback)
+
+    def notify(self, rows: List[Row]):
+        """Run every callback with committed rows; a failing callback is logged and skipped."""
+        if not rows:
+            return
+        for callback in self._listeners:
+            try:
+                callback(rows)
+            except Exception as e:
+                logger.error(f"Attendance listener failed: {e}")
+
+# Global instance
+attendance_listeners = AttendanceListeners()
@@ -0,0 +1,255 @@
+"""
+Attendance write-ahead journal.
+Append-only local log of attendance events, so events survive database
+outages and process restarts until they have been committed to Postgres.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (segment sequence number, byte offset just past a record)
+JournalPosition = Tuple[int, int]
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class AttendanceJournal:
+    """
+    Append-only, segmented JSON-lines journal with batched fsync.
+
+    Records are appended to the current segment file and fsynced in groups:
+    once fsync_batch records are pending or fsync_interval seconds have passed
+    since the last sync. Segments roll over at segment_max_bytes. A checkpoint
+    file records the position up to which records have been committed to the
+    database; segments entirely before it are deleted and everything after it
+    is replayed on startup.
+    """
+
+    SEGMENT_PREFIX = "attendance-"
+    SEGMENT_SUFFIX = ".jsonl"
+    CHECKPOINT_FILE = "checkpoint.json"
+
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 fsync_interval: float = 0.05, fsync_batch: int = 64):
+        """
+        Args:
+            directory: Directory holding segment and checkpoint files
+            segment_max_bytes: Segment size after which a new segment is started
+            fsync_interval: Maximum seconds between fsyncs while records are pending
+            fsync_batch: Number of pending records that forces an fsync
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_seq = 0
+        self._checkpoint: JournalPosition = (0, 0)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.stats = {'appended': 0, 'syncs': 0, 'corrupt_records': 0, 'segments_deleted': 0}
+
+    def open(self):
+        """Open the journal, creating the directory and first segment if needed."""
+        with self._lock:
+            if self._file is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._checkpoint = self._load_checkpoint()
+
+            segments = self._list_segments()
+            self._segment_seq = max(segments[-1] if segments else 0, self._checkpoint[0])
+            self._file = open(self._segment_path(self._segment_seq), 'ab')
+
+            # Terminate a record torn by a crash so the next append starts on a new line
+            size = self._file.tell()
+            if size:
+                with open(self._segment_path(self._segment_seq), 'rb') as f:
+                    f.seek(size - 1)
+                    if f.read(1) != b'\n':
+                        self._file.write(b'\n')
+                        self._file.flush()
+
+            logger.info(f"Attendance journal opened at {self.directory}, checkpoint {self._checkpoint}")
+
+    def close(self):
+        """Sync and close the current segment."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._sync_locked()
+            self._file.close()
+            self._file = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    @property
+    def checkpoint(self) -> JournalPosition:
+        """Position up to which records are committed to the database."""
+        with self._lock:
+            return self._checkpoint
+
+    @property
+    def end_position(self) -> JournalPosition:
+        """Position just past the last appended record."""
+        with self._lock:
+            return (self._segment_seq, self._file.tell())
+
+    def append(self, record: Dict) -> JournalPosition:
+        """
+        Append a record, fsyncing once enough records are pending.
+
+        Args:
+            record: JSON-serializable record (datetimes are stored as ISO strings)
+
+        Returns:
+            Journal position just past the record
+        """
+        line = (json.dumps(record, default=_json_default, separators=(',', ':')) + '\n').encode('utf-8')
+
+        with self._lock:
+            if self._file.tell() and self._file.tell() + len(line) > self.segment_max_bytes:
+                self._rotate_locked()
+
+            self._file.write(line)
+            position = (self._segment_seq, self._file.tell())
+            self._pending += 1
+            self.stats['appended'] += 1
+
+            if (self._pending >= self.fsync_batch
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+        return position
+
+    def sync(self):
+        """Fsync pending records."""
+        with self._lock:
+            if self._pending:
+                self._sync_locked()
+
+    def read_from(self, position: JournalPosition, limit: int) -> List[Tuple[JournalPosition, Dict]]:
+        """
+        Read records after a position.
+
+        Args:
+            position: Position to read from
+            limit: Maximum number of records
+
+        Returns:
+            List of (position just past the record, record) in journal order
+        """
+        with self._lock:
+            # Make buffered appends visible to the reader
+            self._file.flush()
+            current_seq = self._segment_seq
+            segments = [seq for seq in self._list_segments() if seq >= position[0]]
+
+        records = []
+        for seq in segments:
+            offset = position[1] if seq == position[0] else 0
+            try:
+                with open(self._segment_path(seq), 'rb') as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b'\n') and seq == current_seq:
+                            # Partially written record at the end of the live segment
+                            break
+                        offset += len(line)
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            self.stats['corrupt_records'] += 1
+                            logger.warning(f"Skipping corrupt journal record in segment {seq}")
+                            continue
+                        records.append(((seq, offset), record))
+                        if len(records) >= limit:
+                            return records
+            except FileNotFoundError:
+                continue
+
+        return records
+
+    def commit(self, position: JournalPosition):
+        """
+        Record that everything up to a position is in the database.
+
+        Writes the checkpoint atomically and deletes segments before it.
+        """
+        with self._lock:
+            if position <= self._checkpoint:
+                return
+            self._checkpoint = position
+
+            checkpoint_path = os.path.join(self.directory, self.CHECKPOINT_FILE)
+            tmp_path = checkpoint_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'segment': position[0], 'offset': position[1]}, f)
+            os.replace(tmp_path, checkpoint_path)
+
+            for seq in self._list_segments():
+                if seq >= position[0]:
+                    break
+                try:
+                    os.remove(self._segment_path(seq))
+                    self.stats['segments_deleted'] += 1
+                except OSError as e:
+                    logger.warning(f"Failed to delete journal segment {seq}: {e}")
+
+    def pending_segments(self) -> int:
+        """Number of segment files on disk."""
+        return len(self._list_segments())
+
+    def _sync_locked(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.stats['syncs'] += 1
+
+    def _rotate_locked(self):
+        self._sync_locked()
+        self._file.close()
+        self._segment_seq += 1
+        self._file = open(self._segment_path(self._segment_seq), 'ab')
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{self.SEGMENT_PREFIX}{seq:012d}{self.SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(segments)
+
+    def _load_checkpoint(self) -> JournalPosition:
+        checkpoint_path = os.path.join(self.directory, self.CHECKPOINT_FILE)
+        try:
+            with open(checkpoint_path) as f:
+                data = json.load(f)
+            return (int(data['segment']), int(data['offset']))
+        except FileNotFoundError:
+            return (0, 0)
+        except (ValueError, KeyError) as e:
+            # Replaying from the start is safe: inserts are deduplicated by event key
+            logger.warning(f"Invalid journal checkpoint, replaying from the start: {e}")
+            return (0, 0)
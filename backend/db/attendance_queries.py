@@ -0,0 +1,137 @@
+"""
+Attendance read queries shared by the listing, streaming and export endpoints.
+"""
+
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import Select, case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from .db_models import AttendanceLog, Employee
+
+# Columns returned for each attendance row, joined with the employee
+ATTENDANCE_ROW_COLUMNS = (
+    AttendanceLog.id,
+    AttendanceLog.employee_id,
+    Employee.name.label('employee_name'),
+    Employee.department,
+    AttendanceLog.timestamp,
+    AttendanceLog.status,
+    AttendanceLog.event_type,
+    AttendanceLog.camera_id,
+    AttendanceLog.confidence_score,
+    AttendanceLog.notes,
+    AttendanceLog.created_at,
+)
+
+def encode_cursor(timestamp: datetime, log_id: int) -> str:
+    """Opaque keyset cursor for the row (timestamp, id)."""
+    raw = json.dumps([timestamp.isoformat(), log_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a keyset cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, log_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def build_attendance_query(start_date: Optional[date] = None,
+                           end_date: Optional[date] = None,
+                           employee_id: Optional[str] = None,
+                           after: Optional[Tuple[datetime, int]] = None) -> Select:
+    """
+    Build the attendance-with-employee query, newest first.
+
+    Rows are ordered by (timestamp DESC, id DESC), which is a total order, so
+    `after` can resume from the last row of a previous page without OFFSET.
+
+    Args:
+        start_date: First day to include
+        end_date: Last day to include
+        employee_id: Restrict to one employee
+        after: (timestamp, id) of the last row already returned
+
+    Returns:
+        SQLAlchemy select of ATTENDANCE_ROW_COLUMNS
+    """
+    stmt = select(*ATTENDANCE_ROW_COLUMNS).join(
+        Employee, Employee.employee_id == AttendanceLog.employee_id
+    )
+
+    if employee_id:
+        stmt = stmt.where(AttendanceLog.employee_id == employee_id)
+    if start_date:
+        stmt = stmt.where(AttendanceLog.timestamp >= datetime.combine(start_date, time.min))
+    if end_date:
+        stmt = stmt.where(AttendanceLog.timestamp <= datetime.combine(end_date, time.max))
+    if after is not None:
+        # Row comparison so Postgres can seek the (timestamp DESC, id DESC) index
+        stmt = stmt.where(tuple_(AttendanceLog.timestamp, AttendanceLog.id) < tuple_(*after))
+
+    return stmt.order_by(AttendanceLog.timestamp.desc(), AttendanceLog.id.desc())
+
+def build_session_events_query(target_date: date, max_session: timedelta,
+                               employee_id: Optional[str] = None) -> Select:
+    """
+    Build the query for the logs that can open or close a session starting on a day.
+
+    Covers max_session before the day (sessions still open at midnight) and
+    after it (exits of sessions started late in the day). Manual marks have
+    no event type; their status stands in, 'present' as an entry and
+    'absent' as an exit.
+
+    Args:
+        target_date: Check-in date of the sessions
+        max_session: Longest session before it is closed as incomplete
+        employee_id: Restrict to one employee
+
+    Returns:
+        SQLAlchemy select of (employee_id, event_type, camera_id, timestamp), oldest first
+    """
+    day_start = datetime.combine(target_date, time.min)
+    event_type = func.coalesce(
+        AttendanceLog.event_type,
+        case((AttendanceLog.status == 'present', 'entry'), else_='exit')
+    )
+    stmt = select(
+        AttendanceLog.employee_id,
+        event_type.label('event_type'),
+        AttendanceLog.camera_id,
+        AttendanceLog.timestamp
+    ).where(
+        AttendanceLog.timestamp >= day_start - max_session,
+        AttendanceLog.timestamp < day_start + timedelta(days=1) + max_session
+    )
+    if employee_id:
+        stmt = stmt.where(AttendanceLog.employee_id == employee_id)
+    return stmt.order_by(AttendanceLog.timestamp, AttendanceLog.id)
+
+def stream_attendance_rows(session: Session, stmt: Select, chunk_size: int = 1000) -> Iterator[Dict]:
+    """
+    Iterate query rows through a server-side cursor.
+
+    Only chunk_size rows are held in memory at a time, regardless of how many
+    rows the query returns.
+
+    Args:
+        session: Session dedicated to the stream
+        stmt: Query from build_attendance_query
+        chunk_size: Rows fetched per round trip
+
+    Yields:
+        Row mappings
+    """
+    result = session.execute(stmt.execution_options(yield_per=chunk_size))
+    for row in result.mappings():
+        yield row
@@ -0,0 +1,155 @@
+"""
+Daily attendance summary maintenance.
+Keeps daily_attendance_summary in step with attendance_logs: incremental
+upserts as logs are written, and rebuilds from the raw logs for corrections
+and backfills.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, case, cast, delete, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .db_models import AttendanceLog, DailyAttendanceSummary
+
+logger = logging.getLogger(__name__)
+
+# Incremental upserts take this lock shared and rebuilds take it exclusive.
+# A rebuild therefore never runs between a writer's log insert and its
+# summary upsert: either it sees the writer's committed logs, or the writer
+# adds its counts on top of the rebuilt rows.
+_SUMMARY_LOCK_KEY = 0x7375_6d6d
+
+def aggregate_daily(logs: Iterable[Tuple[str, datetime, str]]) -> List[Dict]:
+    """
+    Roll attendance logs up into per-employee, per-day summary rows.
+
+    Args:
+        logs: (employee_id, timestamp, status) tuples
+
+    Returns:
+        Summary rows sorted by (employee_id, work_date)
+    """
+    summaries: Dict[Tuple[str, date], Dict] = {}
+    for employee_id, timestamp, status in logs:
+        key = (employee_id, timestamp.date())
+        summary = summaries.get(key)
+        if summary is None:
+            summaries[key] = {
+                'employee_id': employee_id,
+                'work_date': key[1],
+                'first_seen': timestamp,
+                'last_seen': timestamp,
+                'status': status,
+                'event_count': 1
+            }
+            continue
+        summary['first_seen'] = min(summary['first_seen'], timestamp)
+        summary['last_seen'] = max(summary['last_seen'], timestamp)
+        if status == 'present':
+            summary['status'] = 'present'
+        summary['event_count'] += 1
+
+    # Consistent row order keeps concurrent upserts from deadlocking
+    return [summaries[key] for key in sorted(summaries)]
+
+def upsert_daily_summary(session: Session, logs: Iterable[Tuple[str, datetime, str]]) -> int:
+    """
+    Fold newly inserted logs into the summary within the caller's transaction.
+
+    Only pass logs that were actually inserted, or event counts will drift.
+
+    Args:
+        session: Session whose transaction inserted the logs
+        logs: (employee_id, timestamp, status) tuples
+
+    Returns:
+        Number of summary rows touched
+    """
+    rows = aggregate_daily(logs)
+    if not rows:
+        return 0
+
+    session.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {'key': _SUMMARY_LOCK_KEY})
+
+    table = DailyAttendanceSummary.__table__
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.employee_id, table.c.work_date],
+        set_={
+            'first_seen': func.least(table.c.first_seen, stmt.excluded.first_seen),
+            'last_seen': func.greatest(table.c.last_seen, stmt.excluded.last_seen),
+            'status': case(
+                (or_(table.c.status == 'present', stmt.excluded.status == 'present'), 'present'),
+                else_='absent'
+            ),
+            'event_count': table.c.event_count + stmt.excluded.event_count,
+            'updated_at': func.now()
+        }
+    )
+    session.execute(stmt)
+    return len(rows)
+
+def rebuild_daily_summary(session: Session, start_date: date, end_date: date,
+                          employee_id: Optional[str] = None) -> int:
+    """
+    Recompute summary rows from attendance_logs for a date range.
+
+    Used after logs are edited or deleted and for backfills. Runs in the
+    caller's transaction and holds off incremental upserts until it commits.
+
+    Args:
+        session: Database session
+        start_date: First day to rebuild
+        end_date: Last day to rebuild (inclusive)
+        employee_id: Restrict to one employee
+
+    Returns:
+        Number of summary rows written
+    """
+    summary = DailyAttendanceSummary.__table__
+    logs = AttendanceLog.__table__
+
+    session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': _SUMMARY_LOCK_KEY})
+
+    delete_stmt = delete(summary).where(summary.c.work_date.between(start_date, end_date))
+    log_filter = and_(
+        logs.c.timestamp >= datetime.combine(start_date, time.min),
+        logs.c.timestamp < datetime.combine(end_date + timedelta(days=1), time.min)
+    )
+    if employee_id is not None:
+        delete_stmt = delete_stmt.where(summary.c.employee_id == employee_id)
+        log_filter = and_(log_filter, logs.c.employee_id == employee_id)
+    session.execute(delete_stmt)
+
+    work_date = cast(logs.c.timestamp, Date)
+    aggregated = select(
+        logs.c.employee_id,
+        work_date,
+        func.min(logs.c.timestamp),
+        func.max(logs.c.timestamp),
+        case((func.bool_or(logs.c.status == 'present'), 'present'), else_='absent'),
+        func.count(),
+        func.now()
+    ).where(log_filter).group_by(logs.c.employee_id, work_date)
+
+    stmt = insert(summary).from_select(
+        ['employee_id', 'work_date', 'first_seen', 'last_seen', 'status', 'event_count', 'updated_at'],
+        aggregated
+    )
+    # Rows recomputed from the logs win over anything written since the delete
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[summary.c.employee_id, summary.c.work_date],
+        set_={
+            'first_seen': stmt.excluded.first_seen,
+            'last_seen': stmt.excluded.last_seen,
+            'status': stmt.excluded.status,
+            'event_count': stmt.excluded.event_count,
+            'updated_at': stmt.excluded.updated_at
+        }
+    )
+    result = session.execute(stmt)
+    return result.rowcount
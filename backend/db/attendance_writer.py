@@ -0,0 +1,474 @@
+"""
+Batched attendance writer.
+Decouples attendance ingest from the database: producers enqueue events
+without blocking and a background flusher writes them in multi-row inserts.
+With a journal, every event is appended to a local write-ahead log first,
+so events survive database outages and restarts.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, OperationalError
+
+from app.config import settings
+from .attendance_journal import AttendanceJournal, JournalPosition
+from .attendance_events import EVENT_TYPE_STATUS, attendance_listeners, insert_attendance_logs
+from .db_config import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Queue item: (monotonic enqueue time or None for replayed events, journal position, row)
+_QueueItem = Tuple[Optional[float], Optional[JournalPosition], Dict]
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed write may succeed if retried (the database or connection was unavailable)."""
+    if isinstance(error, OperationalError):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+class AttendanceWriter:
+    """
+    Attendance sink with a bounded in-memory queue and a background flusher.
+
+    Events are flushed as one multi-row INSERT when batch_size events are
+    queued or flush_interval seconds have passed since the first event of the
+    batch, whichever comes first. Batches that fail on a transient database
+    error are retried with exponential backoff. Every row carries an event
+    key and inserts skip keys that already exist, so a batch retried after an
+    ambiguous failure is written once. Rows the database rejects are written
+    to a dead-letter file instead of being retried.
+
+    When a journal is configured, events are appended to it before they are
+    queued and the journal checkpoint advances as batches commit. If the
+    queue is full, or on startup, the writer switches to catch-up mode: new
+    events only go to the journal and the flusher reads them back from the
+    checkpoint until it reaches the end, so nothing is dropped. Without a
+    journal, events that do not fit in the queue are dropped and counted.
+    """
+
+    def __init__(self,
+                 session_factory=SessionLocal,
+                 journal: Optional[AttendanceJournal] = None,
+                 max_queue_size: int = 10000,
+                 batch_size: int = 500,
+                 flush_interval: float = 1.0,
+                 retry_max_delay: float = 30.0,
+                 dead_letter_path: Optional[str] = None):
+        """
+        Args:
+            session_factory: SQLAlchemy session factory
+            journal: Write-ahead journal; None keeps events in memory only
+            max_queue_size: Maximum number of queued events
+            batch_size: Maximum events per INSERT
+            flush_interval: Maximum seconds an event waits before its batch is flushed
+            retry_max_delay: Upper bound of the retry backoff in seconds
+            dead_letter_path: JSON-lines file for rejected rows; None only logs them
+        """
+        self.Session = session_factory
+        self.journal = journal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_max_delay = retry_max_delay
+        self.dead_letter_path = dead_letter_path
+
+        self._queue: "queue.Queue[_QueueItem]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Serializes journal appends with catch-up mode changes and stopping
+        self._ingest_lock = threading.Lock()
+        self._catching_up = False
+        # Set by stop(); enqueue rejects events until start() is called again
+        self._stopped = False
+        # Journal position of the last event handed to a batch
+        self._read_position: Optional[JournalPosition] = None
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'enqueued': 0,
+            'dropped': 0,
+            'rejected': 0,
+            'journal_only': 0,
+            'replayed': 0,
+            'written': 0,
+            'duplicates': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'retries': 0,
+            'dead_lettered': 0,
+            'last_flush_latency_ms': 0.0,
+            'max_flush_latency_ms': 0.0,
+            'total_flush_latency_ms': 0.0,
+            'max_event_latency_ms': 0.0
+        }
+        # (monotonic time, events written) per flush, for recent throughput
+        self._recent_flushes = deque(maxlen=120)
+
+    def start(self):
+        """Start the background flusher thread, replaying uncommitted journal events first."""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            if self.journal is not None:
+                self.journal.open()
+                with self._ingest_lock:
+                    # Everything after the checkpoint is re-read from the journal
+                    self._drain_queue()
+                    self._read_position = self.journal.checkpoint
+                    self._catching_up = True
+
+            self._stop_event.clear()
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run,
+                daemon=True,
+                name="attendance_writer"
+            )
+            self._thread.start()
+            logger.info("Attendance writer started")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after draining queued events; later events are rejected."""
+        with self._ingest_lock:
+            self._stopped = True
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self.journal is not None:
+            self.journal.close()
+        logger.info("Attendance writer stopped")
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, employee_id: str, camera_id: Optional[int], event_type: str,
+                confidence_score: float = 0.0, timestamp: datetime = None, notes: str = None) -> bool:
+        """
+        Record an attendance event without waiting for the database.
+
+        Args:
+            employee_id: Employee identifier
+            camera_id: Camera that recorded the event
+            event_type: 'entry' or 'exit'
+            confidence_score: Recognition confidence
+            timestamp: Event time (naive UTC); defaults to now
+            notes: Optional notes
+
+        Returns:
+            True if the event was accepted, False if it was dropped or the
+            writer has been stopped
+        """
+        if not self.is_running and not self._stopped:
+            self.start()
+
+        row = {
+            'employee_id': employee_id,
+            'camera_id': camera_id,
+            'event_type': event_type,
+            'status': EVENT_TYPE_STATUS.get(event_type, 'present'),
+            'confidence_score': confidence_score,
+            'timestamp': timestamp or datetime.utcnow(),
+            'notes': notes,
+            'event_key': uuid.uuid4().hex
+        }
+
+        with self._ingest_lock:
+            if self._stopped:
+                self._increment('rejected')
+                logger.warning(f"Attendance writer is stopped, rejected {event_type} for {employee_id}")
+                return False
+
+            if self.journal is None:
+                try:
+                    self._queue.put_nowait((time.monotonic(), None, row))
+                except queue.Full:
+                    self._increment('dropped')
+                    logger.warning(f"Attendance queue full, dropped {event_type} for {employee_id}")
+                    return False
+                self._increment('enqueued')
+                return True
+
+            try:
+                position = self.journal.append(row)
+            except OSError as e:
+                logger.error(f"Failed to journal {event_type} for {employee_id}: {e}")
+                self._increment('dropped')
+                return False
+
+            if not self._catching_up:
+                try:
+                    self._queue.put_nowait((time.monotonic(), position, row))
+                except queue.Full:
+                    # The event is durable; the flusher reads it back from the journal
+                    self._catching_up = True
+                    logger.warning("Attendance queue full, reading new events from the journal")
+
+            if self._catching_up:
+                self._increment('journal_only')
+
+        self._increment('enqueued')
+        return True
+
+    def _run(self):
+        """Flusher loop: collect batches by size or time and write them."""
+        while True:
+            batch = self._next_batch()
+            if batch:
+                if not self._write_batch(batch):
+                    # Stopping while the database is unavailable; the journal keeps the rest
+                    break
+            elif self._stop_event.is_set() and self._queue.empty() and not self._catching_up:
+                # Journaled events are written before stopping, like queued ones
+                break
+            elif self.journal is not None:
+                self.journal.sync()
+
+    def _next_batch(self) -> List[_QueueItem]:
+        """Take the next batch from the queue or, in catch-up mode, from the journal."""
+        if self._catching_up and self._queue.empty():
+            batch = self._read_journal()
+            if batch:
+                return batch
+        return self._collect_batch()
+
+    def _read_journal(self) -> List[_QueueItem]:
+        """Read journaled events after the read position; leave catch-up mode at the end."""
+        records = self.journal.read_from(self._read_position, self.batch_size)
+        if not records:
+            with self._ingest_lock:
+                if self.journal.end_position <= self._read_position:
+                    self._catching_up = False
+                    logger.info("Attendance writer caught up with the journal")
+            return []
+
+        batch = []
+        for position, row in records:
+            row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+            batch.append((None, position, row))
+        self._read_position = records[-1][0]
+        self._increment('replayed', len(batch))
+        return batch
+
+    def _collect_batch(self) -> List[_QueueItem]:
+        """Block for the first event, then gather more until the batch is full or due."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop_event.is_set():
+                # Drain without waiting when stopping or past the deadline
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        if batch[-1][1] is not None:
+            self._read_position = batch[-1][1]
+        return batch
+
+    def _write_batch(self, batch: List[_QueueItem]) -> bool:
+        """
+        Write a batch, retrying transient database errors with backoff until it commits.
+
+        Rows the database rejects (integrity or data errors) are isolated by
+        splitting the batch and moved to the dead-letter file, so one bad row
+        cannot hold back the rest of the batch or later events.
+
+        Returns:
+            True once written, False if the writer is stopping and the batch was not written
+        """
+        rows = [row for _, _, row in batch]
+        delay = 0.5
+        start = time.monotonic()
+        while True:
+            rejected: List[Tuple[Dict, str]] = []
+            try:
+                inserted_rows = self._insert_isolating(rows, rejected)
+                break
+            except Exception as e:
+                self._increment('failed_batches')
+                if not _is_transient(e):
+                    # Not a connection problem and not tied to particular rows
+                    logger.error(f"Attendance batch of {len(rows)} events failed permanently: {e}")
+                    inserted_rows, rejected = [], [(row, str(e)) for row in rows]
+                    break
+                logger.error(f"Error writing attendance batch of {len(rows)} events: {e}")
+            if self._stop_event.is_set():
+                logger.warning(f"Attendance writer stopping with {len(batch)} unwritten events")
+                return False
+            self._increment('retries')
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.retry_max_delay)
+
+        if rejected:
+            self._dead_letter(rejected)
+
+        # Rejected rows are in the dead-letter file; the checkpoint moves past them
+        if self.journal is not None and batch[-1][1] is not None:
+            self.journal.commit(batch[-1][1])
+
+        attendance_listeners.notify(inserted_rows)
+
+        inserted = len(inserted_rows)
+        now = time.monotonic()
+        flush_latency_ms = (now - start) * 1000
+        enqueued_at = batch[0][0]
+        with self._metrics_lock:
+            self._metrics['written'] += inserted
+            self._metrics['duplicates'] += len(rows) - inserted - len(rejected)
+            self._metrics['dead_lettered'] += len(rejected)
+            self._metrics['batches'] += 1
+            self._metrics['last_flush_latency_ms'] = flush_latency_ms
+            self._metrics['total_flush_latency_ms'] += flush_latency_ms
+            self._metrics['max_flush_latency_ms'] = max(self._metrics['max_flush_latency_ms'], flush_latency_ms)
+            if enqueued_at is not None:
+                event_latency_ms = (now - enqueued_at) * 1000
+                self._metrics['max_event_latency_ms'] = max(self._metrics['max_event_latency_ms'], event_latency_ms)
+            self._recent_flushes.append((now, inserted))
+        return True
+
+    def _insert_isolating(self, rows: List[Dict], rejected: List[Tuple[Dict, str]]) -> List[Row]:
+        """
+        Insert rows, halving the batch on integrity and data errors until the
+        offending rows are found; those are added to rejected with their error.
+
+        Transient errors are raised. Halves committed before one is retried
+        are skipped on the retry by their event keys.
+
+        Returns:
+            The inserted rows, as returned by insert_attendance_logs
+        """
+        try:
+            return self._insert(rows)
+        except (IntegrityError, DataError) as e:
+            if len(rows) == 1:
+                rejected.append((rows[0], str(e.orig or e)))
+                return []
+        middle = len(rows) // 2
+        return (self._insert_isolating(rows[:middle], rejected)
+                + self._insert_isolating(rows[middle:], rejected))
+
+    def _insert(self, rows: List[Dict]) -> List[Row]:
+        """
+        Write rows with a single multi-row INSERT, skipping existing event keys,
+        and fold the inserted rows into the daily summary in the same transaction.
+        """
+        session = self.Session()
+        try:
+            inserted_rows = insert_attendance_logs(session, rows)
+            session.commit()
+            return inserted_rows
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _dead_letter(self, rejected: List[Tuple[Dict, str]]):
+        """Append rejected rows, with the database error, to the dead-letter file."""
+        for row, error in rejected:
+            logger.error(
+                f"Dead-lettered {row['event_type']} for {row['employee_id']} "
+                f"(event {row['event_key']}): {error}"
+            )
+        if not self.dead_letter_path:
+            return
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.dead_letter_path, 'a') as f:
+                for row, error in rejected:
+                    f.write(json.dumps({
+                        'row': row,
+                        'error': error,
+                        'rejected_at': datetime.utcnow()
+                    }, default=lambda value: value.isoformat()) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write {len(rejected)} attendance events to the dead-letter file: {e}")
+
+    def _drain_queue(self):
+        """Discard queued events; used when they will be re-read from the journal."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _increment(self, name: str, amount: int = 1):
+        with self._metrics_lock:
+            self._metrics[name] += amount
+
+    def get_metrics(self) -> Dict:
+        """
+        Get writer throughput and latency metrics.
+
+        Returns:
+            Dictionary of counters, queue depth, flush latency and recent throughput
+        """
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            recent = list(self._recent_flushes)
+
+        batches = metrics.pop('batches')
+        total_latency = metrics.pop('total_flush_latency_ms')
+        metrics['batches'] = batches
+        metrics['avg_batch_size'] = round(metrics['written'] / batches, 2) if batches else 0.0
+        metrics['avg_flush_latency_ms'] = round(total_latency / batches, 3) if batches else 0.0
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['queue_capacity'] = self._queue.maxsize
+        metrics['is_running'] = self.is_running
+        metrics['catching_up'] = self._catching_up
+
+        # Events per second over the last minute of flushes
+        window_start = time.monotonic() - 60
+        written_recently = sum(count for flushed_at, count in recent if flushed_at >= window_start)
+        metrics['throughput_per_sec'] = round(written_recently / 60, 2)
+
+        if self.journal is not None:
+            metrics['journal'] = dict(self.journal.stats)
+            if self.journal.is_open:
+                metrics['journal']['checkpoint'] = list(self.journal.checkpoint)
+                metrics['journal']['end_position'] = list(self.journal.end_position)
+                metrics['journal']['segments'] = self.journal.pending_segments()
+
+        return metrics
+
+# Global instance used by the camera pipeline
+attendance_writer = AttendanceWriter(
+    journal=AttendanceJournal(
+        settings.ATTENDANCE_JOURNAL_DIR,
+        segment_max_bytes=settings.ATTENDANCE_JOURNAL_SEGMENT_MB * 1024 * 1024,
+        fsync_interval=settings.ATTENDANCE_JOURNAL_FSYNC_INTERVAL,
+        fsync_batch=settings.ATTENDANCE_JOURNAL_FSYNC_BATCH
+    ) if settings.ATTENDANCE_JOURNAL_ENABLED else None,
+    max_queue_size=settings.ATTENDANCE_WRITER_QUEUE_SIZE,
+    batch_size=settings.ATTENDANCE_WRITER_BATCH_SIZE,
+    flush_interval=settings.ATTENDANCE_WRITER_FLUSH_INTERVAL,
+    retry_max_delay=settings.ATTENDANCE_WRITER_RETRY_MAX_SECONDS,
+    dead_letter_path=settings.ATTENDANCE_DEAD_LETTER_FILE
+)
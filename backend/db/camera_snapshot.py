@@ -0,0 +1,171 @@
+"""
+Camera configuration snapshot.
+Every camera is loaded together with its tripwires (selectinload, so one
+query for the cameras and one for all their tripwires) and kept in memory
+until a camera or tripwire write through DatabaseManager invalidates it.
+Each load gets a new version, and diff_snapshots tells consumers which
+cameras changed between two snapshots.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from .db_config import get_api_session
+from .db_models import CameraConfig
+
+logger = logging.getLogger(__name__)
+
+# Columns that make up a camera's configuration, for change detection
+_CAMERA_FIELDS = (
+    'camera_name', 'camera_type', 'ip_address', 'stream_url', 'username', 'password',
+    'resolution_width', 'resolution_height', 'fps', 'gpu_id', 'status', 'is_active',
+    'location_description'
+)
+_TRIPWIRE_FIELDS = ('id', 'name', 'position', 'spacing', 'direction', 'detection_type', 'is_active')
+
+@dataclass(frozen=True)
+class CameraConfigSnapshot:
+    """All camera configurations at one point in time"""
+    version: int
+    # Detached CameraConfig rows by camera_id, tripwires loaded; treat as read-only
+    cameras: Dict[int, CameraConfig]
+    loaded_at: float
+
+    def get(self, camera_id: int) -> Optional[CameraConfig]:
+        return self.cameras.get(camera_id)
+
+@dataclass
+class CameraSnapshotDiff:
+    """Cameras added, removed and changed between two snapshots"""
+    version: int
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+def camera_fingerprint(camera: CameraConfig) -> tuple:
+    """Comparable value of a camera's configuration, tripwires included."""
+    return (
+        tuple(getattr(camera, name) for name in _CAMERA_FIELDS),
+        tuple(sorted(
+            tuple(getattr(tripwire, name) for name in _TRIPWIRE_FIELDS)
+            for tripwire in camera.tripwires
+        ))
+    )
+
+def diff_snapshots(old: Optional[CameraConfigSnapshot], new: CameraConfigSnapshot) -> CameraSnapshotDiff:
+    """
+    Compare two snapshots.
+
+    Args:
+        old: Snapshot last applied, or None if none was (every camera is added)
+        new: Current snapshot
+    """
+    old_cameras = old.cameras if old else {}
+    return CameraSnapshotDiff(
+        version=new.version,
+        added=[camera_id for camera_id in new.cameras if camera_id not in old_cameras],
+        removed=[camera_id for camera_id in old_cameras if camera_id not in new.cameras],
+        changed=[
+            camera_id for camera_id, camera in new.cameras.items()
+            if camera_id in old_cameras and camera_fingerprint(camera) != camera_fingerprint(old_cameras[camera_id])
+        ]
+    )
+
+class CameraConfigCache:
+    """
+    Process-local cache of the camera configuration snapshot.
+
+    Invalidation only marks the snapshot stale; the next reader reloads it.
+    Writes made by other processes are picked up once the snapshot is older
+    than max_age.
+    """
+
+    def __init__(self, session_factory=get_api_session, max_age: float = 60.0):
+        """
+        Args:
+            session_factory: SQLAlchemy session factory; defaults to the API pool,
+                since reloads are mostly triggered by API reads and writes
+            max_age: Seconds a snapshot is served without being reloaded
+        """
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._snapshot: Optional[CameraConfigSnapshot] = None
+        self._stale = True
+        self._loads = 0
+        self._invalidations = 0
+
+    def get_snapshot(self) -> CameraConfigSnapshot:
+        """Current snapshot, reloaded first if it was invalidated or expired."""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        with self._load_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            # An invalidation during the load marks the new snapshot stale again
+            with self._lock:
+                self._stale = False
+            snapshot = CameraConfigSnapshot(
+                version=(snapshot.version if snapshot else 0) + 1,
+                cameras=self._load(),
+                loaded_at=time.time()
+            )
+            with self._lock:
+                self._snapshot = snapshot
+                self._loads += 1
+            logger.info(f"Camera configuration snapshot {snapshot.version}: {len(snapshot.cameras)} cameras")
+            return snapshot
+
+    def invalidate(self):
+        """Reload the snapshot on next use."""
+        with self._lock:
+            self._stale = True
+            self._invalidations += 1
+
+    def get_status(self) -> Dict:
+        """Version, size and load counters for monitoring."""
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'version': snapshot.version if snapshot else 0,
+                'cameras': len(snapshot.cameras) if snapshot else 0,
+                'stale': self._stale,
+                'loads': self._loads,
+                'invalidations': self._invalidations
+            }
+
+    def _is_fresh(self, snapshot: Optional[CameraConfigSnapshot]) -> bool:
+        return (snapshot is not None and not self._stale
+                and time.time() - snapshot.loaded_at < self.max_age)
+
+    def _load(self) -> Dict[int, CameraConfig]:
+        session = self.session_factory()
+        try:
+            cameras = session.scalars(
+                select(CameraConfig)
+                .options(selectinload(CameraConfig.tripwires))
+                .order_by(CameraConfig.camera_id)
+            ).all()
+            # Detach with every attribute loaded; nothing is lazy-loaded later
+            session.expunge_all()
+        finally:
+            session.close()
+        return {camera.camera_id: camera for camera in cameras}
+
+# Global instance
+camera_config_cache = CameraConfigCache(max_age=settings.CAMERA_SNAPSHOT_MAX_AGE_SECONDS)
@@ -1,12 +1,18 @@
+import itertools
 import os
+import threading
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Dict, Generator, List, Optional, Tuple
+
+from app.config import settings
 
 # Import the Base from our models
 from .db_models import Base
+from .pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_telemetry
 
 # Database configuration
 DATABASE_CONFIG = {
@@ -17,34 +23,169 @@ DATABASE_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'password')
 }
 
-DATABASE_URL = f"postgresql://{DATABASE_CONFIG['username']}:{DATABASE_CONFIG['password']}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['database']}"
-
-# Create engine with proper PostgreSQL settings
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False,
-    connect_args={
-        "options": "-c timezone=utc"
+def _database_url(host: str, port: str) -> str:
+    return f"postgresql://{DATABASE_CONFIG['username']}:{DATABASE_CONFIG['password']}@{host}:{port}/{DATABASE_CONFIG['database']}"
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+DATABASE_URL = _database_url(DATABASE_CONFIG['host'], DATABASE_CONFIG['port'])
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+
+# Read replicas as comma-separated host[:port]; same database and credentials as the primary
+REPLICA_DATABASE_URLS = [
+    _database_url(host, port or DATABASE_CONFIG['port'])
+    for host, _, port in (
+        entry.strip().partition(':') for entry in settings.DB_REPLICA_HOSTS.split(',') if entry.strip()
+    )
+]
+
+# Named connection pools, sized independently so one kind of traffic cannot
+# starve another: camera workers and the attendance writer (ingest), API
+# requests (api), and reports and exports (reporting)
+POOL_INGEST = 'ingest'
+POOL_API = 'api'
+POOL_REPORTING = 'reporting'
+
+def _pool_config(name: str) -> dict:
+    """Pool size, overflow and timeout of a named pool from the DB_<NAME>_* settings."""
+    prefix = f"DB_{name.upper()}"
+    return {
+        'pool_size': getattr(settings, f'{prefix}_POOL_SIZE'),
+        'max_overflow': getattr(settings, f'{prefix}_MAX_OVERFLOW'),
+        'pool_timeout': getattr(settings, f'{prefix}_POOL_TIMEOUT')
     }
-)
+
+POOL_CONFIG = {name: _pool_config(name) for name in (POOL_INGEST, POOL_API, POOL_REPORTING)}
+
+class EngineRegistry:
+    """
+    One engine, and so one connection pool, per named pool and database URL.
+
+    Holds the primary and the read replicas. Engines are created on first
+    use and reused by every later caller. Reads routed to replicas are spread
+    round-robin; with no replicas configured they go to the primary, still
+    through their own pool. Every engine reports to pool_telemetry.
+    """
+
+    def __init__(self, primary_url: str, replica_urls: Optional[List[str]] = None):
+        """
+        Args:
+            primary_url: Database URL of the primary, which takes all writes
+            replica_urls: Database URLs of read replicas
+        """
+        self.primary_url = primary_url
+        self.replica_urls = list(replica_urls or [])
+        self._engines: Dict[Tuple[str, str], Engine] = {}
+        self._async_engines: Dict[Tuple[str, str], AsyncEngine] = {}
+        self._lock = threading.Lock()
+        self._replica_cycle = itertools.cycle(self.replica_urls) if self.replica_urls else None
+
+    def get_engine(self, url: Optional[str] = None, pool: str = POOL_INGEST) -> Engine:
+        """Sync engine for a URL (the primary by default) in a named pool."""
+        key = (pool, url or self.primary_url)
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    engine = self._engines[key] = create_engine(
+                        key[1],
+                        poolclass=InstrumentedQueuePool,
+                        pool_pre_ping=True,
+                        pool_recycle=3600,
+                        echo=False,
+                        connect_args={
+                            "options": "-c timezone=utc"
+                        },
+                        **POOL_CONFIG[pool]
+                    )
+                    pool_telemetry.get(pool).attach(engine)
+        return engine
+
+    def get_read_engine(self) -> Engine:
+        """Sync reporting engine of the next read replica."""
+        return self.get_engine(self._next_read_url(), pool=POOL_REPORTING)
+
+    def get_async_engine(self, url: Optional[str] = None, pool: str = POOL_API) -> AsyncEngine:
+        """
+        Async engine for a URL (the primary by default) in a named pool.
+
+        Async engines are only created on first use, so processes that only
+        use sync engines (camera workers, migration scripts) don't need asyncpg.
+        """
+        key = (pool, url or self.primary_url)
+        engine = self._async_engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._async_engines.get(key)
+                if engine is None:
+                    engine = self._async_engines[key] = create_async_engine(
+                        _async_url(key[1]),
+                        poolclass=InstrumentedAsyncQueuePool,
+                        pool_pre_ping=True,
+                        pool_recycle=3600,
+                        echo=False,
+                        connect_args={
+                            "server_settings": {"timezone": "utc"}
+                        },
+                        **POOL_CONFIG[pool]
+                    )
+                    pool_telemetry.get(pool).attach(engine.sync_engine)
+        return engine
+
+    def get_async_read_engine(self) -> AsyncEngine:
+        """Async reporting engine of the next read replica."""
+        return self.get_async_engine(self._next_read_url(), pool=POOL_REPORTING)
+
+    async def dispose_async(self):
+        """Close the pooled connections of every async engine."""
+        with self._lock:
+            engines = list(self._async_engines.values())
+        for engine in engines:
+            await engine.dispose()
+
+    def _next_read_url(self) -> str:
+        if self._replica_cycle is None:
+            return self.primary_url
+        with self._lock:
+            return next(self._replica_cycle)
+
+# Global instance
+engine_registry = EngineRegistry(DATABASE_URL, REPLICA_DATABASE_URLS)
+
+# Primary ingest engine with proper PostgreSQL settings, used by background
+# workers, DatabaseManager and scripts
+engine = engine_registry.get_engine()
 
 # Create sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions are bound per session to the primary or a replica. Objects
+# stay loaded after commit: an expired attribute would need lazy IO, which
+# an AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def get_api_session() -> Session:
+    """Create a session on the primary from the API pool, for work done on behalf of requests"""
+    return SessionLocal(bind=engine_registry.get_engine(pool=POOL_API))
+
+def get_read_session() -> Session:
+    """Create a session on a read replica (the primary when none are configured)"""
+    return SessionLocal(bind=engine_registry.get_read_engine())
+
+def get_async_engine() -> AsyncEngine:
+    """Get the primary async engine, creating it on first use"""
+    return engine_registry.get_async_engine()
+
+async def dispose_async_engine():
+    """Close the async engines' pooled connections"""
+    await engine_registry.dispose_async()
+
 def get_db_session(database_url: str = None) -> Generator:
     """Get database session generator for dependency injection"""
-    if database_url:
-        # Create a new engine for the provided URL
-        temp_engine = create_engine(database_url)
-        temp_session = sessionmaker(autocommit=False, autoflush=False, bind=temp_engine)
-        db = temp_session()
-    else:
-        db = SessionLocal()
+    # Engines are cached per URL, so passing a URL doesn't build a new pool per call
+    db = SessionLocal(bind=engine_registry.get_engine(database_url, pool=POOL_API))
     
     try:
         yield db
@@ -63,14 +204,28 @@ def create_tables():
     try:
         Base.metadata.create_all(bind=engine)
         logging.info("Database tables created successfully")
+        
+        # Partitioned tables need their monthly partitions before rows can be inserted
+        from .partitions import ensure_attendance_partitions
+        ensure_attendance_partitions(engine, months_ahead=settings.ATTENDANCE_PARTITION_MONTHS_AHEAD)
     except Exception as e:
         logging.error(f"Error creating database tables: {e}")
         raise e
 
 def get_db():
     """Get database session for dependency injection"""
-    db = SessionLocal()
+    db = get_api_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session for dependency injection"""
+    async with AsyncSessionLocal(bind=engine_registry.get_async_engine()) as db:
+        yield db
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async read replica session for read-only reports and lists"""
+    async with AsyncSessionLocal(bind=engine_registry.get_async_read_engine()) as db:
+        yield db
\ No newline at end of file
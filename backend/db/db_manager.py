@@ -1,15 +1,169 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from .db_config import SessionLocal
-from .db_models import Employee, FaceEmbedding, AttendanceLog, TrackingRecord, SystemLog, UserAccount, CameraConfig, Tripwire
+from .db_models import Employee, FaceEmbedding, AttendanceLog, DailyAttendanceSummary, TrackingRecord, SystemLog, UserAccount, CameraConfig, Tripwire
+from .embedding_codec import encode_embedding, decode_embedding
+from .embedding_gallery import EmbeddingGallery, load_embedding_gallery
+from .gallery_changes import record_gallery_changes
+from .attendance_events import EVENT_TYPE_STATUS, attendance_listeners, insert_attendance_logs
+from .camera_snapshot import camera_config_cache
+from app.config import settings
+from utils.response_cache import response_cache, TAG_ATTENDANCE, TAG_EMBEDDINGS, TAG_EMPLOYEES
 import numpy as np
-import pickle
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import psycopg2
-from io import BytesIO
 import threading
+import uuid
+
+class UnitOfWork:
+    """
+    Group of database operations sharing one session and one transaction.
+
+    Created by DatabaseManager.batch(), which commits when the block exits
+    normally and rolls back if it raises. Cache invalidation and attendance
+    listeners are deferred until the commit has succeeded. The session does not expire objects on
+    commit, so ORM objects returned from the block keep their loaded
+    attributes after it closes.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._invalidated_tags = set()
+        self._attendance_rows = []
+
+    def invalidate(self, *tags: str):
+        """Invalidate response cache tags once the batch commits."""
+        self._invalidated_tags.update(tags)
+
+    def get_employees_by_ids(self, employee_ids: Iterable[str]) -> Dict[str, Employee]:
+        """Fetch employees in one query, keyed by employee id; unknown ids are omitted."""
+        employee_ids = list(set(employee_ids))
+        if not employee_ids:
+            return {}
+        employees = self.session.query(Employee).filter(Employee.employee_id.in_(employee_ids)).all()
+        return {employee.employee_id: employee for employee in employees}
+
+    def store_face_embedding(self, employee_id: str, embedding: np.ndarray, embedding_type: str,
+                             quality_score: float, source_image_path: str) -> FaceEmbedding:
+        """Store one embedding; see store_face_embeddings."""
+        return self.store_face_embeddings([{
+            'employee_id': employee_id,
+            'embedding': embedding,
+            'embedding_type': embedding_type,
+            'quality_score': quality_score,
+            'source_image_path': source_image_path
+        }])[0]
+
+    def store_face_embeddings(self, records: Iterable[Dict]) -> List[FaceEmbedding]:
+        """
+        Store embeddings with a single flush and one gallery change entry per embedding.
+
+        Args:
+            records: Dicts with employee_id, embedding, embedding_type,
+                quality_score and source_image_path
+
+        Returns:
+            The new FaceEmbedding rows, with ids assigned
+        """
+        embeddings = [
+            FaceEmbedding(
+                employee_id=record['employee_id'],
+                embedding_vector=encode_embedding(record['embedding']),
+                embedding_dim=int(np.size(record['embedding'])),
+                model_version=settings.EMBEDDING_MODEL_VERSION,
+                embedding_type=record.get('embedding_type', 'enroll'),
+                quality_score=float(record['quality_score']),
+                image_path=record['source_image_path'],
+                is_active=True
+            )
+            for record in records
+        ]
+        if not embeddings:
+            return []
+
+        self.session.add_all(embeddings)
+        self.session.flush()
+        record_gallery_changes(self.session, [(e.employee_id, e.id, 'add') for e in embeddings])
+        self.invalidate(TAG_EMBEDDINGS)
+        return embeddings
+
+    def complete_pending_embeddings(self, results: Iterable[Dict], failed_ids: Iterable[int] = ()) -> int:
+        """
+        Fill in embeddings recorded before extraction, adding them to the gallery.
+
+        Rows that were deleted or completed in the meantime are skipped.
+
+        Args:
+            results: Dicts with embedding_id, embedding and quality_score
+            failed_ids: Pending rows whose image yielded no usable face; deactivated
+
+        Returns:
+            Number of embeddings completed
+        """
+        results = {result['embedding_id']: result for result in results}
+        failed_ids = list(failed_ids)
+        if failed_ids:
+            self.session.query(FaceEmbedding).filter(
+                FaceEmbedding.id.in_(failed_ids),
+                FaceEmbedding.model_version.is_(None)
+            ).update({FaceEmbedding.is_active: False}, synchronize_session=False)
+        if not results:
+            return 0
+
+        embeddings = self.session.query(FaceEmbedding).filter(
+            FaceEmbedding.id.in_(list(results)),
+            FaceEmbedding.model_version.is_(None)
+        ).all()
+        for embedding in embeddings:
+            result = results[embedding.id]
+            embedding.embedding_vector = encode_embedding(result['embedding'])
+            embedding.embedding_dim = int(np.size(result['embedding']))
+            embedding.model_version = settings.EMBEDDING_MODEL_VERSION
+            embedding.quality_score = float(result['quality_score'])
+        self.session.flush()
+        record_gallery_changes(self.session, [(e.employee_id, e.id, 'add') for e in embeddings if e.is_active])
+        self.invalidate(TAG_EMBEDDINGS)
+        return len(embeddings)
+
+    def log_attendance_bulk(self, events: Iterable[Dict]) -> int:
+        """
+        Insert attendance logs with one multi-row INSERT and update the daily summary.
+
+        Uses the attendance writer's statement, so events whose event_key was
+        already logged are skipped. The inserted rows are passed to the
+        attendance listeners once the batch commits.
+
+        Args:
+            events: Dicts with employee_id and event_type, and optionally
+                camera_id, confidence_score, timestamp, notes and event_key
+                (generated when missing)
+
+        Returns:
+            Number of logs inserted
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                'employee_id': event['employee_id'],
+                'camera_id': event.get('camera_id'),
+                'event_type': event['event_type'],
+                'status': EVENT_TYPE_STATUS.get(event['event_type'], 'present'),
+                'confidence_score': event.get('confidence_score', 0.0),
+                'timestamp': event.get('timestamp') or now,
+                'notes': event.get('notes'),
+                'event_key': event.get('event_key') or uuid.uuid4().hex
+            }
+            for event in events
+        ]
+        inserted_rows = insert_attendance_logs(self.session, rows)
+        if inserted_rows:
+            self._attendance_rows.extend(inserted_rows)
+            self.invalidate(TAG_ATTENDANCE)
+        return len(inserted_rows)
 
 class DatabaseManager:
     def __init__(self):
@@ -17,6 +171,36 @@ class DatabaseManager:
         self.logger = logging.getLogger(__name__)
         self.Session = SessionLocal  # ✅ Set session factory
 
+    def _cameras_changed(self):
+        """Drop the cached camera configuration snapshot"""
+        camera_config_cache.invalidate()
+
+    @contextmanager
+    def batch(self) -> Iterator[UnitOfWork]:
+        """
+        Run several operations in one transaction.
+
+        Usage:
+            with db_manager.batch() as uow:
+                employees = uow.get_employees_by_ids(ids)
+                uow.store_face_embeddings(records)
+
+        Commits when the block exits normally; rolls back and re-raises otherwise.
+        """
+        session = self.Session(expire_on_commit=False)
+        uow = UnitOfWork(session)
+        try:
+            yield uow
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        if uow._invalidated_tags:
+            response_cache.invalidate(*uow._invalidated_tags)
+        attendance_listeners.notify(uow._attendance_rows)
+
     def create_employee(self, employee_id: str, employee_name: str, department: str = None, designation: str = None, email: str = None, phone: str = None) -> bool:
         session = None
         try:
@@ -33,6 +217,7 @@ class DatabaseManager:
                 phone=phone)
             session.add(employee)
             session.commit()
+            response_cache.invalidate(TAG_EMPLOYEES)
             return True
         except Exception as e:
             if session:
@@ -55,6 +240,15 @@ class DatabaseManager:
             if session:
                 session.close()
 
+    def get_employees_by_ids(self, employee_ids: Iterable[str]) -> Dict[str, Employee]:
+        """Fetch many employees in one query, keyed by employee id."""
+        try:
+            with self.batch() as uow:
+                return uow.get_employees_by_ids(employee_ids)
+        except Exception as e:
+            self.logger.error(f"Error getting employees by ids: {e}")
+            return {}
+
     def get_all_employees(self) -> List[Employee]:
         session = None
         try:
@@ -68,44 +262,83 @@ class DatabaseManager:
                 session.close()
 
     def store_face_embedding(self, employee_id, embedding, embedding_type, quality_score, source_image_path):
-        session = None
         try:
-            session = self.Session()
-
-            # Serialize embedding to bytes
-            out = BytesIO()
-            np.save(out, embedding.astype(np.float32))
-            out.seek(0)
-            binary_embedding = out.read()
-
-            new_embedding = FaceEmbedding(
-                employee_id=employee_id,
-                embedding_data=binary_embedding,
-                embedding_type=embedding_type,
-                quality_score=float(quality_score),
-                source_image_path=source_image_path,
-                is_active=True
-            )
-            session.add(new_embedding)
-            session.commit()
+            with self.batch() as uow:
+                uow.store_face_embedding(employee_id, embedding, embedding_type, quality_score, source_image_path)
             print(f"[DB] Stored embedding for {employee_id}")
             return True
-
         except Exception as e:
-            if session:
-                session.rollback()
             print(f"[DB] Error storing embedding for {employee_id}: {e}")
             return False
 
+    def store_face_embeddings_bulk(self, records: List[Dict]) -> int:
+        """
+        Store many embeddings in one transaction; all or none are stored.
+
+        Args:
+            records: Dicts as accepted by UnitOfWork.store_face_embeddings
+
+        Returns:
+            Number of embeddings stored (0 on failure)
+        """
+        try:
+            with self.batch() as uow:
+                stored = len(uow.store_face_embeddings(records))
+            return stored
+        except Exception as e:
+            self.logger.error(f"Error storing {len(records)} embeddings: {e}")
+            return 0
+
+    def get_pending_embeddings(self, limit: int = 100) -> List[Tuple[int, str, str]]:
+        """
+        Active embeddings recorded from an uploaded image whose vector has not
+        been extracted yet (no model_version), oldest first.
+
+        Returns:
+            (embedding id, employee_id, image_path) tuples
+        """
+        session = None
+        try:
+            session = self.Session()
+            rows = session.query(FaceEmbedding.id, FaceEmbedding.employee_id, FaceEmbedding.image_path).filter(
+                FaceEmbedding.is_active == True,
+                FaceEmbedding.model_version.is_(None)
+            ).order_by(FaceEmbedding.id).limit(limit).all()
+            return [tuple(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error getting pending embeddings: {e}")
+            return []
         finally:
             if session:
                 session.close()
 
+    def complete_pending_embeddings(self, results: List[Dict], failed_ids: List[int]) -> bool:
+        """
+        Store extracted pending embeddings and deactivate failed ones in one transaction.
+
+        Args:
+            results: Dicts as accepted by UnitOfWork.complete_pending_embeddings
+            failed_ids: Pending embedding ids whose image yielded no usable face
+
+        Returns:
+            True if committed
+        """
+        try:
+            with self.batch() as uow:
+                uow.complete_pending_embeddings(results, failed_ids)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error completing {len(results)} pending embeddings: {e}")
+            return False
+
     def get_face_embeddings(self, employee_id: str = None, embedding_type: str = None, limit: int = None) -> List[Tuple[str, np.ndarray]]:
         session = None
         try:
             session = self.Session()
-            query = session.query(FaceEmbedding).filter(FaceEmbedding.is_active == True)
+            query = session.query(FaceEmbedding).filter(
+                FaceEmbedding.is_active == True,
+                FaceEmbedding.model_version == settings.EMBEDDING_MODEL_VERSION
+            )
             if employee_id:
                 query = query.filter(FaceEmbedding.employee_id == employee_id)
             if embedding_type:
@@ -115,9 +348,7 @@ class DatabaseManager:
                 query = query.limit(limit)
             results = []
             for embedding_record in query.all():
-                # ✅ Deserialize bytes to numpy array
-                embedding_data = np.load(BytesIO(embedding_record.embedding_data))
-                results.append((embedding_record.employee_id, embedding_data))
+                results.append((embedding_record.employee_id, decode_embedding(embedding_record.embedding_vector)))
             return results
         except Exception as e:
             self.logger.error(f"Error getting face embeddings: {e}")
@@ -127,73 +358,63 @@ class DatabaseManager:
                 session.close()
 
 
-    def get_all_active_embeddings(self) -> Tuple[List[np.ndarray], List[str]]:
+    def get_all_active_embeddings(self) -> Tuple[np.ndarray, List[str]]:
+        """
+        Load the recognition gallery.
+
+        Returns:
+            (n, EMBEDDING_DIM) float32 matrix and the employee id of each row.
+            Only embeddings from the configured model version are included.
+        """
+        gallery = self.get_embedding_gallery()
+        return gallery.matrix, gallery.labels
+
+    def get_embedding_gallery(self) -> EmbeddingGallery:
+        """Load the recognition gallery with embedding ids, in one streamed query."""
         session = None
         try:
             session = self.Session()
-            embeddings = []
-            labels = []
-
-            enroll_embeddings = session.query(FaceEmbedding).filter(
-                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'enroll')
-            ).all()
-
-            for emb_record in enroll_embeddings:
-                embedding_data = pickle.loads(emb_record.embedding_data)
-                embeddings.append(embedding_data)
-                labels.append(emb_record.employee_id)
-
-            update_embeddings = session.query(FaceEmbedding).filter(
-                and_(FaceEmbedding.is_active == True, FaceEmbedding.embedding_type == 'update')
-            ).order_by(desc(FaceEmbedding.created_at)).all()
-
-            employee_update_count = {}
-            for emb_record in update_embeddings:
-                emp_id = emb_record.employee_id
-                if emp_id not in employee_update_count:
-                    employee_update_count[emp_id] = 0
-                if employee_update_count[emp_id] < 3:
-                    embedding_data = pickle.loads(emb_record.embedding_data)
-                    embeddings.append(embedding_data)
-                    labels.append(emb_record.employee_id)
-                    employee_update_count[emp_id] += 1
-
-            return embeddings, labels
+            return load_embedding_gallery(
+                session,
+                settings.EMBEDDING_DIM,
+                settings.EMBEDDING_MODEL_VERSION,
+                max_updates_per_employee=3
+            )
         except Exception as e:
             self.logger.error(f"Error getting all active embeddings: {e}")
-            return [], []
+            return EmbeddingGallery.empty(settings.EMBEDDING_DIM)
         finally:
             if session:
                 session.close()
 
-    def log_attendance(self, employee_id: str, camera_id: int, event_type: str, confidence_score: float = 0.0, work_status: str = 'working', notes: str = None) -> bool:
+    def log_attendance(self, employee_id: str, camera_id: int, event_type: str, confidence_score: float = 0.0, timestamp: datetime = None, notes: str = None) -> bool:
         """Log attendance record for an employee"""
-        session = None
+        return self.log_attendance_bulk([{
+            'employee_id': employee_id,
+            'camera_id': camera_id,
+            'event_type': event_type,
+            'confidence_score': confidence_score,
+            'timestamp': timestamp,
+            'notes': notes
+        }]) == 1
+
+    def log_attendance_bulk(self, events: List[Dict]) -> int:
+        """
+        Log many attendance records in one transaction.
+
+        Args:
+            events: Dicts as accepted by UnitOfWork.log_attendance_bulk
+
+        Returns:
+            Number of records logged (0 on failure)
+        """
         try:
-            session = self.Session()
-            
-            # Create attendance record
-            attendance_record = AttendanceLog(
-                employee_id=employee_id,
-                camera_id=camera_id,
-                event_type=event_type,
-                confidence_score=confidence_score,
-                work_status=work_status,
-                notes=notes
-            )
-            
-            session.add(attendance_record)
-            session.commit()
-            return True
-            
+            with self.batch() as uow:
+                logged = uow.log_attendance_bulk(events)
+            return logged
         except Exception as e:
-            if session:
-                session.rollback()
-            self.logger.error(f"Error logging attendance for {employee_id}: {e}")
-            return False
-        finally:
-            if session:
-                session.close()
+            self.logger.error(f"Error logging {len(events)} attendance records: {e}")
+            return 0
 
     # Camera Management Methods
     def create_camera(self, camera_data: dict) -> Optional[CameraConfig]:
@@ -202,12 +423,8 @@ class DatabaseManager:
         try:
             session = self.Session()
             
-            # Get the next available camera_id
-            max_camera_id = session.query(func.max(CameraConfig.camera_id)).scalar()
-            next_camera_id = (max_camera_id + 1) if max_camera_id is not None else 1
-            
+            # camera_id is allocated from the camera id sequence on insert
             camera = CameraConfig(
-                camera_id=next_camera_id,
                 camera_name=camera_data['camera_name'],
                 camera_type=camera_data.get('camera_type', 'general'),
                 ip_address=camera_data.get('ip_address'),
@@ -229,6 +446,7 @@ class DatabaseManager:
             
             session.add(camera)
             session.commit()
+            self._cameras_changed()
             session.refresh(camera)
             
             self.logger.info(f"Created camera {camera.camera_id}: {camera.camera_name}")
@@ -311,6 +529,7 @@ class DatabaseManager:
                     setattr(camera, field, value)
             
             session.commit()
+            self._cameras_changed()
             session.refresh(camera)
             
             self.logger.info(f"Updated camera {camera_id}")
@@ -337,6 +556,7 @@ class DatabaseManager:
             
             session.delete(camera)
             session.commit()
+            self._cameras_changed()
             
             self.logger.info(f"Deleted camera {camera_id}")
             return True
@@ -364,6 +584,7 @@ class DatabaseManager:
             camera.status = 'active' if is_active else 'inactive'
             
             session.commit()
+            self._cameras_changed()
             
             self.logger.info(f"{'Activated' if is_active else 'Deactivated'} camera {camera_id}")
             return True
@@ -401,6 +622,7 @@ class DatabaseManager:
             
             session.add(tripwire)
             session.commit()
+            self._cameras_changed()
             session.refresh(tripwire)
             
             self.logger.info(f"Created tripwire {tripwire.id} for camera {camera_id}")
@@ -444,6 +666,7 @@ class DatabaseManager:
                     setattr(tripwire, field, value)
             
             session.commit()
+            self._cameras_changed()
             session.refresh(tripwire)
             
             self.logger.info(f"Updated tripwire {tripwire_id}")
@@ -470,6 +693,7 @@ class DatabaseManager:
             
             session.delete(tripwire)
             session.commit()
+            self._cameras_changed()
             
             self.logger.info(f"Deleted tripwire {tripwire_id}")
             return True
@@ -484,55 +708,68 @@ class DatabaseManager:
                 session.close()
 
     def bulk_create_cameras_from_discovery(self, discovered_cameras: List[dict]) -> List[CameraConfig]:
-        """Bulk create cameras from discovery results"""
+        """
+        Bulk create cameras from discovery results
+
+        Known IPs are looked up in one query and the new cameras are written
+        with one INSERT ... ON CONFLICT (ip_address) DO NOTHING, so a camera
+        added concurrently is skipped rather than duplicated. Camera ids come
+        from the camera id sequence.
+        """
         session = None
-        created_cameras = []
         
         try:
             session = self.Session()
             
-            for camera_data in discovered_cameras:
-                # Check if camera already exists by IP
-                existing = session.query(CameraConfig).filter(
-                    CameraConfig.ip_address == camera_data['ip_address']
-                ).first()
-                
-                if existing:
-                    self.logger.info(f"Camera at {camera_data['ip_address']} already exists, skipping")
-                    continue
-                
-                # Get the next available camera_id
-                max_camera_id = session.query(func.max(CameraConfig.camera_id)).scalar()
-                next_camera_id = (max_camera_id + 1) if max_camera_id is not None else 1
-                
-                camera = CameraConfig(
-                    camera_id=next_camera_id,
-                    camera_name=f"Camera {camera_data['ip_address']}",
-                    camera_type='general',
-                    ip_address=camera_data['ip_address'],
-                    stream_url=camera_data.get('stream_urls', [None])[0],
-                    resolution_width=1920,
-                    resolution_height=1080,
-                    fps=30,
-                    gpu_id=0,
-                    status='discovered',
-                    is_active=False,
-                    manufacturer=camera_data.get('manufacturer', 'Unknown'),
-                    model=camera_data.get('model', 'Unknown'),
-                    firmware_version=camera_data.get('firmware_version', 'Unknown'),
-                    onvif_supported=camera_data.get('onvif_supported', False)
-                )
-                
-                session.add(camera)
-                created_cameras.append(camera)
-            
-            session.commit()
-            
-            # Refresh all created cameras
-            for camera in created_cameras:
-                session.refresh(camera)
-            
-            self.logger.info(f"Bulk created {len(created_cameras)} cameras from discovery")
+            # An IP reported more than once is created once
+            cameras_by_ip = {
+                camera_data['ip_address']: camera_data
+                for camera_data in discovered_cameras if camera_data.get('ip_address')
+            }
+            if not cameras_by_ip:
+                return []
+            
+            existing_ips = set(session.scalars(
+                select(CameraConfig.ip_address).where(CameraConfig.ip_address.in_(list(cameras_by_ip)))
+            ))
+            rows = [
+                {
+                    'camera_name': f"Camera {ip_address}",
+                    'camera_type': 'general',
+                    'ip_address': ip_address,
+                    'stream_url': (camera_data.get('stream_urls') or [None])[0],
+                    'resolution_width': 1920,
+                    'resolution_height': 1080,
+                    'fps': 30,
+                    'gpu_id': 0,
+                    'status': 'discovered',
+                    'is_active': False,
+                    'manufacturer': camera_data.get('manufacturer', 'Unknown'),
+                    'model': camera_data.get('model', 'Unknown'),
+                    'firmware_version': camera_data.get('firmware_version', 'Unknown'),
+                    'onvif_supported': camera_data.get('onvif_supported', False)
+                }
+                for ip_address, camera_data in cameras_by_ip.items() if ip_address not in existing_ips
+            ]
+            
+            created_cameras = []
+            if rows:
+                created_cameras = session.scalars(
+                    pg_insert(CameraConfig)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=[CameraConfig.ip_address])
+                    .returning(CameraConfig)
+                ).all()
+                # Keep the returned rows loaded once the session commits and closes
+                session.expunge_all()
+                session.commit()
+                if created_cameras:
+                    self._cameras_changed()
+            
+            self.logger.info(
+                f"Bulk created {len(created_cameras)} cameras from discovery, "
+                f"{len(cameras_by_ip) - len(created_cameras)} already known"
+            )
             return created_cameras
             
         except Exception as e:
@@ -566,6 +803,29 @@ class DatabaseManager:
             if session:
                 session.close()
 
+    def get_attendance_events_since(self, since: datetime) -> List[Tuple[str, str, Optional[int], datetime]]:
+        """Get camera-recorded entry/exit events since a time as (employee_id, event_type, camera_id, timestamp)"""
+        session = None
+        try:
+            session = self.Session()
+            rows = session.query(
+                AttendanceLog.employee_id,
+                AttendanceLog.event_type,
+                AttendanceLog.camera_id,
+                AttendanceLog.timestamp
+            ).filter(
+                and_(
+                    AttendanceLog.timestamp >= since,
+                    AttendanceLog.event_type.in_(('entry', 'exit')))
+            ).order_by(AttendanceLog.timestamp).all()
+            return [tuple(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error getting attendance events since {since}: {e}")
+            return []
+        finally:
+            if session:
+                session.close()
+
     def get_latest_attendance_by_employee(self, employee_id: str, hours_back: int = 10) -> Optional[AttendanceLog]:
         session = None
         try:
@@ -594,8 +854,11 @@ class DatabaseManager:
                 return False
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).delete()
             session.query(AttendanceLog).filter(AttendanceLog.employee_id == employee_id).delete()
+            session.query(DailyAttendanceSummary).filter(DailyAttendanceSummary.employee_id == employee_id).delete()
             session.delete(employee)
+            record_gallery_changes(session, [(employee_id, None, 'remove')])
             session.commit()
+            response_cache.invalidate(TAG_EMPLOYEES, TAG_EMBEDDINGS, TAG_ATTENDANCE)
             return True
         except Exception as e:
             if session:
@@ -610,7 +873,9 @@ class DatabaseManager:
         try:
             session = self.Session()
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).delete()
+            record_gallery_changes(session, [(employee_id, None, 'remove')])
             session.commit()
+            response_cache.invalidate(TAG_EMBEDDINGS)
             return True
         except Exception as e:
             if session:
@@ -628,7 +893,9 @@ class DatabaseManager:
             if not embedding:
                 return False
             session.delete(embedding)
+            record_gallery_changes(session, [(embedding.employee_id, embedding.id, 'remove')])
             session.commit()
+            response_cache.invalidate(TAG_EMBEDDINGS)
             return True
         except Exception as e:
             if session:
@@ -645,7 +912,9 @@ class DatabaseManager:
             session.query(FaceEmbedding).filter(FaceEmbedding.employee_id == employee_id).update({
                 FaceEmbedding.is_active: False
             })
+            record_gallery_changes(session, [(employee_id, None, 'remove')])
             session.commit()
+            response_cache.invalidate(TAG_EMBEDDINGS)
             return True
         except Exception as e:
             if session:
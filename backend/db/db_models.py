@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, LargeBinary, JSON, Date
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Boolean, Text, ForeignKey, LargeBinary, JSON, Date, UniqueConstraint, Index, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
@@ -30,7 +30,10 @@ class FaceEmbedding(Base):
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(String, ForeignKey('employees.employee_id'), nullable=False)
     image_path = Column(String, nullable=False)
-    embedding_vector = Column(LargeBinary, nullable=False)  # Stored as binary data
+    embedding_vector = Column(LargeBinary, nullable=False)  # Raw little-endian float32, see db.embedding_codec
+    embedding_dim = Column(Integer, nullable=True)  # None until an embedding has been extracted
+    model_version = Column(String, nullable=True)  # Recognition model that produced the embedding
+    embedding_type = Column(String, nullable=False, default='enroll')  # 'enroll' or 'update'
     quality_score = Column(Float, nullable=True)
     created_at = Column(DateTime, default=func.now())
     is_active = Column(Boolean, default=True)
@@ -38,19 +41,85 @@ class FaceEmbedding(Base):
     # Relationships
     employee = relationship("Employee", back_populates="face_embeddings")
 
+# Gallery loading: latest embeddings per employee and type among active rows
+Index('ix_face_embeddings_gallery', FaceEmbedding.employee_id, FaceEmbedding.embedding_type,
+      FaceEmbedding.created_at.desc(), postgresql_where=FaceEmbedding.is_active == True)
+
+class GalleryChange(Base):
+    """Append-only log of recognition gallery changes; the latest version is the gallery version"""
+    __tablename__ = 'gallery_changes'
+    
+    version = Column(BigInteger, primary_key=True, autoincrement=True)
+    employee_id = Column(String, nullable=False)  # No foreign key: removals outlive the employee
+    embedding_id = Column(Integer, nullable=True)  # None when all of the employee's embeddings changed
+    change_type = Column(String, nullable=False)  # 'add' or 'remove'
+    created_at = Column(DateTime, default=func.now())
+
 class AttendanceLog(Base):
     __tablename__ = 'attendance_logs'
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month on timestamp, so the primary key has to include it
+    id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey('employees.employee_id'), nullable=False)
-    timestamp = Column(DateTime, default=func.now(), nullable=False)
+    timestamp = Column(DateTime, primary_key=True, default=func.now(), nullable=False)
     status = Column(String, nullable=False)  # 'present' or 'absent'
+    camera_id = Column(Integer, nullable=True)  # Camera that recorded the event (None for manual entries)
+    event_type = Column(String, nullable=True)  # 'entry' or 'exit' for camera-recorded events
     confidence_score = Column(Float, nullable=True)
     notes = Column(Text, nullable=True)
+    event_key = Column(String(32), nullable=True)  # Idempotency key for journaled camera events
     created_at = Column(DateTime, default=func.now())
     
     # Relationships
     employee = relationship("Employee", back_populates="attendance_logs")
+    
+    __table_args__ = (
+        # Unique constraints on a partitioned table must include the partition key
+        UniqueConstraint('event_key', 'timestamp', name='uq_attendance_logs_event_key'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+
+# Per-employee history and latest-status lookups
+Index('ix_attendance_logs_employee_timestamp', AttendanceLog.employee_id, AttendanceLog.timestamp.desc())
+# Present-status lookups (who is in, daily presence)
+Index('ix_attendance_logs_present', AttendanceLog.employee_id, AttendanceLog.timestamp.desc(),
+      postgresql_where=AttendanceLog.status == 'present')
+# Camera entry/exit replay by time
+Index('ix_attendance_logs_camera_events', AttendanceLog.timestamp,
+      postgresql_where=AttendanceLog.event_type.in_(('entry', 'exit')))
+# Organisation-wide date ranges and keyset pagination on (timestamp, id)
+Index('ix_attendance_logs_timestamp_id', AttendanceLog.timestamp.desc(), AttendanceLog.id.desc())
+
+class DailyAttendanceSummary(Base):
+    """Per-employee, per-day rollup of attendance_logs, maintained as logs are written"""
+    __tablename__ = 'daily_attendance_summary'
+    
+    employee_id = Column(String, ForeignKey('employees.employee_id', ondelete='CASCADE'), primary_key=True)
+    work_date = Column(Date, primary_key=True)  # UTC date of the logs
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    status = Column(String, nullable=False)  # 'present' if any log that day is present, else 'absent'
+    event_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+# Organisation-wide daily counts
+Index('ix_daily_attendance_summary_date_status', DailyAttendanceSummary.work_date, DailyAttendanceSummary.status)
+
+class ExportJob(Base):
+    """Background attendance export, shared by every API worker"""
+    __tablename__ = 'export_jobs'
+    
+    job_id = Column(String(32), primary_key=True)
+    status = Column(String, nullable=False, default='pending')  # 'pending', 'running', 'completed' or 'failed'
+    format = Column(String, nullable=False)
+    filename = Column(String, nullable=False)  # Download name
+    file_path = Column(String, nullable=False)  # File under EXPORT_DIR
+    parameters = Column(JSON, nullable=True)
+    requested_by = Column(String, nullable=True)
+    rows_written = Column(BigInteger, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    completed_at = Column(DateTime, nullable=True)
 
 class UserAccount(Base):
     __tablename__ = 'user_accounts'
@@ -82,14 +151,17 @@ class TrackingRecord(Base):
     timestamp = Column(DateTime, default=func.now())
     tracking_state = Column(String, default='active')
 
+# Camera ids are allocated from this sequence, never as max(camera_id) + 1
+CAMERA_ID_SEQUENCE = Sequence('camera_configs_camera_id_seq')
+
 class CameraConfig(Base):
     __tablename__ = 'camera_configs'
     
     id = Column(Integer, primary_key=True, index=True)
-    camera_id = Column(Integer, unique=True, nullable=False)
+    camera_id = Column(Integer, CAMERA_ID_SEQUENCE, server_default=CAMERA_ID_SEQUENCE.next_value(), unique=True, nullable=False)
     camera_name = Column(String, nullable=False)
     camera_type = Column(String, default='entry')  # 'entry', 'exit', 'general'
-    ip_address = Column(String, nullable=True)  # Camera IP address
+    ip_address = Column(String, nullable=True, unique=True)  # Camera IP address, one camera per address
     stream_url = Column(String, nullable=True)  # RTSP/HTTP stream URL
     username = Column(String, nullable=True)  # Camera authentication
     password = Column(String, nullable=True)  # Camera authentication
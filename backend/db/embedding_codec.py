@@ -0,0 +1,57 @@
+"""
+Face embedding storage format.
+Embeddings are stored as raw little-endian float32 bytes (ndarray.tobytes),
+with the dimension and model version in their own columns, so a whole
+gallery decodes with one np.frombuffer over the concatenated rows.
+"""
+
+import io
+import pickle
+from typing import Optional
+
+import numpy as np
+
+EMBEDDING_DTYPE = np.dtype('<f4')
+
+# Leading bytes of the legacy encodings
+_NPY_MAGIC = b'\x93NUMPY'
+_PICKLE_PROTOCOL_PREFIX = b'\x80'
+
+def encode_embedding(embedding: np.ndarray) -> bytes:
+    """Encode a 1-D embedding in the canonical format."""
+    return np.ascontiguousarray(embedding, dtype=EMBEDDING_DTYPE).ravel().tobytes()
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    """
+    Decode one canonical embedding.
+
+    The returned array is a read-only view over data, not a copy.
+    """
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+def decode_legacy_embedding(data: bytes) -> Optional[np.ndarray]:
+    """
+    Decode an embedding stored by an earlier version.
+
+    Understands np.save output, pickled arrays and canonical raw float32.
+    Returns None for anything else (e.g. placeholder bytes written before an
+    embedding was extracted).
+    """
+    if not data:
+        return None
+    try:
+        if data.startswith(_NPY_MAGIC):
+            array = np.load(io.BytesIO(data), allow_pickle=False)
+        elif data.startswith(_PICKLE_PROTOCOL_PREFIX):
+            array = np.asarray(pickle.loads(data))
+        elif len(data) % EMBEDDING_DTYPE.itemsize == 0:
+            array = decode_embedding(data)
+        else:
+            return None
+    except Exception:
+        return None
+
+    if array.dtype.kind != 'f' or array.ndim != 1 and not (array.ndim == 2 and 1 in array.shape):
+        return None
+    array = array.astype(EMBEDDING_DTYPE).ravel()
+    return array if np.isfinite(array).all() else None
@@ -0,0 +1,128 @@
+"""
+Recognition gallery loader.
+Loads every active embedding of the current model in one query: the
+"latest N update embeddings per employee" rule is applied in SQL with
+ROW_NUMBER, only (id, employee_id, embedding bytes) are selected, and rows
+are streamed through a server-side cursor straight into a preallocated
+matrix, so no ORM objects or intermediate lists are built.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from .embedding_codec import EMBEDDING_DTYPE
+
+logger = logging.getLogger(__name__)
+
+# Enroll embeddings are always kept; update embeddings are limited to the
+# newest :max_updates per employee. COUNT(*) OVER () puts the gallery size on
+# every row, so the matrix can be allocated from the first row.
+_GALLERY_SQL_TEMPLATE = """
+    WITH ranked AS (
+        SELECT
+            id,
+            employee_id,
+            embedding_vector,
+            embedding_type,
+            ROW_NUMBER() OVER (
+                PARTITION BY employee_id, embedding_type
+                ORDER BY created_at DESC, id DESC
+            ) AS rn
+        FROM face_embeddings
+        WHERE is_active = TRUE
+          AND model_version = :model_version
+          AND embedding_dim = :dim{employee_filter}
+    )
+    SELECT id, employee_id, embedding_vector, COUNT(*) OVER () AS total
+    FROM ranked
+    WHERE embedding_type = 'enroll' OR rn <= :max_updates
+    ORDER BY employee_id, id
+"""
+
+GALLERY_SQL = text(_GALLERY_SQL_TEMPLATE.format(employee_filter=''))
+
+# Same query restricted to some employees, for applying gallery changes
+GALLERY_EMPLOYEES_SQL = text(
+    _GALLERY_SQL_TEMPLATE.format(employee_filter='\n          AND employee_id IN :employee_ids')
+).bindparams(bindparam('employee_ids', expanding=True))
+
+@dataclass
+class EmbeddingGallery:
+    """Embedding matrix with the employee and embedding id of each row"""
+    matrix: np.ndarray
+    labels: List[str] = field(default_factory=list)
+    embedding_ids: List[int] = field(default_factory=list)
+
+    @classmethod
+    def empty(cls, dim: int) -> "EmbeddingGallery":
+        return cls(matrix=np.empty((0, dim), dtype=EMBEDDING_DTYPE))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def replace_employees(self, employee_ids: Sequence[str], delta: "EmbeddingGallery") -> "EmbeddingGallery":
+        """
+        New gallery with the given employees' rows replaced by those in delta.
+
+        Args:
+            employee_ids: Employees whose rows are dropped
+            delta: Current rows of those employees (from load_embedding_gallery)
+        """
+        dropped = set(employee_ids)
+        keep = [index for index, label in enumerate(self.labels) if label not in dropped]
+        return EmbeddingGallery(
+            matrix=np.concatenate([self.matrix[keep], delta.matrix]),
+            labels=[self.labels[index] for index in keep] + delta.labels,
+            embedding_ids=[self.embedding_ids[index] for index in keep] + delta.embedding_ids
+        )
+
+def load_embedding_gallery(session: Session,
+                           dim: int,
+                           model_version: str,
+                           max_updates_per_employee: int = 3,
+                           chunk_size: int = 1000,
+                           employee_ids: Optional[Sequence[str]] = None) -> EmbeddingGallery:
+    """
+    Load the recognition gallery.
+
+    Args:
+        session: Database session
+        dim: Embedding dimension
+        model_version: Only embeddings from this model are loaded
+        max_updates_per_employee: Newest 'update' embeddings kept per employee
+        chunk_size: Rows fetched per round trip
+        employee_ids: Only load these employees' embeddings
+
+    Returns:
+        EmbeddingGallery ordered by employee
+    """
+    params = {'model_version': model_version, 'dim': dim, 'max_updates': max_updates_per_employee}
+    if employee_ids is not None:
+        if not employee_ids:
+            return EmbeddingGallery.empty(dim)
+        stmt = GALLERY_EMPLOYEES_SQL
+        params['employee_ids'] = list(employee_ids)
+    else:
+        stmt = GALLERY_SQL
+
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size), params)
+
+    gallery = None
+    for index, (embedding_id, employee_id, data, total) in enumerate(result):
+        if gallery is None:
+            gallery = EmbeddingGallery(matrix=np.empty((total, dim), dtype=EMBEDDING_DTYPE))
+        gallery.matrix[index] = np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+        gallery.labels.append(employee_id)
+        gallery.embedding_ids.append(embedding_id)
+
+    if gallery is None:
+        return EmbeddingGallery.empty(dim)
+
+    if employee_ids is None:
+        logger.info(f"Loaded embedding gallery: {len(gallery)} embeddings for {len(set(gallery.labels))} employees")
+    return gallery
@@ -0,0 +1,63 @@
+"""
+Attendance export job store.
+Background exports are tracked in the export_jobs table rather than in
+process memory, so any API worker can report a job's status or serve its
+file, and jobs outlive restarts. Files live in the shared EXPORT_DIR.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+
+from .db_models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+def update_export_job(session_factory: Callable[[], Session], job_id: str, **values):
+    """
+    Update an export job in its own short transaction.
+
+    Args:
+        session_factory: SQLAlchemy session factory
+        job_id: Export job id
+        values: Columns to set
+    """
+    session = session_factory()
+    try:
+        session.execute(update(ExportJob).where(ExportJob.job_id == job_id).values(**values))
+        session.commit()
+    finally:
+        session.close()
+
+def prune_export_jobs(session: Session, retention_hours: float) -> int:
+    """
+    Delete export jobs older than the retention window, and their files.
+
+    Jobs still pending or running past the window (e.g. their worker was
+    restarted mid-export) are removed too.
+
+    Returns:
+        Number of jobs deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    # RETURNING makes each file the responsibility of the one worker that deleted its row
+    file_paths = session.execute(
+        delete(ExportJob)
+        .where(func.coalesce(ExportJob.completed_at, ExportJob.created_at) < cutoff)
+        .returning(ExportJob.file_path)
+    ).scalars().all()
+    session.commit()
+
+    for file_path in file_paths:
+        for path in (file_path, file_path + '.part'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to delete export file {path}: {e}")
+    return len(file_paths)
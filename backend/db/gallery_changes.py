@@ -0,0 +1,80 @@
+"""
+Recognition gallery change feed.
+Writers record which employees' embeddings changed in gallery_changes, in the
+same transaction as the change, and signal the gallery_changes channel with
+NOTIFY. Readers apply every change after the version they last saw.
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from .db_models import GalleryChange
+
+GALLERY_CHANNEL = 'gallery_changes'
+
+# Serializes gallery writers so versions become visible in commit order and a
+# reader that has seen version N never later finds a committed change below N
+_GALLERY_LOCK_KEY = 0x6761_6c6c
+
+def _is_postgres(session: Session) -> bool:
+    return session.get_bind().dialect.name == 'postgresql'
+
+def record_gallery_changes(session: Session,
+                           changes: Iterable[Tuple[str, Optional[int], str]]) -> Optional[int]:
+    """
+    Record gallery changes as part of the caller's transaction.
+
+    Args:
+        session: Session holding the embedding change; the caller commits
+        changes: (employee_id, embedding_id or None, 'add' | 'remove') tuples
+
+    Returns:
+        The new gallery version, or None if there were no changes
+    """
+    rows = [
+        {'employee_id': employee_id, 'embedding_id': embedding_id, 'change_type': change_type}
+        for employee_id, embedding_id, change_type in changes
+    ]
+    if not rows:
+        return None
+
+    postgres = _is_postgres(session)
+    if postgres:
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': _GALLERY_LOCK_KEY})
+
+    versions = session.execute(
+        insert(GalleryChange).returning(GalleryChange.version), rows
+    ).scalars().all()
+    version = max(versions)
+
+    if postgres:
+        # Delivered to listeners only when the transaction commits
+        session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                        {'channel': GALLERY_CHANNEL, 'payload': str(version)})
+    return version
+
+def get_gallery_version(session: Session) -> int:
+    """Latest gallery version (0 before any change)."""
+    return session.execute(select(func.coalesce(func.max(GalleryChange.version), 0))).scalar()
+
+def get_changed_employees(session: Session, since_version: int) -> Tuple[int, List[str]]:
+    """
+    Employees whose gallery rows changed after a version.
+
+    Args:
+        session: Database session
+        since_version: Last version already applied
+
+    Returns:
+        Tuple of (latest version, employee ids changed after since_version)
+    """
+    rows = session.execute(
+        select(GalleryChange.employee_id, func.max(GalleryChange.version))
+        .where(GalleryChange.version > since_version)
+        .group_by(GalleryChange.employee_id)
+    ).all()
+    if not rows:
+        return since_version, []
+    return max(version for _, version in rows), [employee_id for employee_id, _ in rows]
@@ -0,0 +1,113 @@
+"""
+Monthly range partition management for time-series tables.
+"""
+
+import logging
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_TABLE = 'attendance_logs'
+
+def month_start(day: date) -> date:
+    """First day of the month containing day."""
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` after the month containing day."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    """Partition table name for a month, e.g. attendance_logs_y2024m01."""
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def month_ranges(first_month: date, last_month: date) -> List[Tuple[date, date]]:
+    """[start, end) bounds of every month from first_month to last_month inclusive."""
+    ranges = []
+    month = month_start(first_month)
+    while month <= last_month:
+        next_month = add_months(month, 1)
+        ranges.append((month, next_month))
+        month = next_month
+    return ranges
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    """Whether a table exists and is a partitioned (parent) table."""
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+    ), {'table': table}).scalar()
+
+def ensure_monthly_partitions(conn: Connection, table: str, first_month: date, last_month: date) -> List[str]:
+    """
+    Create missing monthly partitions and the default partition of a table.
+
+    Args:
+        conn: Connection to run the DDL on
+        table: Parent table partitioned by RANGE on a timestamp column
+        first_month: First month to cover
+        last_month: Last month to cover
+
+    Returns:
+        Names of partitions created
+    """
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table"
+    ), {'table': table})}
+
+    created = []
+    for start, end in month_ranges(first_month, last_month):
+        name = partition_name(table, start)
+        if name in existing:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+            created.append(name)
+        except Exception as e:
+            # Typically rows for this month already sit in the default partition
+            logger.error(f"Failed to create partition {name}: {e}")
+
+    # Catches rows outside every monthly range (clock skew, old backfills)
+    default_name = f"{table}_default"
+    if default_name not in existing:
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{default_name}" PARTITION OF "{table}" DEFAULT'))
+        created.append(default_name)
+
+    return created
+
+def ensure_attendance_partitions(engine: Engine, months_ahead: int = 3, months_back: int = 0) -> List[str]:
+    """
+    Make sure attendance_logs has partitions from months_back to months_ahead.
+
+    Does nothing if the table is not partitioned yet (run
+    migrate_attendance_partitions.py to convert an existing table).
+
+    Returns:
+        Names of partitions created
+    """
+    today = date.today()
+    with engine.begin() as conn:
+        if not is_partitioned(conn, ATTENDANCE_TABLE):
+            logger.warning(f"{ATTENDANCE_TABLE} is not partitioned; skipping partition maintenance")
+            return []
+        created = ensure_monthly_partitions(
+            conn,
+            ATTENDANCE_TABLE,
+            add_months(today, -months_back),
+            add_months(today, months_ahead)
+        )
+
+    if created:
+        logger.info(f"Created {ATTENDANCE_TABLE} partitions: {', '.join(created)}")
+    return created
@@ -0,0 +1,146 @@
+"""
+Connection pool telemetry.
+Checkout, checkin, connect and invalidate counts come from SQLAlchemy pool
+events; the pool classes below add how long each checkout took and how
+many timed out, which no pool event reports. Occupancy (connections in
+use, overflow) is read from the pools when metrics are requested.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+class PoolMetrics:
+    """Counters for the engines of one named pool (e.g. every 'reporting' engine)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._engines: List[Engine] = []
+        self._counters = {
+            'checkouts': 0,
+            'checkins': 0,
+            'connects': 0,
+            'invalidations': 0,
+            'timeouts': 0
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def attach(self, engine: Engine):
+        """
+        Start collecting metrics for an engine.
+
+        Args:
+            engine: Sync engine (for an AsyncEngine, its sync_engine) whose
+                pool is an InstrumentedQueuePool or InstrumentedAsyncQueuePool
+        """
+        engine.pool.metrics = self
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        with self._lock:
+            self._engines.append(engine)
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+
+    def record_timeout(self):
+        self._increment('timeouts')
+        logger.warning(f"Timed out waiting for a connection from the '{self.name}' pool")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current occupancy and cumulative counters."""
+        with self._lock:
+            pools = [engine.pool for engine in self._engines]
+            counters = dict(self._counters)
+            wait_total, wait_max = self._wait_total, self._wait_max
+
+        return {
+            'engines': len(pools),
+            'size': sum(pool.size() for pool in pools),
+            'in_use': sum(pool.checkedout() for pool in pools),
+            'idle': sum(pool.checkedin() for pool in pools),
+            'overflow': sum(max(pool.overflow(), 0) for pool in pools),
+            **counters,
+            'checkout_wait_ms_avg': round(wait_total * 1000 / max(counters['checkouts'], 1), 3),
+            'checkout_wait_ms_max': round(wait_max * 1000, 3)
+        }
+
+    def _increment(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._increment('checkouts')
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self._increment('checkins')
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._increment('connects')
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self._increment('invalidations')
+
+class _TimedCheckoutMixin:
+    """Times Pool.connect and counts checkouts that time out."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        # Covers waiting for a free connection, opening an overflow one and pre-ping
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Pools are recreated on dispose and after a disconnect; keep reporting
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool that reports checkout time and timeouts to PoolMetrics"""
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports checkout time and timeouts to PoolMetrics"""
+
+class PoolTelemetry:
+    """PoolMetrics by pool name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, PoolMetrics] = {}
+
+    def get(self, name: str) -> PoolMetrics:
+        with self._lock:
+            metrics = self._pools.get(name)
+            if metrics is None:
+                metrics = self._pools[name] = PoolMetrics(name)
+            return metrics
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            pools = dict(self._pools)
+        return {name: metrics.get_metrics() for name, metrics in pools.items()}
+
+# Global instance
+pool_telemetry = PoolTelemetry()
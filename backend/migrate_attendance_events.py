@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Migration script to add camera event columns to attendance_logs
+
+Adds the nullable camera_id and event_type columns that camera-recorded
+attendance events are written with, and the event_key column with the
+uq_attendance_logs_event_key constraint that the attendance writer's
+ON CONFLICT inserts rely on. Existing rows keep NULL in all three, as
+manual entries do. Runs in one transaction and can be re-run.
+
+Run it before starting the camera workers on an existing database.
+
+Usage:
+    python migrate_attendance_events.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from db.db_config import engine
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = [
+    "ALTER TABLE attendance_logs ADD COLUMN IF NOT EXISTS camera_id INTEGER",
+    "ALTER TABLE attendance_logs ADD COLUMN IF NOT EXISTS event_type VARCHAR",
+    "ALTER TABLE attendance_logs ADD COLUMN IF NOT EXISTS event_key VARCHAR(32)",
+]
+
+EVENT_KEY_CONSTRAINT = "uq_attendance_logs_event_key"
+
+def migrate_attendance_events():
+    """Add the attendance event columns if they are missing"""
+    logger.info("Starting migration of attendance_logs event columns")
+
+    with engine.begin() as conn:
+        for statement in SCHEMA_SQL:
+            conn.execute(text(statement))
+
+        # Includes timestamp, so it is also valid on the partitioned table
+        has_constraint = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = :name)"
+        ), {'name': EVENT_KEY_CONSTRAINT}).scalar()
+        if not has_constraint:
+            conn.execute(text(
+                f'ALTER TABLE attendance_logs ADD CONSTRAINT {EVENT_KEY_CONSTRAINT} UNIQUE (event_key, "timestamp")'
+            ))
+            logger.info(f"Added {EVENT_KEY_CONSTRAINT}")
+
+    logger.info("Attendance event migration completed")
+
+if __name__ == "__main__":
+    migrate_attendance_events()
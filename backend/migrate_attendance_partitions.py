@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Migration script to convert attendance_logs into a table range-partitioned by month
+
+The existing table is renamed, a partitioned attendance_logs is created from
+the current model (composite primary key, workload indexes), monthly
+partitions are created to cover every existing row plus the configured months
+ahead, and the rows are copied over with their ids. Runs in one transaction.
+
+Usage:
+    python migrate_attendance_partitions.py [--keep-legacy]
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from app.config import settings
+from db.db_config import engine
+from db.db_models import AttendanceLog
+from db.partitions import ATTENDANCE_TABLE, add_months, ensure_monthly_partitions, is_partitioned
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEGACY_TABLE = f"{ATTENDANCE_TABLE}_legacy"
+
+def migrate_attendance_partitions(keep_legacy: bool = False):
+    """
+    Convert attendance_logs to a monthly range-partitioned table
+
+    Args:
+        keep_legacy: Keep the original table as attendance_logs_legacy instead of dropping it
+    """
+    logger.info("Starting migration of attendance_logs to monthly partitions")
+
+    with engine.begin() as conn:
+        if is_partitioned(conn, ATTENDANCE_TABLE):
+            logger.info("attendance_logs is already partitioned, nothing to migrate")
+            return
+
+        exists = conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {'table': ATTENDANCE_TABLE}).scalar()
+        if not exists:
+            logger.info("attendance_logs does not exist; create_tables() will create it partitioned")
+            return
+
+        # Free the table, index, constraint and sequence names for the new table
+        conn.execute(text(f'ALTER TABLE "{ATTENDANCE_TABLE}" RENAME TO "{LEGACY_TABLE}"'))
+        index_names = conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = :table"
+        ), {'table': LEGACY_TABLE}).scalars().all()
+        for index_name in index_names:
+            conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+        sequence = conn.execute(text(
+            "SELECT pg_get_serial_sequence(:table, 'id')"
+        ), {'table': LEGACY_TABLE}).scalar()
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {ATTENDANCE_TABLE}_id_seq_legacy"))
+
+        AttendanceLog.__table__.create(conn)
+        logger.info("Created partitioned attendance_logs")
+
+        # Partitions for every month that has rows, through the maintenance horizon
+        first_ts, row_count = conn.execute(text(
+            f'SELECT min("timestamp"), count(*) FROM "{LEGACY_TABLE}"'
+        )).one()
+        first_month = first_ts.date() if first_ts else date.today()
+        created = ensure_monthly_partitions(
+            conn,
+            ATTENDANCE_TABLE,
+            first_month,
+            add_months(date.today(), settings.ATTENDANCE_PARTITION_MONTHS_AHEAD)
+        )
+        logger.info(f"Created {len(created)} partitions")
+
+        # Copy the columns both tables have; newer columns stay NULL for old rows
+        legacy_columns = set(conn.execute(text(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = :table"
+        ), {'table': LEGACY_TABLE}).scalars().all())
+        columns = ', '.join(f'"{c.name}"' for c in AttendanceLog.__table__.columns if c.name in legacy_columns)
+        conn.execute(text(
+            f'INSERT INTO "{ATTENDANCE_TABLE}" ({columns}) SELECT {columns} FROM "{LEGACY_TABLE}"'
+        ))
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{ATTENDANCE_TABLE}', 'id'), "
+            f'COALESCE((SELECT max(id) FROM "{ATTENDANCE_TABLE}"), 0) + 1, false)'
+        ))
+        logger.info(f"Copied {row_count} attendance records")
+
+        if not keep_legacy:
+            conn.execute(text(f'DROP TABLE "{LEGACY_TABLE}"'))
+            logger.info("Dropped legacy attendance table")
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(f'ANALYZE "{ATTENDANCE_TABLE}"'))
+
+    logger.info("Attendance partition migration completed")
+
+if __name__ == "__main__":
+    migrate_attendance_partitions(keep_legacy="--keep-legacy" in sys.argv)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Migration script to allocate camera ids from a sequence and make camera IPs unique
+
+Creates camera_configs_camera_id_seq positioned after the highest existing
+camera_id and makes it the column default, then adds the unique index on
+ip_address that discovery's ON CONFLICT (ip_address) relies on. If several
+cameras share an IP address the index cannot be built; they are listed and
+nothing is changed, so they can be merged or re-addressed first. Runs in one
+transaction and can be re-run.
+
+Usage:
+    python migrate_camera_ids.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from db.db_config import engine
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEQUENCE_NAME = "camera_configs_camera_id_seq"
+
+def migrate_camera_ids() -> bool:
+    """
+    Switch camera id allocation to a sequence and add the unique IP index
+
+    Returns:
+        True if the migration was applied, False if duplicate IPs block it
+    """
+    logger.info("Starting camera id sequence migration")
+
+    with engine.begin() as conn:
+        duplicates = conn.execute(text("""
+            SELECT ip_address, array_agg(camera_id ORDER BY camera_id) AS camera_ids
+            FROM camera_configs
+            WHERE ip_address IS NOT NULL
+            GROUP BY ip_address
+            HAVING COUNT(*) > 1
+        """)).all()
+        if duplicates:
+            for ip_address, camera_ids in duplicates:
+                logger.error(f"IP address {ip_address} is used by cameras {camera_ids}")
+            logger.error(f"{len(duplicates)} duplicated IP addresses must be resolved before migrating")
+            return False
+
+        conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE_NAME} OWNED BY camera_configs.camera_id"))
+        # Next id is past every existing camera and, on a re-run, never moves
+        # the sequence back to ids of deleted cameras
+        next_id = conn.execute(text(f"""
+            SELECT setval('{SEQUENCE_NAME}', GREATEST(
+                (SELECT COALESCE(MAX(camera_id), 0) + 1 FROM camera_configs),
+                (SELECT last_value + CASE WHEN is_called THEN 1 ELSE 0 END FROM {SEQUENCE_NAME})
+            ), false)
+        """)).scalar()
+        conn.execute(text(f"ALTER TABLE camera_configs ALTER COLUMN camera_id SET DEFAULT nextval('{SEQUENCE_NAME}')"))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS camera_configs_ip_address_key ON camera_configs (ip_address)"
+        ))
+
+    logger.info(f"Camera id sequence migration completed; next camera id is {next_id}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate_camera_ids() else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Migration script to convert face embeddings to the canonical storage format
+
+Adds the embedding_dim, model_version and embedding_type columns and the
+gallery index if they are missing, then rewrites every embedding stored by
+np.save or pickle as raw little-endian float32 bytes. Rows that cannot be
+decoded to an embedding of the configured dimension (e.g. placeholder bytes)
+are left with model_version NULL, which keeps them out of the recognition
+gallery. Each batch is committed separately, so the script can be re-run
+after a failure.
+
+Usage:
+    python migrate_embedding_format.py [--model-version NAME] [--batch-size N]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import text
+
+from app.config import settings
+from db.db_config import engine
+from db.embedding_codec import decode_legacy_embedding, encode_embedding
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = [
+    "ALTER TABLE face_embeddings ADD COLUMN IF NOT EXISTS embedding_dim INTEGER",
+    "ALTER TABLE face_embeddings ADD COLUMN IF NOT EXISTS model_version VARCHAR",
+    "ALTER TABLE face_embeddings ADD COLUMN IF NOT EXISTS embedding_type VARCHAR NOT NULL DEFAULT 'enroll'",
+    "CREATE INDEX IF NOT EXISTS ix_face_embeddings_gallery "
+    "ON face_embeddings (employee_id, embedding_type, created_at DESC) WHERE is_active = TRUE",
+]
+
+def migrate_embedding_format(model_version: str = None, batch_size: int = 500):
+    """
+    Convert face embeddings to raw float32 with dimension and model version
+
+    Args:
+        model_version: Model that produced the existing embeddings (defaults to EMBEDDING_MODEL_VERSION)
+        batch_size: Rows converted per transaction
+    """
+    model_version = model_version or settings.EMBEDDING_MODEL_VERSION
+    logger.info(f"Starting migration of face embeddings to raw float32 (model {model_version})")
+
+    with engine.begin() as conn:
+        for statement in SCHEMA_SQL:
+            conn.execute(text(statement))
+
+    converted = 0
+    skipped = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text("""
+                SELECT id, embedding_vector
+                FROM face_embeddings
+                WHERE model_version IS NULL AND id > :last_id
+                ORDER BY id
+                LIMIT :limit
+            """), {'last_id': last_id, 'limit': batch_size}).all()
+            if not rows:
+                break
+
+            updates = []
+            for row_id, data in rows:
+                embedding = decode_legacy_embedding(bytes(data) if data is not None else b"")
+                if embedding is None or embedding.size != settings.EMBEDDING_DIM:
+                    skipped += 1
+                    logger.warning(f"Embedding {row_id} could not be decoded, leaving it out of the gallery")
+                    continue
+                updates.append({
+                    'id': row_id,
+                    'data': encode_embedding(embedding),
+                    'dim': int(embedding.size),
+                    'model_version': model_version
+                })
+
+            if updates:
+                conn.execute(text("""
+                    UPDATE face_embeddings
+                    SET embedding_vector = :data, embedding_dim = :dim, model_version = :model_version
+                    WHERE id = :id
+                """), updates)
+            converted += len(updates)
+            last_id = rows[-1][0]
+            logger.info(f"Converted {converted} embeddings so far (last id {last_id})")
+
+    logger.info(f"Embedding format migration completed: {converted} converted, {skipped} skipped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert face embeddings to raw float32 storage")
+    parser.add_argument("--model-version", help="Model that produced the existing embeddings")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows converted per transaction")
+    args = parser.parse_args()
+
+    migrate_embedding_format(args.model_version, args.batch_size)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Extract embeddings for face images uploaded through the API
+
+The enrollment and face upload endpoints only save the image and record a
+pending embedding (empty vector, no model_version), which the gallery
+ignores. This script runs the face enroller over the pending rows in
+batches until none are left; images without exactly one usable face are
+deactivated. The camera workers pick up the new embeddings through the
+gallery sync. Run it after uploads, e.g. from cron.
+
+Usage:
+    python process_pending_embeddings.py [--batch-size N]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from core.face_enroller import FaceEnroller
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def process_pending_embeddings(batch_size: int = 100):
+    """
+    Extract all pending embeddings
+
+    Args:
+        batch_size: Pending embeddings per transaction
+    """
+    logger.info("Starting pending embedding extraction")
+
+    enroller = FaceEnroller()
+    total = 0
+    while True:
+        processed = enroller.process_pending_embeddings(batch_size)
+        if not processed:
+            break
+        total += processed
+
+    logger.info(f"Pending embedding extraction completed: {total} processed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract embeddings for uploaded face images")
+    parser.add_argument("--batch-size", type=int, default=100, help="Pending embeddings per transaction")
+    args = parser.parse_args()
+
+    process_pending_embeddings(args.batch_size)
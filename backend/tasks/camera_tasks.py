@@ -7,9 +7,9 @@ attendance recording without blocking the main API thread.
 import asyncio
 import threading
 import time
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
-from contextlib import contextmanager
 
 import cv2
 import numpy as np
@@ -17,10 +17,49 @@ import numpy as np
 from utils.logging import get_logger
 from utils.security import get_db_manager
 from core.fts_system import FaceTrackingPipeline
+from core.face_tracker import FaceTracker
+from core.tripwire_engine import TripwireEngine
+from core.attendance_state import AttendanceStateMachine
+from core.attendance_pairing import session_pairing
+from db.attendance_writer import attendance_writer
+from db.attendance_events import attendance_listeners, status_tuples
+from core.presence_registry import presence_registry, ensure_presence_loaded
+from core.gallery_sync import gallery_sync
+from db.embedding_gallery import EmbeddingGallery
+from utils.response_cache import response_cache, TAG_ATTENDANCE
+from tasks.partition_tasks import partition_maintenance
+from tasks.stream_broadcaster import stream_broadcaster
+from utils.camera_config_loader import CameraConfigLoader, CameraConfig
+from db.camera_snapshot import CameraConfigSnapshot, CameraSnapshotDiff, diff_snapshots
 from app.config import settings
 
 logger = get_logger(__name__)
 
+def compute_frame_hash(frame: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Compute a difference hash (dHash) fingerprint for a frame.
+    
+    The frame is reduced to a (hash_size + 1) x hash_size grayscale
+    thumbnail and each bit records whether a pixel is brighter than its
+    right-hand neighbour, so sensor noise and compression artefacts do
+    not change the hash while people moving through the scene do.
+    
+    Args:
+        frame: BGR camera frame
+        hash_size: Hash grid size (8 gives a 64-bit hash)
+        
+    Returns:
+        Integer fingerprint of hash_size * hash_size bits
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    thumbnail = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """Number of differing bits between two frame hashes."""
+    return bin(hash_a ^ hash_b).count('1')
+
 class CameraMonitor:
     """
     Background camera monitor for continuous face detection and attendance tracking.
@@ -31,9 +70,35 @@ class CameraMonitor:
         self.camera_threads: Dict[int, threading.Thread] = {}
         self.pipeline = None
         self.db_manager = get_db_manager()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        
+        # Recognition gallery: (version, gallery, row-normalized matrix), swapped as a whole
+        self._gallery: Optional[Tuple[int, EmbeddingGallery, np.ndarray]] = None
+        # One worker per camera, so a camera's frames reach its tracker in capture order
+        self.camera_executors: Dict[int, ThreadPoolExecutor] = {}
         self._stop_event = threading.Event()
         
+        # Static-scene deduplication state (per camera)
+        self._frame_hashes: Dict[int, int] = {}
+        self._last_faces: Dict[int, Optional[List[Dict]]] = {}
+        self._dedup_lock = threading.Lock()
+        self.frame_stats: Dict[int, Dict[str, int]] = {}
+        
+        # Per-camera face trackers
+        self.trackers: Dict[int, FaceTracker] = {}
+        
+        # Per-camera tripwire crossing engines and frame sizes
+        self.config_loader = CameraConfigLoader()
+        self._camera_snapshot: Optional[CameraConfigSnapshot] = None
+        self.tripwire_engines: Dict[int, TripwireEngine] = {}
+        self._frame_sizes: Dict[int, Tuple[int, int]] = {}
+        
+        # Attendance debouncing, driven by each camera's type
+        self.camera_types: Dict[int, str] = {}
+        self.attendance_state = AttendanceStateMachine(
+            cooldown_seconds=settings.ATTENDANCE_COOLDOWN_SECONDS,
+            retention_seconds=settings.ATTENDANCE_STATE_RETENTION_HOURS * 3600
+        )
+        
     def start_camera_monitoring(self, camera_id: int) -> bool:
         """
         Start monitoring a specific camera for face detection.
@@ -52,6 +117,10 @@ class CameraMonitor:
             # Initialize pipeline if not exists
             if self.pipeline is None:
                 self.pipeline = FaceTrackingPipeline()
+            if self._gallery is None and gallery_sync.is_loaded:
+                self.update_gallery(*gallery_sync.get_gallery())
+            
+            self._apply_camera_config(camera_id, self.config_loader.load_camera_by_id(camera_id))
             
             # Mark camera as active
             self.active_cameras[camera_id] = True
@@ -113,14 +182,177 @@ class CameraMonitor:
         for camera_id in camera_ids:
             self.stop_camera_monitoring(camera_id)
         
-        # Shutdown executor
-        self.executor.shutdown(wait=True)
+        # Shutdown executors of loops that did not exit in time
+        for executor in list(self.camera_executors.values()):
+            executor.shutdown(wait=True)
         logger.info("Stopped all camera monitoring")
     
+    def update_gallery(self, version: int, gallery: EmbeddingGallery):
+        """
+        Swap the gallery that detected faces are identified against.
+        
+        Called by the gallery sync whenever embeddings change, so enrollments
+        and deletions take effect without restarting monitoring.
+        
+        Args:
+            version: Gallery version
+            gallery: Complete gallery at that version
+        """
+        matrix = gallery.matrix.astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._gallery = (version, gallery, matrix / np.maximum(norms, 1e-12))
+        logger.info(f"Recognition gallery at version {version} ({len(gallery)} embeddings)")
+    
+    def _identify_faces(self, faces: List[Dict]):
+        """
+        Label detections that carry an embedding but no identity with the
+        closest gallery employee, by cosine similarity.
+        
+        Matches below FACE_RECOGNITION_TOLERANCE are left unidentified, so a
+        track only takes an identity from a confident match.
+        
+        Args:
+            faces: Face detection results, updated in place
+        """
+        current = self._gallery
+        if current is None:
+            return
+        _, gallery, matrix = current
+        pending = [face for face in faces if face.get('embedding') is not None and not face.get('employee_id')]
+        if not pending or not len(gallery):
+            return
+        
+        queries = np.asarray([face['embedding'] for face in pending], dtype=np.float32)
+        if queries.shape[1] != matrix.shape[1]:
+            logger.warning(
+                f"Detection embedding size {queries.shape[1]} does not match "
+                f"the gallery ({matrix.shape[1]}); faces left unidentified"
+            )
+            return
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        
+        similarities = queries @ matrix.T
+        best = similarities.argmax(axis=1)
+        for face, index, row in zip(pending, best, similarities):
+            score = float(row[index])
+            if score >= settings.FACE_RECOGNITION_TOLERANCE:
+                face['employee_id'] = gallery.labels[index]
+                face['confidence'] = score
+    
+    def reload_camera_configurations(self) -> CameraSnapshotDiff:
+        """
+        Apply camera configuration changes made since the last reload.
+        
+        Monitored cameras that changed get their new tripwires and camera
+        type; monitored cameras that were deleted or deactivated stop being
+        monitored. Starting cameras stays explicit.
+        
+        Returns:
+            Cameras added, removed and changed since the last reload
+        """
+        snapshot = self.config_loader.get_snapshot()
+        diff = diff_snapshots(self._camera_snapshot, snapshot)
+        self._camera_snapshot = snapshot
+        
+        for camera_id in diff.removed:
+            if self.active_cameras.get(camera_id):
+                self.stop_camera_monitoring(camera_id)
+        
+        for camera_id in diff.added + diff.changed:
+            if not self.active_cameras.get(camera_id):
+                continue
+            if not snapshot.get(camera_id).is_active:
+                self.stop_camera_monitoring(camera_id)
+                continue
+            self._apply_camera_config(camera_id, self.config_loader.load_camera_by_id(camera_id))
+        
+        if diff:
+            logger.info(
+                f"Camera configurations at snapshot {diff.version}: {len(diff.added)} added, "
+                f"{len(diff.changed)} changed, {len(diff.removed)} removed"
+            )
+        return diff
+    
+    def _apply_camera_config(self, camera_id: int, camera_config: Optional[CameraConfig]):
+        """Set a camera's type and tripwires; cameras without tripwires record attendance on sight."""
+        self.camera_types[camera_id] = camera_config.camera_type if camera_config else 'general'
+        if camera_config and camera_config.tripwires:
+            self.tripwire_engines[camera_id] = TripwireEngine(camera_config.tripwires)
+        else:
+            self.tripwire_engines.pop(camera_id, None)
+    
     def get_active_cameras(self) -> List[int]:
         """Get list of currently monitored cameras."""
         return [cam_id for cam_id, active in self.active_cameras.items() if active]
     
+    def get_frame_dedup_stats(self) -> Dict[int, Dict[str, float]]:
+        """
+        Get static-scene deduplication statistics per camera.
+        
+        Returns:
+            Mapping of camera_id to sampled/skipped frame counts and skip rate
+        """
+        with self._dedup_lock:
+            return {
+                camera_id: {
+                    'sampled_frames': stats['sampled'],
+                    'skipped_frames': stats['skipped'],
+                    'skip_rate': stats['skipped'] / stats['sampled'] if stats['sampled'] else 0.0
+                }
+                for camera_id, stats in self.frame_stats.items()
+            }
+    
+    def get_tracker(self, camera_id: int) -> FaceTracker:
+        """
+        Get the face tracker for a camera, creating it on first use.
+        
+        Args:
+            camera_id: Camera identifier
+            
+        Returns:
+            Face tracker for the camera
+        """
+        tracker = self.trackers.get(camera_id)
+        if tracker is None:
+            tracker = self.trackers.setdefault(camera_id, FaceTracker(
+                max_age=settings.TRACKER_MAX_AGE_SECONDS,
+                max_cost=settings.TRACKER_MAX_COST,
+                iou_weight=settings.TRACKER_IOU_WEIGHT,
+                min_identity_confidence=settings.FACE_RECOGNITION_TOLERANCE
+            ))
+        return tracker
+    
+    def _is_duplicate_frame(self, frame_hash: int, camera_id: int) -> bool:
+        """
+        Check whether a sampled frame matches the last processed frame.
+        
+        Frames whose perceptual hash is within FRAME_DEDUP_MAX_DISTANCE bits
+        of the last processed frame are treated as a static scene. The last
+        processed hash is only replaced when a frame is sent to detection,
+        so slow drift still triggers detection once it accumulates.
+        
+        Args:
+            frame_hash: Perceptual hash of the sampled frame
+            camera_id: Camera identifier
+            
+        Returns:
+            True if detection can be skipped for this frame
+        """
+        with self._dedup_lock:
+            stats = self.frame_stats.setdefault(camera_id, {'sampled': 0, 'skipped': 0})
+            stats['sampled'] += 1
+            
+            last_hash = self._frame_hashes.get(camera_id)
+            if (last_hash is not None
+                    and hamming_distance(frame_hash, last_hash) <= settings.FRAME_DEDUP_MAX_DISTANCE):
+                stats['skipped'] += 1
+                return True
+            
+            self._frame_hashes[camera_id] = frame_hash
+            # Results are pending until the worker finishes this frame
+            self._last_faces[camera_id] = None
+            return False
+    
     def _monitor_camera(self, camera_id: int):
         """
         Main monitoring loop for a specific camera.
@@ -133,6 +365,8 @@ class CameraMonitor:
         cap = None
         frame_count = 0
         last_detection_time = time.time()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"camera_{camera_id}_frames")
+        self.camera_executors[camera_id] = executor
         
         try:
             # Initialize camera
@@ -156,22 +390,51 @@ class CameraMonitor:
                 frame_count += 1
                 current_time = time.time()
                 
+                # Live viewers share this capture instead of opening the camera again
+                stream_broadcaster.publish(camera_id, frame)
+                
                 # Process every 10th frame to reduce CPU load
                 if frame_count % 10 == 0:
-                    # Submit face detection task to thread pool
-                    future = self.executor.submit(
-                        self._process_frame,
-                        frame,
-                        camera_id,
-                        current_time
-                    )
+                    self._frame_sizes[camera_id] = (frame.shape[1], frame.shape[0])
                     
-                    # Don't wait for result to avoid blocking
-                    # Results are processed in the background
+                    frame_hash = None
+                    if settings.FRAME_DEDUP_ENABLED:
+                        frame_hash = compute_frame_hash(frame, settings.FRAME_DEDUP_HASH_SIZE)
+                    
+                    if frame_hash is not None and self._is_duplicate_frame(frame_hash, camera_id):
+                        # Static scene - reuse the last processed frame's results
+                        with self._dedup_lock:
+                            cached_faces = self._last_faces.get(camera_id)
+                        if cached_faces:
+                            executor.submit(
+                                self._handle_cached_faces,
+                                cached_faces,
+                                camera_id,
+                                current_time
+                            )
+                    else:
+                        # Submit face detection to the camera's worker
+                        future = executor.submit(
+                            self._process_frame,
+                            frame,
+                            camera_id,
+                            current_time,
+                            frame_hash
+                        )
+                        
+                        # Don't wait for result to avoid blocking
+                        # Results are processed in the background
                 
                 # Log detection rate every 30 seconds
                 if current_time - last_detection_time > 30:
                     logger.debug(f"Camera {camera_id} processed {frame_count} frames")
+                    dedup_stats = self.get_frame_dedup_stats().get(camera_id)
+                    if dedup_stats:
+                        logger.debug(
+                            f"Camera {camera_id} skipped {dedup_stats['skipped_frames']}/"
+                            f"{dedup_stats['sampled_frames']} sampled frames "
+                            f"(skip rate {dedup_stats['skip_rate']:.1%})"
+                        )
                     last_detection_time = current_time
                     frame_count = 0
                 
@@ -185,9 +448,21 @@ class CameraMonitor:
             if cap:
                 cap.release()
             self.active_cameras[camera_id] = False
+            # Let queued frames finish before their per-camera state is dropped
+            executor.shutdown(wait=True)
+            if self.camera_executors.get(camera_id) is executor:
+                del self.camera_executors[camera_id]
+            with self._dedup_lock:
+                self._frame_hashes.pop(camera_id, None)
+                self._last_faces.pop(camera_id, None)
+            self.trackers.pop(camera_id, None)
+            self.tripwire_engines.pop(camera_id, None)
+            self._frame_sizes.pop(camera_id, None)
+            self.attendance_state.reset(camera_id)
             logger.info(f"Camera monitoring stopped for camera {camera_id}")
     
-    def _process_frame(self, frame: np.ndarray, camera_id: int, timestamp: float):
+    def _process_frame(self, frame: np.ndarray, camera_id: int, timestamp: float,
+                       frame_hash: Optional[int] = None):
         """
         Process a single frame for face detection and recognition.
         
@@ -195,21 +470,28 @@ class CameraMonitor:
             frame: Camera frame
             camera_id: Camera identifier
             timestamp: Frame timestamp
+            frame_hash: Perceptual hash of the frame, if deduplication is enabled
         """
         try:
             start_time = time.time()
             
             # Detect faces using the pipeline
             faces = self.pipeline.detect_faces(frame)
+            self._identify_faces(faces)
             
             processing_time = time.time() - start_time
             
+            if frame_hash is not None:
+                with self._dedup_lock:
+                    # Only cache if no newer frame has been sent to detection since
+                    if self._frame_hashes.get(camera_id) == frame_hash:
+                        self._last_faces[camera_id] = list(faces)
+            
             if faces:
                 logger.debug(f"Camera {camera_id}: Detected {len(faces)} faces")
                 
-                # Process each detected face
-                for face_data in faces:
-                    self._handle_face_detection(face_data, camera_id, timestamp)
+                # Process each tracked face
+                self._handle_tracked_faces(faces, camera_id, timestamp)
             
             # Log performance metrics
             if len(faces) > 0:
@@ -219,14 +501,84 @@ class CameraMonitor:
         except Exception as e:
             logger.error(f"Error processing frame from camera {camera_id}: {e}")
     
-    def _handle_face_detection(self, face_data: Dict, camera_id: int, timestamp: float):
+    def _handle_cached_faces(self, faces: List[Dict], camera_id: int, timestamp: float):
+        """
+        Handle faces reused from the last processed frame of a static scene.
+        
+        Args:
+            faces: Face detection results of the last processed frame
+            camera_id: Camera identifier
+            timestamp: Timestamp of the skipped frame
+        """
+        try:
+            self._handle_tracked_faces(faces, camera_id, timestamp)
+        except Exception as e:
+            logger.error(f"Error handling cached faces from camera {camera_id}: {e}")
+    
+    def _handle_tracked_faces(self, faces: List[Dict], camera_id: int, timestamp: float):
+        """
+        Update the camera's tracker and handle faces whose track gained an identity.
+        
+        A person who stays in view keeps the same track, so attendance is only
+        handled once per track identity rather than once per sampled frame.
+        Cameras with tripwires record attendance when an identified track
+        crosses a tripwire instead.
+        
+        Args:
+            faces: Face detection results for one frame
+            camera_id: Camera identifier
+            timestamp: Frame timestamp
+        """
+        tracker = self.get_tracker(camera_id)
+        tracked_faces = tracker.update(faces, timestamp)
+        
+        engine = self.tripwire_engines.get(camera_id)
+        frame_size = self._frame_sizes.get(camera_id)
+        if engine is None or not engine.tripwire_count or frame_size is None:
+            for face_data in tracked_faces:
+                if face_data['new_identity']:
+                    self._handle_face_detection(face_data, camera_id, timestamp)
+                elif face_data.get('employee_id'):
+                    # Still in view - keeps the attendance cooldown from expiring
+                    self.attendance_state.touch(face_data['employee_id'], camera_id, timestamp)
+            return
+        
+        track_ids, boxes, employee_ids, confidences = tracker.get_track_state()
+        confidence_by_track = dict(zip(track_ids.tolist(), confidences.tolist()))
+        
+        for event in engine.update(track_ids, boxes, frame_size, employee_ids):
+            if not event['employee_id'] or event['event_type'] not in ('entry', 'exit'):
+                logger.debug(
+                    f"Camera {camera_id}: track {event['track_id']} crossed "
+                    f"{event['tripwire']} ({event['direction']})"
+                )
+                continue
+            
+            self._handle_face_detection(
+                {
+                    'employee_id': event['employee_id'],
+                    'confidence': confidence_by_track[event['track_id']],
+                    'track_id': event['track_id']
+                },
+                camera_id,
+                timestamp,
+                event_type=event['event_type']
+            )
+    
+    def _handle_face_detection(self, face_data: Dict, camera_id: int, timestamp: float,
+                               event_type: Optional[str] = None):
         """
         Handle a detected face - identify and record attendance.
         
+        Sightings go through the attendance state machine first, so only
+        real entry/exit transitions are written to the database.
+        
         Args:
             face_data: Face detection data
             camera_id: Camera identifier
             timestamp: Detection timestamp
+            event_type: Explicit event type ('entry' or 'exit'); derived from
+                the camera type when not given
         """
         try:
             # Extract face information
@@ -234,86 +586,66 @@ class CameraMonitor:
             confidence = face_data.get('confidence', 0.0)
             
             if employee_id and confidence > settings.FACE_RECOGNITION_TOLERANCE:
-                # Record attendance
-                self.db_manager.record_attendance(
+                event_type = self.attendance_state.process(
+                    employee_id,
+                    camera_id,
+                    self.camera_types.get(camera_id, 'general'),
+                    timestamp,
+                    event_type=event_type
+                )
+                if event_type is None:
+                    return
+                
+                # Queue attendance for the batched writer
+                event_time = datetime.utcfromtimestamp(timestamp)
+                attendance_writer.enqueue(
                     employee_id=employee_id,
                     camera_id=camera_id,
+                    event_type=event_type,
                     confidence_score=confidence,
-                    event_type='entry',  # Could be 'entry' or 'exit'
-                    timestamp=timestamp
+                    timestamp=event_time
                 )
                 
                 logger.info(
-                    f"Recorded attendance for employee {employee_id} "
+                    f"Recorded {event_type} for employee {employee_id} "
                     f"on camera {camera_id} with confidence {confidence:.3f}"
                 )
             
         except Exception as e:
             logger.error(f"Error handling face detection: {e}")
 
-class StreamManager:
-    """
-    Manager for active video streams to prevent resource conflicts.
-    """
-    
-    def __init__(self):
-        self.active_streams: Dict[int, int] = {}  # camera_id -> stream_count
-        self.max_streams_per_camera = 3
-        
-    @contextmanager
-    def get_stream(self, camera_id: int):
-        """
-        Context manager for managing camera streams.
-        
-        Args:
-            camera_id: Camera identifier
-            
-        Yields:
-            Camera stream if available
-            
-        Raises:
-            RuntimeError: If too many streams are active
-        """
-        current_streams = self.active_streams.get(camera_id, 0)
-        
-        if current_streams >= self.max_streams_per_camera:
-            raise RuntimeError(f"Too many active streams for camera {camera_id}")
-        
-        # Increment stream count
-        self.active_streams[camera_id] = current_streams + 1
-        
-        try:
-            # Initialize camera
-            cap = cv2.VideoCapture(camera_id)
-            if not cap.isOpened():
-                raise RuntimeError(f"Failed to open camera {camera_id}")
-            
-            yield cap
-            
-        finally:
-            # Cleanup
-            cap.release()
-            
-            # Decrement stream count
-            self.active_streams[camera_id] -= 1
-            if self.active_streams[camera_id] <= 0:
-                del self.active_streams[camera_id]
-    
-    def get_active_stream_count(self, camera_id: int) -> int:
-        """Get number of active streams for a camera."""
-        return self.active_streams.get(camera_id, 0)
-    
-    def get_total_streams(self) -> int:
-        """Get total number of active streams."""
-        return sum(self.active_streams.values())
-
 # Global instances
 camera_monitor = CameraMonitor()
-stream_manager = StreamManager()
+
+def _pair_logged_events(rows):
+    """Feed committed entry/exit events to session pairing in time order."""
+    for row in sorted(rows, key=lambda row: row.timestamp):
+        if row.event_type:
+            session_pairing.record_event(row.employee_id, row.event_type, row.camera_id, row.timestamp)
+
+# Keep presence and sessions current as attendance events are committed,
+# whether by the batched writer or DatabaseManager.log_attendance
+attendance_listeners.add(lambda rows: presence_registry.apply_logs(status_tuples(rows)))
+attendance_listeners.add(_pair_logged_events)
+attendance_listeners.add(lambda rows: response_cache.invalidate(TAG_ATTENDANCE))
+
+# Apply embedding changes to the recognition gallery
+gallery_sync.add_listener(camera_monitor.update_gallery)
 
 def start_background_monitoring():
     """Start background camera monitoring for all configured cameras."""
     try:
+        # Rebuild today's sessions from the attendance log
+        start_of_day = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        session_pairing.load_events(camera_monitor.db_manager.get_attendance_events_since(start_of_day))
+        
+        with camera_monitor.db_manager.Session() as session:
+            ensure_presence_loaded(session)
+        
+        attendance_writer.start()
+        partition_maintenance.start()
+        gallery_sync.start()
+        
         # Start monitoring default camera
         camera_monitor.start_camera_monitoring(settings.DEFAULT_CAMERA_ID)
         logger.info("Background camera monitoring started")
@@ -324,6 +656,11 @@ def stop_background_monitoring():
     """Stop all background monitoring."""
     try:
         camera_monitor.stop_all_monitoring()
+        stream_broadcaster.stop_all()
+        # Flush queued attendance events before shutting down
+        attendance_writer.stop()
+        partition_maintenance.stop()
+        gallery_sync.stop()
         logger.info("Background camera monitoring stopped")
     except Exception as e:
         logger.error(f"Error stopping background monitoring: {e}")
\ No newline at end of file
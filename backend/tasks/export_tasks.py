@@ -0,0 +1,70 @@
+"""
+Export maintenance tasks.
+Periodically deletes expired attendance export jobs and their files.
+"""
+
+import threading
+from typing import Optional
+
+from utils.logging import get_logger
+from db.db_config import get_api_session
+from db.export_jobs import prune_export_jobs
+from app.config import settings
+
+logger = get_logger(__name__)
+
+class ExportJobMaintenance:
+    """
+    Background thread that prunes export jobs past the retention window.
+    """
+
+    def __init__(self, retention_hours: float = 24.0, interval_minutes: float = 60.0):
+        """
+        Args:
+            retention_hours: Hours a finished export is kept
+            interval_minutes: Minutes between pruning runs
+        """
+        self.retention_hours = retention_hours
+        self.interval_seconds = interval_minutes * 60
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self):
+        """Prune expired export jobs now."""
+        session = get_api_session()
+        try:
+            pruned = prune_export_jobs(session, self.retention_hours)
+            if pruned:
+                logger.info(f"Pruned {pruned} expired export jobs")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Export job pruning failed: {e}")
+        finally:
+            session.close()
+
+    def start(self):
+        """Start periodic pruning."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="export_job_maintenance")
+        self._thread.start()
+        logger.info("Export job maintenance started")
+
+    def stop(self):
+        """Stop periodic pruning."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(self.interval_seconds)
+
+# Global instance
+export_job_maintenance = ExportJobMaintenance(
+    retention_hours=settings.EXPORT_RETENTION_HOURS,
+    interval_minutes=settings.EXPORT_PRUNE_INTERVAL_MINUTES
+)
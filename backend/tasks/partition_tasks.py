@@ -0,0 +1,65 @@
+"""
+Partition maintenance tasks.
+Keeps monthly attendance_logs partitions created ahead of time so inserts
+never fall into the default partition.
+"""
+
+import threading
+from typing import Optional
+
+from utils.logging import get_logger
+from db.db_config import engine
+from db.partitions import ensure_attendance_partitions
+from app.config import settings
+
+logger = get_logger(__name__)
+
+class PartitionMaintenance:
+    """
+    Background thread that periodically creates upcoming monthly partitions.
+    """
+
+    def __init__(self, months_ahead: int = 3, interval_hours: float = 24.0):
+        """
+        Args:
+            months_ahead: Months of partitions to keep created beyond the current one
+            interval_hours: Hours between maintenance runs
+        """
+        self.months_ahead = months_ahead
+        self.interval_seconds = interval_hours * 3600
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self):
+        """Create any missing partitions now."""
+        try:
+            ensure_attendance_partitions(engine, months_ahead=self.months_ahead)
+        except Exception as e:
+            logger.error(f"Attendance partition maintenance failed: {e}")
+
+    def start(self):
+        """Start periodic maintenance."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="partition_maintenance")
+        self._thread.start()
+        logger.info("Partition maintenance started")
+
+    def stop(self):
+        """Stop periodic maintenance."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(self.interval_seconds)
+
+# Global instance
+partition_maintenance = PartitionMaintenance(
+    months_ahead=settings.ATTENDANCE_PARTITION_MONTHS_AHEAD,
+    interval_hours=settings.ATTENDANCE_PARTITION_CHECK_HOURS
+)
@@ -0,0 +1,406 @@
+"""
+Shared MJPEG broadcasting.
+Each stream (normally a camera) has one encoder thread that JPEG-encodes the
+latest frame at most STREAM_FPS times a second and hands the same multipart
+chunk to every viewer. Each viewer reads from its own small queue; a viewer
+that falls behind loses its oldest frames instead of holding back the
+encoder or the other viewers. Viewers are served by async generators that
+wait on the event loop, so an open feed holds no API worker thread.
+"""
+
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.logging import get_logger
+from app.config import settings
+
+logger = get_logger(__name__)
+
+# JPEG quality for each STREAM_QUALITY setting
+JPEG_QUALITY = {'low': 60, 'medium': 80, 'high': 95}
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """Wrap a JPEG image as one part of a multipart/x-mixed-replace stream."""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+
+class FrameSource(ABC):
+    """Frames for a stream nobody publishes to; read() returns None when none is available."""
+
+    @abstractmethod
+    def read(self) -> Optional[np.ndarray]:
+        """Read the next frame."""
+
+    def release(self):
+        """Free the source while the stream has no viewers."""
+
+class CaptureSource(FrameSource):
+    """Reads a camera directly, opened on first read"""
+
+    def __init__(self, camera_id: int):
+        self.camera_id = camera_id
+        self._cap = None
+
+    def read(self) -> Optional[np.ndarray]:
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.camera_id)
+            if not self._cap.isOpened():
+                logger.error(f"Failed to open camera {self.camera_id} for streaming")
+        ret, frame = self._cap.read()
+        return frame if ret else None
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+class StreamSubscriber:
+    """
+    One viewer's queue of encoded MJPEG parts.
+
+    Holds at most max_frames parts; adding to a full queue drops the oldest.
+    """
+
+    def __init__(self, max_frames: int = 2):
+        self._parts = deque(maxlen=max_frames)
+        self._condition = threading.Condition()
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def put(self, part: bytes):
+        with self._condition:
+            if len(self._parts) == self._parts.maxlen:
+                self.dropped += 1
+            self._parts.append(part)
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Next part, waiting up to timeout seconds for one.
+
+        Returns:
+            The part, or None on timeout or once the stream is closed
+        """
+        with self._condition:
+            if not self._parts and not self.closed:
+                self._condition.wait(timeout)
+            if not self._parts:
+                return None
+            self.delivered += 1
+            return self._parts.popleft()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+class AsyncStreamSubscriber(StreamSubscriber):
+    """StreamSubscriber read from an event loop; the encoder thread wakes it with call_soon_threadsafe."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_frames: int = 2):
+        super().__init__(max_frames)
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def put(self, part: bytes):
+        super().put(part)
+        self._wake()
+
+    def close(self):
+        super().close()
+        self._wake()
+
+    async def aget(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Next part, waiting up to timeout seconds for one without blocking the loop.
+
+        Returns:
+            The part, or None on timeout or once the stream is closed
+        """
+        # Cleared before checking, so a part put after the check sets it again
+        self._ready.clear()
+        part = self.get(timeout=0)
+        if part is not None or self.closed:
+            return part
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.get(timeout=0)
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Event loop already closed; nobody is waiting
+            pass
+
+class FrameBroadcaster:
+    """
+    Encodes one stream once per output frame for all of its subscribers.
+
+    Frames pushed with publish() (the camera monitor pushes every frame it
+    reads) take precedence. When none have been published for
+    publish_timeout seconds, frames are read from frame_source instead, so a
+    camera that is not monitored is still opened only once for all viewers.
+    Streams nobody publishes to (publish_timeout None) read frame_source
+    straight away.
+    The encoder thread runs only while someone is subscribed.
+    """
+
+    def __init__(self, stream_id: Hashable, frame_source: Optional[FrameSource] = None,
+                 fps: float = 15.0, jpeg_quality: int = 80, queue_size: int = 2,
+                 publish_timeout: Optional[float] = 1.0):
+        """
+        Args:
+            stream_id: Camera id, or another key for non-camera streams
+            frame_source: Source used while no frames are published
+            fps: Maximum frames encoded per second
+            jpeg_quality: JPEG quality (0-100)
+            queue_size: Parts buffered per subscriber before the oldest is dropped
+            publish_timeout: Seconds without published frames before frame_source is used,
+                or None if frames are never published
+        """
+        self.stream_id = stream_id
+        self.frame_source = frame_source
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.queue_size = queue_size
+        self.publish_timeout = publish_timeout
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._subscribers: List[StreamSubscriber] = []
+        self._published_frame: Optional[np.ndarray] = None
+        self._published_at = 0.0
+        self._started_at = 0.0
+        self.frames_encoded = 0
+        self.dropped = 0
+        self.delivered = 0
+
+    def subscribe(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> StreamSubscriber:
+        """
+        Add a viewer, starting the encoder if it is the first.
+
+        Args:
+            loop: Event loop the viewer reads from; gives an AsyncStreamSubscriber
+        """
+        if loop is not None:
+            subscriber = AsyncStreamSubscriber(loop, self.queue_size)
+        else:
+            subscriber = StreamSubscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._stop_event.clear()
+                self._started_at = time.monotonic()
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name=f"stream_broadcaster_{self.stream_id}"
+                )
+                self._thread.start()
+                logger.info(f"Started broadcasting stream {self.stream_id}")
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        """Remove a viewer; the encoder stops after the last one leaves."""
+        subscriber.close()
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+                self.dropped += subscriber.dropped
+                self.delivered += subscriber.delivered
+
+    def publish(self, frame: np.ndarray):
+        """Offer the latest frame; ignored while nobody is watching."""
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._published_frame = frame
+            self._published_at = time.monotonic()
+
+    def stop(self):
+        """Disconnect every viewer and stop the encoder."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            thread = self._thread
+            self._stop_event.set()
+        for subscriber in subscribers:
+            self.unsubscribe(subscriber)
+        if thread:
+            thread.join(timeout=5)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            return {
+                'subscribers': len(subscribers),
+                'running': self._thread is not None,
+                'frames_encoded': self.frames_encoded,
+                'frames_delivered': self.delivered + sum(s.delivered for s in subscribers),
+                'frames_dropped': self.dropped + sum(s.dropped for s in subscribers)
+            }
+
+    def _next_frame(self) -> Optional[np.ndarray]:
+        with self._lock:
+            frame, published_at = self._published_frame, self._published_at
+            # Each published frame is encoded at most once
+            self._published_frame = None
+            started_at = self._started_at
+
+        now = time.monotonic()
+        if self.publish_timeout is not None:
+            if now - published_at < self.publish_timeout:
+                if self.frame_source:
+                    self.frame_source.release()
+                return frame
+            # Give the camera monitor a chance to publish before opening the camera
+            if now - started_at < self.publish_timeout:
+                return None
+        if self.frame_source is None:
+            return None
+        return self.frame_source.read()
+
+    def _encode(self, frame: np.ndarray) -> Optional[bytes]:
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return mjpeg_part(buffer.tobytes()) if ok else None
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        next_frame_at = time.monotonic()
+
+        while True:
+            with self._lock:
+                if not self._subscribers or self._stop_event.is_set():
+                    if self.frame_source:
+                        self.frame_source.release()
+                    self._thread = None
+                    logger.info(f"Stopped broadcasting stream {self.stream_id}")
+                    return
+                subscribers = list(self._subscribers)
+
+            try:
+                frame = self._next_frame()
+                part = self._encode(frame) if frame is not None else None
+            except Exception as e:
+                logger.error(f"Error encoding stream {self.stream_id}: {e}")
+                part = None
+
+            if part is not None:
+                self.frames_encoded += 1
+                for subscriber in subscribers:
+                    subscriber.put(part)
+
+            next_frame_at = max(next_frame_at + interval, time.monotonic())
+            self._stop_event.wait(next_frame_at - time.monotonic())
+
+class StreamBroadcaster:
+    """
+    FrameBroadcaster by stream id.
+
+    Integer stream ids are cameras: they receive the camera monitor's frames
+    and fall back to reading the camera directly.
+    """
+
+    def __init__(self, fps: float = 15.0, jpeg_quality: int = 80, queue_size: int = 2):
+        """
+        Args:
+            fps: Maximum frames encoded per second for each stream
+            jpeg_quality: JPEG quality (0-100)
+            queue_size: Parts buffered per viewer before the oldest is dropped
+        """
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._broadcasters: Dict[Hashable, FrameBroadcaster] = {}
+
+    def get(self, stream_id: Hashable, frame_source: Optional[FrameSource] = None) -> FrameBroadcaster:
+        """
+        Broadcaster of a stream, created on first use.
+
+        Args:
+            stream_id: Camera id, or another key for non-camera streams
+            frame_source: Source for a new non-camera stream; cameras default to CaptureSource
+        """
+        with self._lock:
+            broadcaster = self._broadcasters.get(stream_id)
+            if broadcaster is None:
+                is_camera = isinstance(stream_id, int)
+                if frame_source is None and is_camera:
+                    frame_source = CaptureSource(stream_id)
+                broadcaster = self._broadcasters[stream_id] = FrameBroadcaster(
+                    stream_id,
+                    frame_source,
+                    fps=self.fps,
+                    jpeg_quality=self.jpeg_quality,
+                    queue_size=self.queue_size,
+                    publish_timeout=1.0 if is_camera else None
+                )
+            return broadcaster
+
+    async def mjpeg_stream(self, stream_id: Hashable, frame_source: Optional[FrameSource] = None,
+                           max_fps: Optional[float] = None,
+                           is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+                           ) -> AsyncGenerator[bytes, None]:
+        """
+        MJPEG parts of a stream for one viewer, until the viewer disconnects
+        or the stream is stopped.
+
+        Args:
+            stream_id: Camera id, or another key for non-camera streams
+            frame_source: Source for a new non-camera stream
+            max_fps: Frame rate limit for this viewer; frames in between are skipped
+            is_disconnected: Coroutine function reporting whether the viewer has gone,
+                e.g. Request.is_disconnected
+        """
+        broadcaster = self.get(stream_id, frame_source)
+        subscriber = broadcaster.subscribe(asyncio.get_running_loop())
+        interval = 1.0 / max_fps if max_fps else 0.0
+        next_frame_at = 0.0
+        try:
+            while not subscriber.closed:
+                if is_disconnected is not None and await is_disconnected():
+                    break
+                # Skipped frames are dropped from the queue, so the next one is the latest
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                part = await subscriber.aget(timeout=1.0)
+                if part is not None:
+                    next_frame_at = time.monotonic() + interval
+                    yield part
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    def publish(self, camera_id: int, frame: np.ndarray):
+        """Offer a camera's latest frame to its viewers, if it has any."""
+        broadcaster = self._broadcasters.get(camera_id)
+        if broadcaster is not None:
+            broadcaster.publish(frame)
+
+    def stop_all(self):
+        """Disconnect every viewer of every stream."""
+        with self._lock:
+            broadcasters = list(self._broadcasters.values())
+        for broadcaster in broadcasters:
+            broadcaster.stop()
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            broadcasters = list(self._broadcasters.values())
+        return {str(broadcaster.stream_id): broadcaster.get_stats() for broadcaster in broadcasters}
+
+# Global instance
+stream_broadcaster = StreamBroadcaster(
+    fps=settings.STREAM_FPS,
+    jpeg_quality=JPEG_QUALITY.get(settings.STREAM_QUALITY, JPEG_QUALITY['medium']),
+    queue_size=settings.STREAM_CLIENT_QUEUE_SIZE
+)
@@ -0,0 +1,43 @@
+"""
+Shared pytest configuration.
+Puts the backend directory on sys.path, as the scripts and the server do,
+so tests import modules as app.*, core.*, db.*, tasks.* and utils.*.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+backend_path = Path(__file__).resolve().parent.parent
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+# attendance_logs as in Postgres, minus partitioning; the model's composite
+# autoincrement key cannot be created on sqlite
+ATTENDANCE_LOGS_DDL = text("""
+    CREATE TABLE attendance_logs (
+        id INTEGER NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        timestamp DATETIME NOT NULL,
+        status VARCHAR NOT NULL,
+        camera_id INTEGER,
+        event_type VARCHAR,
+        confidence_score FLOAT,
+        notes TEXT,
+        event_key VARCHAR(32),
+        created_at DATETIME,
+        PRIMARY KEY (id, timestamp)
+    )
+""")
+
+@pytest.fixture
+def db():
+    """sqlite session with an empty attendance_logs table."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(ATTENDANCE_LOGS_DDL)
+    with Session(engine) as session:
+        yield session
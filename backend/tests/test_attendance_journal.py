@@ -0,0 +1,106 @@
+"""
+Attendance write-ahead journal tests.
+"""
+
+import os
+from datetime import datetime
+
+from db.attendance_journal import AttendanceJournal
+
+def record(n):
+    return {'employee_id': f"E{n}", 'event_type': 'entry', 'timestamp': datetime(2024, 3, 4, 9, n % 60)}
+
+def open_journal(path, **kwargs):
+    journal = AttendanceJournal(str(path), **kwargs)
+    journal.open()
+    return journal
+
+def employees(records):
+    return [row['employee_id'] for _, row in records]
+
+def test_append_and_read_from_checkpoint(tmp_path):
+    journal = open_journal(tmp_path)
+    positions = [journal.append(record(n)) for n in range(5)]
+
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E0", "E1", "E2", "E3", "E4"]
+    assert employees(journal.read_from(positions[1], 100)) == ["E2", "E3", "E4"]
+    assert employees(journal.read_from(journal.checkpoint, 2)) == ["E0", "E1"]
+    # Timestamps are stored as ISO strings
+    assert journal.read_from(journal.checkpoint, 1)[0][1]['timestamp'] == "2024-03-04T09:00:00"
+    journal.close()
+
+def test_torn_record_is_skipped_after_reopen(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append(record(1))
+    journal.close()
+
+    # Crash in the middle of writing the next record
+    [segment] = [name for name in os.listdir(tmp_path) if name.endswith(".jsonl")]
+    with open(tmp_path / segment, 'ab') as f:
+        f.write(b'{"employee_id":"E2","event_ty')
+
+    journal = open_journal(tmp_path)
+    journal.append(record(3))
+
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E1", "E3"]
+    assert journal.stats['corrupt_records'] == 1
+    journal.close()
+
+def test_partial_record_at_live_end_is_not_read(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append(record(1))
+    journal._file.write(b'{"employee_id":"E2"')
+
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E1"]
+    assert journal.stats['corrupt_records'] == 0
+
+def test_segments_rotate_and_are_read_in_order(tmp_path):
+    journal = open_journal(tmp_path, segment_max_bytes=200)
+    for n in range(10):
+        journal.append(record(n))
+
+    assert journal.pending_segments() > 2
+    assert employees(journal.read_from(journal.checkpoint, 100)) == [f"E{n}" for n in range(10)]
+    journal.close()
+
+def test_commit_deletes_segments_before_checkpoint(tmp_path):
+    journal = open_journal(tmp_path, segment_max_bytes=200)
+    positions = [journal.append(record(n)) for n in range(10)]
+    segments_before = journal.pending_segments()
+
+    journal.commit(positions[6])
+
+    assert journal.checkpoint == positions[6]
+    assert journal.pending_segments() == segments_before - positions[6][0]
+    assert journal.stats['segments_deleted'] == positions[6][0]
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E7", "E8", "E9"]
+
+    # Older positions never move the checkpoint back
+    journal.commit(positions[2])
+    assert journal.checkpoint == positions[6]
+    journal.close()
+
+def test_checkpoint_survives_restart(tmp_path):
+    journal = open_journal(tmp_path)
+    positions = [journal.append(record(n)) for n in range(4)]
+    journal.commit(positions[1])
+    journal.close()
+
+    journal = open_journal(tmp_path)
+    assert journal.checkpoint == positions[1]
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E2", "E3"]
+    journal.append(record(4))
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E2", "E3", "E4"]
+    journal.close()
+
+def test_invalid_checkpoint_replays_from_start(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append(record(1))
+    journal.commit(journal.end_position)
+    journal.close()
+    (tmp_path / AttendanceJournal.CHECKPOINT_FILE).write_text("not json")
+
+    journal = open_journal(tmp_path)
+    assert journal.checkpoint == (0, 0)
+    assert employees(journal.read_from(journal.checkpoint, 100)) == ["E1"]
+    journal.close()
@@ -0,0 +1,90 @@
+"""
+Session pairing tests: the live camera-side service and pairing of
+persisted attendance logs for reports.
+"""
+
+from datetime import datetime, timedelta
+
+from core.attendance_pairing import SessionPairingService, hours_worked, pair_sessions
+from db.attendance_queries import build_session_events_query
+from db.db_models import AttendanceLog
+
+T0 = datetime(2024, 3, 4, 9, 0)
+DAY = T0.date()
+
+def add_log(db, log_id, employee_id, status, timestamp, event_type=None, camera_id=None):
+    db.add(AttendanceLog(id=log_id, employee_id=employee_id, status=status, timestamp=timestamp,
+                         event_type=event_type, camera_id=camera_id))
+
+def persisted_sessions(db, employee_id=None, max_session_hours=16.0):
+    stmt = build_session_events_query(DAY, timedelta(hours=max_session_hours), employee_id)
+    return pair_sessions(db.execute(stmt).all(), DAY, employee_id=employee_id,
+                         max_session_hours=max_session_hours)
+
+def test_pairs_camera_events_across_cameras(db):
+    add_log(db, 1, "E1", "present", T0, "entry", camera_id=1)
+    add_log(db, 2, "E1", "absent", T0 + timedelta(hours=8), "exit", camera_id=2)
+    db.commit()
+
+    [session] = persisted_sessions(db)
+    assert (session.check_in, session.check_in_camera) == (T0, 1)
+    assert (session.check_out, session.check_out_camera) == (T0 + timedelta(hours=8), 2)
+    assert hours_worked([session]) == {"E1": 8.0}
+
+def test_manual_marks_count_as_entry_and_exit(db):
+    add_log(db, 1, "E1", "present", T0)
+    add_log(db, 2, "E1", "absent", T0 + timedelta(hours=4, minutes=30))
+    db.commit()
+
+    assert hours_worked(persisted_sessions(db)) == {"E1": 4.5}
+
+def test_exit_after_midnight_closes_session_of_the_day(db):
+    late = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=22)
+    add_log(db, 1, "E1", "present", late, "entry")
+    add_log(db, 2, "E1", "absent", late + timedelta(hours=6), "exit")
+    db.commit()
+
+    assert hours_worked(persisted_sessions(db)) == {"E1": 6.0}
+
+def test_other_days_and_employees_are_excluded(db):
+    add_log(db, 1, "E1", "present", T0 - timedelta(days=2), "entry")
+    add_log(db, 2, "E1", "absent", T0 - timedelta(days=2) + timedelta(hours=1), "exit")
+    add_log(db, 3, "E2", "present", T0, "entry")
+    add_log(db, 4, "E2", "absent", T0 + timedelta(hours=2), "exit")
+    add_log(db, 5, "E3", "present", T0, "entry")
+    add_log(db, 6, "E3", "absent", T0 + timedelta(hours=3), "exit")
+    db.commit()
+
+    assert hours_worked(persisted_sessions(db)) == {"E2": 2.0, "E3": 3.0}
+    assert [s.employee_id for s in persisted_sessions(db, employee_id="E3")] == ["E3"]
+
+def test_session_left_open_past_limit_is_incomplete(db):
+    add_log(db, 1, "E1", "present", T0, "entry")
+    add_log(db, 2, "E2", "present", T0 + timedelta(hours=3), "entry")
+    db.commit()
+
+    sessions = persisted_sessions(db, max_session_hours=2.0)
+    assert [(s.employee_id, s.is_complete, s.check_out) for s in sessions] == [
+        ("E1", False, None), ("E2", False, None)
+    ]
+    assert hours_worked(sessions) == {"E1": 0.0, "E2": 0.0}
+
+def test_live_service_expires_from_heaps():
+    pairing = SessionPairingService(retention_days=1, max_session_hours=2)
+    pairing.record_event("A", "entry", 1, T0)
+    pairing.record_event("B", "entry", 1, T0 + timedelta(minutes=30))
+    # Out-of-order entry moves B's check-in earlier, so it expires earlier too
+    pairing.record_event("B", "entry", 1, T0 - timedelta(minutes=30))
+    pairing.record_event("C", "entry", 1, T0 + timedelta(hours=1))
+    pairing.record_event("C", "exit", 2, T0 + timedelta(hours=1, minutes=10))
+    pairing.record_event("D", "entry", 1, T0 + timedelta(hours=2, minutes=1))
+
+    assert pairing.get_open_session("A") is None
+    assert pairing.get_open_session("B") is None
+    assert pairing.get_open_session("D") is not None
+    assert pairing.stats["sessions_expired"] == 2
+
+    # A day later only D's events are inside the one-day window
+    pairing.record_event("E", "entry", 1, T0 + timedelta(hours=26))
+    assert pairing.get_recent_events("A") == []
+    assert len(pairing.get_recent_events("D")) == 1
@@ -0,0 +1,75 @@
+"""
+Attendance state machine tests: one event per real transition, with
+debouncing of lingering and re-entry within the cooldown window.
+"""
+
+from core.attendance_state import AttendanceStateMachine
+
+COOLDOWN = 300.0
+
+def sightings(machine, employee_id, camera_id, camera_type, timestamps, event_type=None):
+    """Events emitted for a series of sightings."""
+    return [machine.process(employee_id, camera_id, camera_type, t, event_type) for t in timestamps]
+
+def test_lingering_employee_produces_one_event():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    events = sightings(machine, "E1", 1, 'entry', range(0, 600, 10))
+
+    assert events[0] == 'entry'
+    assert events[1:] == [None] * (len(events) - 1)
+    assert machine.stats == {'sightings': 60, 'events': 1, 'suppressed': 59}
+
+def test_reentry_within_cooldown_is_debounced():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    assert sightings(machine, "E1", 1, 'entry', [0, 200, 450]) == ['entry', None, None]
+    # Out of view for longer than the cooldown since the last sighting
+    assert sightings(machine, "E1", 1, 'entry', [751, 800]) == ['entry', None]
+
+def test_touch_keeps_employee_in_view():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    assert machine.process("E1", 1, 'entry', 0) == 'entry'
+    for t in range(100, 1000, 100):
+        machine.touch("E1", 1, t)
+    assert machine.process("E1", 1, 'entry', 1000) is None
+
+def test_general_camera_toggles_entry_and_exit():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    events = sightings(machine, "E1", 1, 'general', [0, 100, 1000, 1100, 2000])
+
+    assert events == ['entry', None, 'exit', None, 'entry']
+
+def test_explicit_crossing_in_both_directions():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    # Crossings are transitions even while the employee stays in view
+    assert machine.process("E1", 1, 'general', 0, 'entry') == 'entry'
+    assert machine.process("E1", 1, 'general', 5, 'entry') is None
+    assert machine.process("E1", 1, 'general', 10, 'exit') == 'exit'
+    assert machine.process("E1", 1, 'general', 20, 'entry') == 'entry'
+    assert machine.get_last_event("E1", 1) == ('entry', 20)
+
+def test_state_is_per_employee_and_camera():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN)
+
+    assert machine.process("E1", 1, 'entry', 0) == 'entry'
+    assert machine.process("E2", 1, 'entry', 1) == 'entry'
+    assert machine.process("E1", 2, 'exit', 2) == 'exit'
+    assert machine.process("E1", 1, 'entry', 3) is None
+
+    machine.reset(camera_id=1)
+    assert machine.get_last_event("E1", 1) is None
+    assert machine.get_last_event("E1", 2) == ('exit', 2)
+    assert machine.process("E1", 1, 'entry', 4) == 'entry'
+
+def test_idle_state_is_pruned():
+    machine = AttendanceStateMachine(cooldown_seconds=COOLDOWN, retention_seconds=3600, prune_interval=2)
+
+    machine.process("E1", 1, 'entry', 0)
+    machine.process("E2", 1, 'entry', 4000)
+
+    assert machine.get_last_event("E1", 1) is None
+    assert machine.get_last_event("E2", 1) == ('entry', 4000)
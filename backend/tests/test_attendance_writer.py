@@ -0,0 +1,200 @@
+"""
+Batched attendance writer tests.
+A fake session stands in for Postgres: it applies the writer's
+ON CONFLICT DO NOTHING insert against an in-memory table keyed by
+event_key, and can be told to fail.
+"""
+
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from db.attendance_journal import AttendanceJournal
+from db.attendance_writer import AttendanceWriter
+
+T0 = datetime(2024, 3, 4, 9, 0)
+
+InsertedRow = namedtuple('InsertedRow', 'employee_id timestamp status event_type camera_id')
+
+class FakeDatabase:
+    """Committed attendance rows by event key, plus failure injection."""
+
+    def __init__(self):
+        self.rows = {}
+        self.transient_failures = 0
+        self.rejected_employees = set()
+        self.insert_attempts = 0
+
+    def session(self):
+        return FakeSession(self)
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.pending = {}
+
+    def execute(self, statement, params=None):
+        table = getattr(statement, 'table', None)
+        if table is None or table.name != 'attendance_logs':
+            # Daily summary lock and upsert
+            return FakeResult([])
+
+        self.database.insert_attempts += 1
+        if self.database.transient_failures:
+            self.database.transient_failures -= 1
+            raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+        bad = [row for row in params if row['employee_id'] in self.database.rejected_employees]
+        if bad:
+            raise IntegrityError("INSERT", {}, Exception(f"rejected {bad[0]['employee_id']}"))
+
+        inserted = []
+        for row in params:
+            if row['event_key'] in self.database.rows or row['event_key'] in self.pending:
+                continue
+            self.pending[row['event_key']] = row
+            inserted.append(InsertedRow(row['employee_id'], row['timestamp'], row['status'],
+                                        row['event_type'], row['camera_id']))
+        return FakeResult(inserted)
+
+    def commit(self):
+        self.database.rows.update(self.pending)
+        self.pending = {}
+
+    def rollback(self):
+        self.pending = {}
+
+    def close(self):
+        pass
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+@pytest.fixture
+def database():
+    return FakeDatabase()
+
+def make_writer(database, tmp_path=None, **kwargs):
+    journal = AttendanceJournal(str(tmp_path / "journal")) if tmp_path is not None else None
+    kwargs.setdefault('flush_interval', 0.02)
+    kwargs.setdefault('retry_max_delay', 0.01)
+    return AttendanceWriter(session_factory=database.session, journal=journal, **kwargs)
+
+def enqueue_events(writer, employee_ids):
+    for n, employee_id in enumerate(employee_ids):
+        assert writer.enqueue(employee_id=employee_id, camera_id=1, event_type='entry',
+                              timestamp=T0 + timedelta(seconds=n))
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def written_employees(database):
+    return sorted(row['employee_id'] for row in database.rows.values())
+
+def test_events_are_written_in_batches(database):
+    writer = make_writer(database, batch_size=4)
+    enqueue_events(writer, [f"E{n}" for n in range(10)])
+    writer.stop()
+
+    assert written_employees(database) == sorted(f"E{n}" for n in range(10))
+    metrics = writer.get_metrics()
+    assert metrics['written'] == 10
+    assert metrics['batches'] >= 3
+
+def test_transient_error_is_retried(database):
+    database.transient_failures = 2
+    writer = make_writer(database)
+    enqueue_events(writer, ["E1", "E2"])
+    wait_until(lambda: len(database.rows) == 2)
+    writer.stop()
+
+    assert written_employees(database) == ["E1", "E2"]
+    assert writer.get_metrics()['retries'] == 2
+
+def test_stop_during_outage_leaves_events_in_journal(database, tmp_path):
+    database.transient_failures = 1000
+    writer = make_writer(database, tmp_path)
+    enqueue_events(writer, ["E1", "E2"])
+    wait_until(lambda: database.insert_attempts > 0)
+    writer.stop()
+    assert written_employees(database) == []
+
+    # The database is back on the next start
+    database.transient_failures = 0
+    writer = make_writer(database, tmp_path)
+    writer.start()
+    writer.stop()
+    assert written_employees(database) == ["E1", "E2"]
+
+def test_rejected_rows_are_dead_lettered(database, tmp_path):
+    dead_letter_path = tmp_path / "dead_letter.jsonl"
+    database.rejected_employees = {"BAD"}
+    writer = make_writer(database, tmp_path, batch_size=8, dead_letter_path=str(dead_letter_path))
+    enqueue_events(writer, ["E1", "BAD", "E2", "E3", "BAD", "E4"])
+    writer.stop()
+
+    assert written_employees(database) == ["E1", "E2", "E3", "E4"]
+    dead_letters = [json.loads(line) for line in dead_letter_path.read_text().splitlines()]
+    assert [entry['row']['employee_id'] for entry in dead_letters] == ["BAD", "BAD"]
+    assert all("rejected BAD" in entry['error'] for entry in dead_letters)
+    assert writer.get_metrics()['dead_lettered'] == 2
+
+    # The checkpoint moved past the rejected rows, so nothing is replayed
+    journal = AttendanceJournal(str(tmp_path / "journal"))
+    journal.open()
+    assert journal.read_from(journal.checkpoint, 100) == []
+    journal.close()
+
+def test_journaled_events_are_replayed_after_restart(database, tmp_path):
+    # Events journaled by a process that died before writing them
+    journal = AttendanceJournal(str(tmp_path / "journal"))
+    journal.open()
+    for n in range(3):
+        journal.append({'employee_id': f"E{n}", 'camera_id': 1, 'event_type': 'entry', 'status': 'present',
+                        'confidence_score': 0.9, 'timestamp': T0 + timedelta(seconds=n), 'notes': None,
+                        'event_key': f"key{n}"})
+    journal.close()
+    # One of them reached the database before the crash
+    database.rows["key0"] = {'employee_id': "E0"}
+
+    writer = make_writer(database, tmp_path)
+    writer.start()
+    writer.stop()
+
+    assert written_employees(database) == ["E0", "E1", "E2"]
+    metrics = writer.get_metrics()
+    assert metrics['replayed'] == 3
+    assert metrics['written'] == 2
+    assert metrics['duplicates'] == 1
+
+    # A second restart has nothing left to replay
+    writer = make_writer(database, tmp_path)
+    writer.start()
+    writer.stop()
+    assert writer.get_metrics()['replayed'] == 0
+
+def test_enqueue_after_stop_is_rejected(database, tmp_path):
+    writer = make_writer(database, tmp_path)
+    enqueue_events(writer, ["E1"])
+    writer.stop()
+
+    assert not writer.enqueue(employee_id="E2", camera_id=1, event_type='entry', timestamp=T0)
+    assert not writer.is_running
+    assert writer.get_metrics()['rejected'] == 1
+    assert written_employees(database) == ["E1"]
+
+    # An explicit start accepts events again
+    writer.start()
+    enqueue_events(writer, ["E3"])
+    writer.stop()
+    assert written_employees(database) == ["E1", "E3"]
@@ -0,0 +1,139 @@
+"""
+Face tracker tests: association across frames, identity hand-off, track
+expiry, and agreement between Hungarian and greedy assignment.
+"""
+
+import numpy as np
+import pytest
+
+from core import face_tracker
+from core.face_tracker import FaceTracker, box_iou_matrix
+
+def face(x, y, employee_id=None, confidence=0.9, embedding=None, size=100):
+    """Face detection with a size x size box at (x, y)."""
+    face_data = {'bbox': [x, y, x + size, y + size], 'employee_id': employee_id, 'confidence': confidence}
+    if embedding is not None:
+        face_data['embedding'] = embedding
+    return face_data
+
+@pytest.fixture(params=['hungarian', 'greedy'])
+def assignment(request, monkeypatch):
+    """Run a test with scipy's Hungarian assignment and with the greedy fallback."""
+    if request.param == 'greedy':
+        monkeypatch.setattr(face_tracker, 'linear_sum_assignment', None)
+    return request.param
+
+def test_box_iou_matrix():
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=np.float32)
+    iou = box_iou_matrix(boxes, boxes)
+
+    assert np.allclose(np.diag(iou), 1.0)
+    assert iou[0, 1] == pytest.approx(50 / 150)
+    assert iou[0, 2] == 0.0
+
+def test_stationary_face_keeps_one_track_and_one_new_identity(assignment):
+    tracker = FaceTracker(max_age=2.0)
+
+    results = [tracker.update([face(100, 100, "E1")], 0.1 * i)[0] for i in range(20)]
+
+    assert {r['track_id'] for r in results} == {1}
+    assert [r['new_identity'] for r in results] == [True] + [False] * 19
+    assert tracker.track_count == 1
+
+def test_moving_faces_keep_their_tracks(assignment):
+    tracker = FaceTracker(max_age=2.0)
+
+    # Two faces walk towards each other; velocity prediction keeps them apart
+    for step in range(10):
+        left, right = tracker.update([face(100 + 30 * step, 200, "E1"), face(800 - 30 * step, 200, "E2")],
+                                     0.1 * step)
+        assert (left['track_id'], right['track_id']) == (1, 2)
+
+    _, _, employee_ids, _ = tracker.get_track_state()
+    assert employee_ids == ["E1", "E2"]
+
+def test_detection_order_does_not_change_assignment(assignment):
+    tracker = FaceTracker()
+    tracker.update([face(100, 100, "E1"), face(400, 100, "E2"), face(700, 100, "E3")], 0.0)
+
+    results = tracker.update([face(705, 100), face(95, 100), face(400, 105)], 0.1)
+
+    assert [r['track_id'] for r in results] == [3, 1, 2]
+    assert not any(r['new_identity'] for r in results)
+
+def test_track_id_not_reused_after_expiry(assignment):
+    tracker = FaceTracker(max_age=2.0, initial_capacity=1)
+
+    [first] = tracker.update([face(100, 100, "E1")], 0.0)
+    [within_age] = tracker.update([face(100, 100, "E1")], 1.5)
+    assert within_age['track_id'] == first['track_id']
+    assert not within_age['new_identity']
+
+    # After max_age without a match the track expires; the slot is reused but
+    # the person gets a fresh track id and is reported as a new identity again
+    [after_expiry] = tracker.update([face(100, 100, "E1")], 4.0)
+    assert after_expiry['track_id'] == 2
+    assert after_expiry['new_identity']
+    assert tracker.capacity == 1
+    assert tracker.track_count == 1
+
+def test_storage_grows_beyond_initial_capacity(assignment):
+    tracker = FaceTracker(initial_capacity=2)
+
+    results = tracker.update([face(200 * i, 0, f"E{i}") for i in range(5)], 0.0)
+    assert [r['track_id'] for r in results] == [1, 2, 3, 4, 5]
+    assert tracker.capacity >= 5
+
+    results = tracker.update([face(200 * i, 0) for i in range(5)], 0.1)
+    assert [r['track_id'] for r in results] == [1, 2, 3, 4, 5]
+    assert [t['employee_id'] for t in tracker.get_tracks()] == [f"E{i}" for i in range(5)]
+
+def test_identity_replaced_only_by_more_confident_match(assignment):
+    tracker = FaceTracker(min_identity_confidence=0.5)
+
+    assert tracker.update([face(100, 100, "E1", confidence=0.4)], 0.0)[0]['new_identity'] is False
+    assert tracker.update([face(100, 100, "E1", confidence=0.7)], 0.1)[0]['new_identity'] is True
+    assert tracker.update([face(100, 100, "E2", confidence=0.6)], 0.2)[0]['new_identity'] is False
+    assert tracker.update([face(100, 100, "E2", confidence=0.8)], 0.3)[0]['new_identity'] is True
+
+    _, _, employee_ids, confidences = tracker.get_track_state()
+    assert employee_ids == ["E2"]
+    assert confidences[0] == pytest.approx(0.8)
+
+def test_embedding_match_bridges_a_jump(assignment):
+    tracker = FaceTracker(max_cost=0.7, iou_weight=0.5)
+    embedding_a = np.eye(8, dtype=np.float32)[0]
+    embedding_b = np.eye(8, dtype=np.float32)[1]
+
+    tracker.update([face(100, 100, "E1", embedding=embedding_a), face(300, 100, "E2", embedding=embedding_b)], 0.0)
+
+    # Face A moves far enough that IoU alone would start a new track
+    a, b = tracker.update([face(160, 100, embedding=embedding_a), face(300, 100, embedding=embedding_b)], 0.1)
+    assert (a['track_id'], b['track_id']) == (1, 2)
+
+def test_detection_without_box_is_a_new_sighting(assignment):
+    tracker = FaceTracker()
+
+    [result] = tracker.update([{'bbox': None, 'employee_id': "E1", 'confidence': 0.9}], 0.0)
+    assert result['track_id'] is None
+    assert result['new_identity']
+    assert tracker.track_count == 0
+
+def test_hungarian_and_greedy_agree_on_random_scenes(monkeypatch):
+    rng = np.random.default_rng(3)
+    hungarian = FaceTracker(max_age=0.5)
+    greedy = FaceTracker(max_age=0.5)
+
+    people = rng.uniform(0, 1800, (8, 2))
+    for step in range(200):
+        people = np.clip(people + rng.normal(0, 5, people.shape), 0, 1800)
+        visible = np.flatnonzero(rng.random(len(people)) > 0.2)
+        detections = [face(*people[i], employee_id=f"E{i}") for i in visible]
+
+        expected = hungarian.update(detections, 0.1 * step)
+        monkeypatch.setattr(face_tracker, 'linear_sum_assignment', None)
+        actual = greedy.update(detections, 0.1 * step)
+        monkeypatch.undo()
+
+        assert [(r['track_id'], r['new_identity']) for r in actual] == \
+            [(r['track_id'], r['new_identity']) for r in expected]
@@ -0,0 +1,90 @@
+"""
+Presence registry tests.
+The API process serves the present list from its own registry; logs
+written by the camera workers in another process must reach it through
+sync_presence.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app.config import settings
+from core import presence_registry as presence_module
+from core.presence_registry import PresenceRegistry, ensure_presence_loaded
+from db.db_models import AttendanceLog
+
+T0 = datetime(2024, 3, 4, 9, 0)
+
+# LATEST_STATUS_SQL uses LATERAL, which sqlite lacks
+SQLITE_LATEST_STATUS_SQL = text("""
+    SELECT l.employee_id, l.status, l.timestamp
+    FROM attendance_logs l
+    WHERE l.timestamp = (
+        SELECT MAX(timestamp) FROM attendance_logs WHERE employee_id = l.employee_id
+    )
+""")
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A fresh in-memory registry as the API process has, synced on every call."""
+    registry = PresenceRegistry()
+    monkeypatch.setattr(presence_module, "presence_registry", registry)
+    monkeypatch.setattr(
+        presence_module, "load_latest_statuses",
+        lambda db: [tuple(row) for row in db.execute(SQLITE_LATEST_STATUS_SQL)]
+    )
+    monkeypatch.setattr(settings, "PRESENCE_SYNC_SECONDS", 0.0)
+    return registry
+
+def write_log(db, log_id, employee_id, status, timestamp, camera_id=None):
+    """Insert a log the way another process would: nothing notifies this registry."""
+    db.add(AttendanceLog(id=log_id, employee_id=employee_id, status=status, timestamp=timestamp,
+                         camera_id=camera_id, event_type='entry' if status == 'present' else 'exit'))
+    db.commit()
+
+def present_ids(registry):
+    return set(registry.get_present()[1])
+
+def test_camera_event_changes_present_list(db, registry):
+    write_log(db, 1, "E1", "present", T0)
+    ensure_presence_loaded(db)
+    assert present_ids(registry) == {"E1"}
+    version_before = registry.get_present()[0]
+
+    # Camera workers record an entry and an exit in their own process
+    write_log(db, 2, "E2", "present", T0 + timedelta(minutes=5), camera_id=1)
+    write_log(db, 3, "E1", "absent", T0 + timedelta(minutes=6), camera_id=2)
+
+    ensure_presence_loaded(db)
+    assert present_ids(registry) == {"E2"}
+    assert registry.get_present()[0] != version_before
+    assert registry.watermark == 3
+
+def test_sync_waits_for_interval(db, registry, monkeypatch):
+    ensure_presence_loaded(db)
+    monkeypatch.setattr(settings, "PRESENCE_SYNC_SECONDS", 3600.0)
+
+    write_log(db, 1, "E1", "present", T0)
+    ensure_presence_loaded(db)
+    assert present_ids(registry) == set()
+
+def test_older_log_does_not_override_newer_status(db, registry):
+    write_log(db, 1, "E1", "present", T0 + timedelta(hours=1))
+    ensure_presence_loaded(db)
+
+    # Replayed from a camera journal after a newer manual mark
+    write_log(db, 2, "E1", "absent", T0)
+    ensure_presence_loaded(db)
+    assert present_ids(registry) == {"E1"}
+
+def test_large_backlog_triggers_full_reload(db, registry, monkeypatch):
+    ensure_presence_loaded(db)
+    monkeypatch.setattr(presence_module, "SYNC_BATCH_SIZE", 2)
+
+    for log_id in range(1, 5):
+        write_log(db, log_id, f"E{log_id}", "present", T0 + timedelta(minutes=log_id))
+    ensure_presence_loaded(db)
+    assert present_ids(registry) == {"E1", "E2", "E3", "E4"}
+    assert registry.watermark == 4
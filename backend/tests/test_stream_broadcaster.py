@@ -0,0 +1,48 @@
+"""
+Frame source and broadcaster tests.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from tasks.stream_broadcaster import FrameBroadcaster, FrameSource
+
+class CountingSource(FrameSource):
+    def __init__(self):
+        self.reads = 0
+        self.released = 0
+
+    def read(self):
+        self.reads += 1
+        return np.zeros((16, 16, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released += 1
+
+def test_frame_source_requires_read():
+    class NoRead(FrameSource):
+        pass
+
+    with pytest.raises(TypeError):
+        FrameSource()
+    with pytest.raises(TypeError):
+        NoRead()
+
+def test_source_frames_reach_subscribers_and_source_is_released():
+    source = CountingSource()
+    broadcaster = FrameBroadcaster("test", source, fps=50.0, publish_timeout=None)
+
+    subscriber = broadcaster.subscribe()
+    part = subscriber.get(timeout=2.0)
+    assert part.startswith(b'--frame\r\nContent-Type: image/jpeg\r\n\r\n')
+
+    broadcaster.unsubscribe(subscriber)
+    deadline = time.monotonic() + 2.0
+    while broadcaster.get_stats()['running'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not broadcaster.get_stats()['running']
+    assert source.reads >= 1
+    assert source.released == 1
@@ -0,0 +1,116 @@
+"""
+Tripwire engine tests, including equivalence of the vectorized side update
+with a plain per-track, per-tripwire loop.
+"""
+
+import numpy as np
+
+from core.tripwire_engine import FORWARD_EVENT_TYPES, TripwireEngine
+from utils.camera_config_loader import TripwireConfig
+
+FRAME = (1000, 1000)
+
+def box_at(x, y, size=40):
+    """Pixel box centred on normalized (x, y) in FRAME."""
+    cx, cy = x * FRAME[0], y * FRAME[1]
+    return [cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2]
+
+def walk(engine, track_id, points, employee_id="E1"):
+    """Feed one track through a sequence of normalized centres and collect its events."""
+    events = []
+    for x, y in points:
+        events.extend(engine.update([track_id], [box_at(x, y)], FRAME, [employee_id]))
+    return events
+
+def reference_update(tripwires, state, track_ids, centers):
+    """Scalar crossing detection: one track and one tripwire at a time."""
+    events = []
+    new_state = {}
+    for track_id, (x, y) in zip(track_ids, centers):
+        for wire in tripwires:
+            coordinate = y if wire.direction == 'horizontal' else x
+            offset = coordinate - wire.position
+            if abs(offset) <= wire.spacing:
+                side = 0
+            else:
+                side = 1 if offset > 0 else -1
+
+            previous = state.get((track_id, wire.name), side)
+            if side != 0 and previous != 0 and side != previous:
+                forward, backward = FORWARD_EVENT_TYPES[wire.detection_type]
+                events.append((track_id, wire.name, forward if side > 0 else backward))
+            new_state[(track_id, wire.name)] = side if side != 0 else previous
+    return events, new_state
+
+def test_horizontal_entry_wire_in_both_directions():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry')])
+
+    [event] = walk(engine, 1, [(0.5, 0.2), (0.5, 0.4), (0.5, 0.6), (0.5, 0.8)])
+    assert (event['event_type'], event['direction'], event['tripwire']) == ('entry', 'forward', 'door')
+    assert (event['track_id'], event['employee_id']) == (1, "E1")
+
+    [event] = walk(engine, 1, [(0.5, 0.6), (0.5, 0.3)])
+    assert (event['event_type'], event['direction']) == ('exit', 'backward')
+
+def test_vertical_exit_wire_in_both_directions():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'vertical', 'gate', 'exit')])
+
+    [event] = walk(engine, 1, [(0.2, 0.5), (0.8, 0.5)])
+    assert (event['event_type'], event['direction']) == ('exit', 'forward')
+
+    [event] = walk(engine, 1, [(0.2, 0.5)])
+    assert (event['event_type'], event['direction']) == ('entry', 'backward')
+
+def test_jitter_inside_band_does_not_cross():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry')])
+
+    assert walk(engine, 1, [(0.5, 0.4), (0.5, 0.47), (0.5, 0.53), (0.5, 0.46), (0.5, 0.54)]) == []
+    # Leaving the band on the far side completes the crossing
+    assert [e['event_type'] for e in walk(engine, 1, [(0.5, 0.6)])] == ['entry']
+
+def test_track_first_seen_past_the_line_does_not_cross():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry')])
+
+    assert walk(engine, 1, [(0.5, 0.5), (0.5, 0.8)]) == []
+    assert walk(engine, 2, [(0.5, 0.8), (0.5, 0.9)]) == []
+
+def test_dropped_track_forgets_its_side():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry')])
+    walk(engine, 1, [(0.5, 0.2)])
+
+    # Track 1 is not live in this update, so a later track 1 starts fresh
+    engine.update([2], [box_at(0.1, 0.1)], FRAME)
+    assert walk(engine, 1, [(0.5, 0.8)]) == []
+
+def test_inactive_and_missing_tripwires_emit_nothing():
+    engine = TripwireEngine([TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry', is_active=False)])
+    assert engine.tripwire_count == 0
+    assert walk(engine, 1, [(0.5, 0.2), (0.5, 0.8)]) == []
+
+def test_matches_scalar_reference_on_random_tracks():
+    tripwires = [
+        TripwireConfig(0.5, 0.05, 'horizontal', 'door', 'entry'),
+        TripwireConfig(0.3, 0.02, 'vertical', 'gate', 'exit'),
+        TripwireConfig(0.7, 0.0, 'vertical', 'aisle', 'counting'),
+    ]
+    engine = TripwireEngine(tripwires)
+    rng = np.random.default_rng(7)
+
+    positions = {track_id: rng.uniform(0.05, 0.95, 2) for track_id in range(1, 13)}
+    state = {}
+    total_events = 0
+    for _ in range(300):
+        # Tracks wander and drop out at random; their state is forgotten when they do
+        live = sorted(t for t in positions if rng.random() > 0.1)
+        for track_id in live:
+            positions[track_id] = np.clip(positions[track_id] + rng.normal(0, 0.05, 2), 0.01, 0.99)
+        boxes = np.array([box_at(*positions[t]) for t in live], dtype=np.float32)
+        centers = [((x1 + x2) / (2.0 * FRAME[0]), (y1 + y2) / (2.0 * FRAME[1])) for x1, y1, x2, y2 in boxes]
+
+        expected, state = reference_update(tripwires, state, live, centers)
+        actual = engine.update(np.array(live), boxes, FRAME)
+
+        assert sorted((e['track_id'], e['tripwire'], e['event_type']) for e in actual) == sorted(expected)
+        total_events += len(expected)
+
+    assert total_events > 50
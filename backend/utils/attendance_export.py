@@ -0,0 +1,197 @@
+"""
+Attendance bulk export
+Streams attendance joined with employee data as gzip CSV, Parquet or Arrow
+IPC, built chunk by chunk from a server-side cursor so memory use does not
+depend on the size of the export.
+"""
+
+import csv
+import gzip
+import io
+import os
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import Select
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from db.attendance_queries import ATTENDANCE_ROW_COLUMNS
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_COLUMNS = [column.key for column in ATTENDANCE_ROW_COLUMNS]
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Characters allowed in download file names; anything else becomes '_'
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+def is_format_available(fmt: str) -> bool:
+    """Whether an export format can be produced with the installed packages."""
+    return fmt in EXPORT_FORMATS and (fmt not in COLUMNAR_FORMATS or pa is not None)
+
+def _arrow_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('employee_id', pa.string()),
+        ('employee_name', pa.string()),
+        ('department', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('status', pa.string()),
+        ('event_type', pa.string()),
+        ('camera_id', pa.int32()),
+        ('confidence_score', pa.float64()),
+        ('notes', pa.string()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only file object whose contents are drained after each chunk."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_export_chunks(session, stmt: Select, fmt: str, chunk_size: int = 5000,
+                       progress: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """
+    Generate an export file as a sequence of byte chunks.
+
+    Args:
+        session: Session dedicated to the export
+        stmt: Query from build_attendance_query
+        fmt: 'csv' (gzip-compressed), 'parquet' or 'arrow' (IPC stream)
+        chunk_size: Rows fetched and encoded per chunk
+        progress: Called with the running row count after each chunk
+
+    Yields:
+        Encoded bytes; concatenated they form the complete file
+    """
+    if not is_format_available(fmt):
+        raise ValueError(f"Export format '{fmt}' is not available")
+
+    result = session.execute(stmt.execution_options(yield_per=chunk_size))
+    buffer = _ChunkBuffer()
+    rows_written = 0
+
+    if fmt == 'csv':
+        gz = gzip.GzipFile(fileobj=buffer, mode='wb')
+        text = io.TextIOWrapper(gz, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_COLUMNS)
+        for partition in result.partitions():
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in partition
+            )
+            text.flush()
+            rows_written += len(partition)
+            if progress:
+                progress(rows_written)
+            yield buffer.drain()
+        # Closing the text wrapper closes the gzip stream and writes its trailer
+        text.close()
+        yield buffer.drain()
+        return
+
+    schema = _arrow_schema()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(buffer, schema, compression='snappy')
+        write_batch = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = pa.ipc.new_stream(buffer, schema)
+        write_batch = writer.write_batch
+
+    for partition in result.partitions():
+        columns = list(zip(*partition))
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema
+        )
+        write_batch(batch)
+        rows_written += len(partition)
+        if progress:
+            progress(rows_written)
+        yield buffer.drain()
+
+    writer.close()
+    yield buffer.drain()
+
+def write_export_file(session_factory, stmt: Select, fmt: str, path: str, chunk_size: int = 5000,
+                      progress: Optional[Callable[[int], None]] = None):
+    """
+    Write an export to a file, atomically replacing it when complete.
+
+    Args:
+        session_factory: SQLAlchemy session factory
+        stmt: Query from build_attendance_query
+        fmt: Export format
+        path: Destination file
+        chunk_size: Rows per chunk
+        progress: Called with the running row count
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial_path = path + '.part'
+    session = session_factory()
+    try:
+        with open(partial_path, 'wb') as f:
+            for chunk in iter_export_chunks(session, stmt, fmt, chunk_size, progress):
+                f.write(chunk)
+        os.replace(partial_path, path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        session.close()
+
+def export_filename(fmt: str, params: Dict) -> str:
+    """
+    Download file name for an export, e.g. attendance_2024-01-01_2024-01-31.csv.gz.
+
+    Only [A-Za-z0-9_.-] is kept, so the name is safe in a Content-Disposition
+    header. It is never used as a path on disk (see export_file_path).
+    """
+    parts = ['attendance']
+    if params.get('employee_id'):
+        parts.append(str(params['employee_id']))
+    parts.append(str(params.get('start_date') or 'all'))
+    parts.append(str(params.get('end_date') or 'latest'))
+    return _UNSAFE_FILENAME_CHARS.sub('_', '_'.join(parts)) + '.' + EXPORT_FORMATS[fmt][1]
+
+def export_file_path(export_dir: str, job_id: str, fmt: str) -> str:
+    """Server-side file of an export job, built only from its generated id and the format."""
+    return os.path.join(export_dir, f"{job_id}.{EXPORT_FORMATS[fmt][1]}")
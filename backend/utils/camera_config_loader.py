@@ -1,13 +1,14 @@
 """
 Camera Configuration Loader
-Loads camera configurations from the database for the FTS system
+Loads camera configurations for the FTS system from the cached camera
+configuration snapshot
 """
 
 from typing import List, Optional
 from dataclasses import dataclass
 import logging
 
-from db.db_manager import DatabaseManager
+from db.camera_snapshot import CameraConfigSnapshot, camera_config_cache
 from db.db_models import CameraConfig as DBCameraConfig, Tripwire as DBTripwire
 
 logger = logging.getLogger(__name__)
@@ -43,8 +44,12 @@ class CameraConfigLoader:
     Loads camera configurations from the database for the FTS system
     """
     
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    def __init__(self, snapshot_cache=camera_config_cache):
+        self.snapshot_cache = snapshot_cache
+    
+    def get_snapshot(self) -> CameraConfigSnapshot:
+        """Current camera configuration snapshot"""
+        return self.snapshot_cache.get_snapshot()
     
     def load_active_cameras(self) -> List[CameraConfig]:
         """
@@ -54,8 +59,8 @@ class CameraConfigLoader:
             List of active camera configurations
         """
         try:
-            # Get all active cameras from database
-            db_cameras = self.db_manager.get_active_cameras()
+            # Get all active cameras from the snapshot
+            db_cameras = [camera for camera in self.get_snapshot().cameras.values() if camera.is_active]
             
             camera_configs = []
             for db_camera in db_cameras:
@@ -79,8 +84,8 @@ class CameraConfigLoader:
             List of all camera configurations
         """
         try:
-            # Get all cameras from database
-            db_cameras = self.db_manager.get_all_cameras()
+            # Get all cameras from the snapshot
+            db_cameras = list(self.get_snapshot().cameras.values())
             
             camera_configs = []
             for db_camera in db_cameras:
@@ -107,7 +112,7 @@ class CameraConfigLoader:
             Camera configuration or None if not found
         """
         try:
-            db_camera = self.db_manager.get_camera(camera_id)
+            db_camera = self.get_snapshot().get(camera_id)
             if not db_camera:
                 return None
             
@@ -128,8 +133,8 @@ class CameraConfigLoader:
             FTS camera configuration or None if conversion fails
         """
         try:
-            # Get tripwires for this camera
-            db_tripwires = self.db_manager.get_camera_tripwires(db_camera.camera_id)
+            # Tripwires were loaded with the camera
+            db_tripwires = db_camera.tripwires
             
             # Convert tripwires
             tripwires = []
@@ -184,7 +189,7 @@ class CameraConfigLoader:
             Stream URL or None if not found
         """
         try:
-            db_camera = self.db_manager.get_camera(camera_id)
+            db_camera = self.get_snapshot().get(camera_id)
             if not db_camera:
                 return None
             
@@ -208,6 +213,7 @@ class CameraConfigLoader:
             List of refreshed active camera configurations
         """
         logger.info("Refreshing camera configurations from database")
+        self.snapshot_cache.invalidate()
         return self.load_active_cameras()
     
     def validate_camera_config(self, camera_config: CameraConfig) -> bool:
@@ -0,0 +1,259 @@
+"""
+Response cache for read-heavy dashboard endpoints.
+Entries expire after a TTL and are invalidated explicitly by writes through
+per-tag generation counters: every key embeds the current generation of its
+tags, so bumping a tag makes all dependent entries unreachable at once.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from utils.logging import get_logger
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = get_logger(__name__)
+
+# Invalidation tags, one per kind of write
+TAG_ATTENDANCE = 'attendance'
+TAG_EMBEDDINGS = 'embeddings'
+TAG_EMPLOYEES = 'employees'
+
+class MemoryCacheStore:
+    """In-process LRU store with per-entry expiry."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, tags: Iterable[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisCacheStore:
+    """
+    Store shared by all workers through Redis.
+
+    Values are stored as JSON with a Redis TTL; generation counters are plain
+    Redis integers, so an invalidation in one worker is seen by all of them.
+    """
+
+    name = 'redis'
+
+    def __init__(self, redis_url: str, prefix: str = "response_cache"):
+        self._client = redis.Redis.from_url(redis_url)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(f"{self._prefix}:entry:{key}")
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._client.set(f"{self._prefix}:entry:{key}", json.dumps(value), px=int(ttl * 1000))
+
+    def generations(self, tags: Iterable[str]) -> List[int]:
+        values = self._client.mget([f"{self._prefix}:gen:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags: Iterable[str]):
+        pipe = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f"{self._prefix}:gen:{tag}")
+        pipe.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+class ResponseCache:
+    """
+    TTL cache of JSON-compatible endpoint responses.
+
+    Store failures are logged and treated as misses, so an unavailable shared
+    backend degrades to uncached reads rather than failed requests.
+    """
+
+    def __init__(self, store=None, default_ttl: float = 30.0, enabled: bool = True):
+        """
+        Args:
+            store: MemoryCacheStore or RedisCacheStore
+            default_ttl: Seconds an entry lives unless invalidated earlier
+            enabled: When False every call goes straight to the loader
+        """
+        self.store = store or MemoryCacheStore()
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._invalidations: Dict[str, int] = {}
+        self._errors = 0
+
+    def get_or_load(self, namespace: str, params: Dict[str, Any], tags: Iterable[str],
+                    loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached response or compute, cache and return it.
+
+        Args:
+            namespace: Endpoint name, used in the key and in metrics
+            params: Request parameters the response depends on
+            tags: Invalidation tags the response depends on
+            loader: Computes the response on a miss
+            ttl: Override of the default TTL in seconds
+
+        Returns:
+            The JSON-compatible response
+        """
+        if not self.enabled:
+            return jsonable_encoder(loader())
+
+        key, value = self._lookup(namespace, params, tags)
+        if value is not None:
+            return value
+        return self._store(key, jsonable_encoder(loader()), ttl)
+
+    async def aget_or_load(self, namespace: str, params: Dict[str, Any], tags: Iterable[str],
+                           loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Same as get_or_load, for a loader that is a coroutine function."""
+        if not self.enabled:
+            return jsonable_encoder(await loader())
+
+        key, value = self._lookup(namespace, params, tags)
+        if value is not None:
+            return value
+        return self._store(key, jsonable_encoder(await loader()), ttl)
+
+    def _lookup(self, namespace: str, params: Dict[str, Any], tags: Iterable[str]) -> Tuple[Optional[str], Any]:
+        """Key for the current tag generations and the value cached under it, if any."""
+        tags = sorted(tags)
+        key = None
+        try:
+            generations = self.store.generations(tags)
+            key = "{}:{}:{}".format(
+                namespace,
+                '.'.join(str(generation) for generation in generations),
+                json.dumps(jsonable_encoder(params), sort_keys=True)
+            )
+            value = self.store.get(key)
+        except Exception as e:
+            self._record_error(e)
+            value = None
+
+        self._record(namespace, 'hits' if value is not None else 'misses')
+        return key, value
+
+    def _store(self, key: Optional[str], value: Any, ttl: Optional[float]) -> Any:
+        # Keys embed the generations read before loading, so a write during the
+        # load leaves this value under a key that is never read again
+        if key is not None:
+            try:
+                self.store.set(key, value, ttl or self.default_ttl)
+            except Exception as e:
+                self._record_error(e)
+        return value
+
+    def invalidate(self, *tags: str):
+        """Invalidate every cached response that depends on any of the tags."""
+        if not self.enabled or not tags:
+            return
+        try:
+            self.store.bump(tags)
+        except Exception as e:
+            self._record_error(e)
+            return
+        with self._lock:
+            for tag in tags:
+                self._invalidations[tag] = self._invalidations.get(tag, 0) + 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit/miss counters overall and per endpoint."""
+        with self._lock:
+            endpoints = {
+                namespace: {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / max(counts['hits'] + counts['misses'], 1), 3)
+                }
+                for namespace, counts in self._stats.items()
+            }
+            invalidations = dict(self._invalidations)
+            errors = self._errors
+
+        hits = sum(counts['hits'] for counts in endpoints.values())
+        misses = sum(counts['misses'] for counts in endpoints.values())
+        return {
+            'enabled': self.enabled,
+            'backend': self.store.name,
+            'default_ttl_seconds': self.default_ttl,
+            'entries': self.store.size(),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / max(hits + misses, 1), 3),
+            'errors': errors,
+            'invalidations': invalidations,
+            'endpoints': endpoints
+        }
+
+    def _record(self, namespace: str, counter: str):
+        with self._lock:
+            counts = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counts[counter] += 1
+
+    def _record_error(self, error: Exception):
+        with self._lock:
+            self._errors += 1
+        logger.warning(f"Response cache store error: {error}")
+
+def create_response_cache() -> ResponseCache:
+    """Create the cache for the configured RESPONSE_CACHE_BACKEND ('memory' or 'redis')."""
+    store = None
+    if settings.RESPONSE_CACHE_BACKEND == 'redis':
+        if redis is None:
+            logger.warning("RESPONSE_CACHE_BACKEND is 'redis' but the redis package is not installed; using in-process cache")
+        else:
+            store = RedisCacheStore(settings.REDIS_URL, prefix=settings.RESPONSE_CACHE_REDIS_PREFIX)
+    return ResponseCache(
+        store=store or MemoryCacheStore(settings.RESPONSE_CACHE_MAX_ENTRIES),
+        default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        enabled=settings.RESPONSE_CACHE_ENABLED
+    )
+
+# Global instance
+response_cache = create_response_cache()